@@ -0,0 +1,50 @@
+import itertools
+
+import pytest
+
+from vtclib.config import Settings, settings
+from vtclib.client import connect
+from vtclib.mock import MockServer
+
+orgs = itertools.count(1)
+
+
+class MockOrg:
+    """A client connected to a new org of a MockServer; values override the test settings."""
+
+    def __init__(self, server, **values):
+        self.server = server
+        self.vmc = server.vmc
+        # a new org each time: the inventory indexes are kept per org
+        config = {'base_url': server.base_url, 'csp_url': server.csp_url, 'api_token': "test-token", 'org_id': "org-{}".format(next(orgs)),
+                  'aws_account': "111122223333", 'region': "us-west-2", 'dxgw_id': "dxgw-1", 'dxgw_owner': "222233334444",
+                  'tgw_id': "tgw-customer", 'inventory_ttl': 0.0, 'rate_limit': 0.0, 'poll_initial': 0.02, 'poll_max': 0.1}
+        config.update(values)
+        self.settings = Settings(**config)
+        settings.update(self.settings)
+        self.org_id = self.settings.org_id
+        self.client = connect(self.settings)
+        self.session_token = self.client.tokens.get_token()
+
+    def group(self, name):
+        return next(group for group in self.vmc.groups.values() if group['name'] == name)
+
+
+@pytest.fixture
+def mock_server():
+    server = MockServer(sddcs=6, groups=2, op_duration=0.05, seed=1).start()
+    try:
+        yield server
+    finally:
+        server.stop()
+
+@pytest.fixture
+def mock_org(mock_server):
+    return MockOrg(mock_server)
+
+@pytest.fixture(autouse=True)
+def shared_settings():
+    # MockOrg replaces the shared settings (state_db, journal...): put them back after each test
+    saved = Settings().update(settings)
+    yield
+    settings.update(saved)
@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("httpx")
+
+from vtclib.aio import AsyncVMCClient
+from vtclib.client import APIError
+
+
+def run(org, work, **options):
+    async def main():
+        async with AsyncVMCClient(org.client.base_url, org.client.tokens, **options) as api:
+            return await work(api)
+    return asyncio.run(main())
+
+def update_members_body(org):
+    return {"type": "UPDATE_MEMBERS", "resource_id": org.group("group-00")['resource_id'], "resource_type": "network-connectivity-config",
+            "config": {"type": "AwsUpdateDeploymentGroupMembersConfig", "add_members": [], "remove_members": []}}
+
+
+def test_submitted_operations_are_waited_on(mock_org):
+    async def work(api):
+        task_ids = [await api.submit(update_members_body(mock_org), mock_org.org_id) for _ in range(3)]
+        return task_ids, await api.wait_for_tasks(task_ids, mock_org.org_id)
+    task_ids, results = run(mock_org, work)
+    assert all(task_id in mock_org.vmc.operations for task_id in task_ids)
+    assert [results[task_id]['state']['name'] for task_id in task_ids] == ["COMPLETED"] * 3
+
+def test_an_unknown_task_ends_the_wait(mock_org):
+    result = run(mock_org, lambda api: asyncio.wait_for(api.wait_for_task("op-unknown", mock_org.org_id), 5))
+    assert result['state']['name'] == "FAILED"
+    assert result['state']['error_code'] == "HTTP 404"
+
+def test_an_error_answer_raises(mock_org):
+    with pytest.raises(APIError, match="HTTP 404"):
+        run(mock_org, lambda api: api.group("group-unknown", mock_org.org_id))
+
+def test_a_failing_page_raises(mock_org):
+    mock_org.server.error_rate = 1
+    with pytest.raises(APIError, match="HTTP 503"):
+        run(mock_org, lambda api: api.groups(mock_org.org_id), retries=0)
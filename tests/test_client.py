@@ -0,0 +1,116 @@
+import threading
+import time
+
+import pytest
+import requests
+
+from vtclib.client import CircuitOpenError, InventoryCache
+
+from conftest import MockOrg
+
+
+def deployments_url(org):
+    return "{}/inventory/{}/core/deployments".format(org.client.base_url, org.org_id)
+
+def create_group_url(org):
+    return "{}/network/{}/core/network-connectivity-configs/create-group-network-connectivity".format(org.client.base_url, org.org_id)
+
+
+def test_a_throttled_request_waits_for_retry_after(mock_server):
+    org = MockOrg(mock_server, retries=1)
+    mock_server.throttle_rate = 1
+    threading.Timer(0.1, setattr, (mock_server, "throttle_rate", 0)).start()
+    start = time.time()
+    response = org.client.get(deployments_url(org), org.session_token)
+    assert response.status_code == 200
+    assert time.time() - start >= mock_server.retry_after
+    assert mock_server.requests["deployments"] == 2
+
+def test_a_throttled_post_is_retried(mock_server):
+    # the API didn't act on a 429, so even a POST is safe to send again
+    org = MockOrg(mock_server, retries=1)
+    mock_server.throttle_rate = 1
+    threading.Timer(0.1, setattr, (mock_server, "throttle_rate", 0)).start()
+    org.client.post(create_group_url(org), org.session_token, json={})
+    assert mock_server.requests["create_group"] == 2
+
+def test_server_errors_are_retried_for_idempotent_requests_only(mock_server):
+    org = MockOrg(mock_server, retries=2, breaker_threshold=0)
+    mock_server.error_rate = 1
+    assert org.client.get(deployments_url(org), org.session_token).status_code == 503
+    assert mock_server.requests["deployments"] == 3
+    assert org.client.post(create_group_url(org), org.session_token, json={}).status_code == 503
+    assert mock_server.requests["create_group"] == 1
+
+def test_breaker_opens_then_closes_after_a_good_trial(mock_server):
+    org = MockOrg(mock_server, retries=0, breaker_threshold=2, breaker_cooldown=0.2)
+    mock_server.error_rate = 1
+    for _ in range(2):
+        assert org.client.get(deployments_url(org), org.session_token).status_code == 503
+    with pytest.raises(CircuitOpenError):
+        org.client.get(deployments_url(org), org.session_token)
+    assert mock_server.requests["deployments"] == 2
+    mock_server.error_rate = 0
+    time.sleep(0.25)
+    assert org.client.get(deployments_url(org), org.session_token).status_code == 200
+    assert org.client.get(deployments_url(org), org.session_token).status_code == 200
+
+def test_a_failed_trial_opens_the_breaker_again(mock_server):
+    org = MockOrg(mock_server, retries=0, breaker_threshold=2, breaker_cooldown=0.2)
+    mock_server.error_rate = 1
+    for _ in range(2):
+        org.client.get(deployments_url(org), org.session_token)
+    time.sleep(0.25)
+    assert org.client.get(deployments_url(org), org.session_token).status_code == 503
+    with pytest.raises(CircuitOpenError):
+        org.client.get(deployments_url(org), org.session_token)
+
+def test_a_trial_that_raised_does_not_keep_the_breaker_open(mock_server, monkeypatch):
+    org = MockOrg(mock_server, retries=0, breaker_threshold=2, breaker_cooldown=0.2)
+    mock_server.error_rate = 1
+    for _ in range(2):
+        org.client.get(deployments_url(org), org.session_token)
+    mock_server.error_rate = 0
+    time.sleep(0.25)
+    def broken(*args, **kwargs):
+        raise requests.exceptions.ChunkedEncodingError("connection broken")
+    with monkeypatch.context() as patch:
+        patch.setattr(org.client.session, "request", broken)
+        with pytest.raises(requests.exceptions.ChunkedEncodingError):
+            org.client.get(deployments_url(org), org.session_token)
+    time.sleep(0.25)
+    assert org.client.get(deployments_url(org), org.session_token).status_code == 200
+
+def test_invalidate_removes_only_the_cache_own_files(tmp_path):
+    (tmp_path / "plan.json").write_text("{}")
+    other = InventoryCache(60, str(tmp_path), "org-2")
+    other.put("https://vmc/api/inventory/org-2/core/deployments", '"etag"', [])
+    cache = InventoryCache(60, str(tmp_path), "org-1")
+    cache.put("https://vmc/api/inventory/org-1/core/deployments", '"etag"', [])
+    cache.invalidate()
+    assert cache.get("https://vmc/api/inventory/org-1/core/deployments") is None
+    kept = other.path("https://vmc/api/inventory/org-2/core/deployments")
+    assert sorted(str(path) for path in tmp_path.iterdir()) == sorted([str(tmp_path / "plan.json"), kept])
+
+def test_a_token_of_the_caller_is_sent_as_is(mock_org):
+    # not one the org's token manager issued: the mock refuses it rather than seeing the manager's
+    assert mock_org.client.get(deployments_url(mock_org), "someone-else").status_code == 401
+    assert mock_org.client.get(deployments_url(mock_org)).status_code == 200
+
+def test_an_expired_token_the_manager_issued_is_refreshed(mock_org):
+    tokens = mock_org.client.tokens
+    tokens.expires_at = 0
+    assert mock_org.client.get(deployments_url(mock_org), mock_org.session_token).status_code == 200
+    assert mock_org.server.requests["authorize"] == 2
+    assert tokens.replaces(tokens.access_token) and tokens.replaces(mock_org.session_token)
+
+def test_listings_are_cached_then_revalidated(mock_server):
+    org = MockOrg(mock_server, inventory_ttl=60)
+    url = deployments_url(org)
+    first = org.client.get_cached(url, org.session_token)
+    assert org.client.get_cached(url, org.session_token) == first
+    assert mock_server.requests["deployments"] == 1
+    org.client.cache.entries[url]['fetched_at'] = 0        # stale: revalidated with its ETag
+    assert org.client.get_cached(url, org.session_token) == first
+    assert mock_server.requests["deployments"] == 2
+    assert org.client.cache.fresh(org.client.cache.entries[url])
@@ -0,0 +1,47 @@
+import threading
+
+import pytest
+
+from vtclib.client import APIError
+from vtclib.inventory import iter_deployments, get_index, get_all_groups_info
+
+from conftest import MockOrg
+
+
+def test_one_index_per_org_however_many_threads_ask(mock_org):
+    barrier = threading.Barrier(8)
+    found = []
+    def ask():
+        barrier.wait()
+        found.append(get_index(mock_org.org_id, mock_org.session_token))
+    threads = [threading.Thread(target=ask) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(index) for index in found}) == 1
+
+def test_the_index_uses_the_client_tokens(mock_org):
+    # whoever asks first, the index keeps working with the org's own fresh token
+    index = get_index(mock_org.org_id, "expired-token")
+    assert index.group("group-00")['id'] == mock_org.group("group-00")['id']
+
+def test_all_groups_info_fetches_only_the_configs(mock_org):
+    records = list(get_all_groups_info(mock_org.org_id, mock_org.session_token))
+    assert [record.name for record in records] == ["group-00", "group-01"]
+    assert records[0].sddcs == mock_org.group("group-00")['members']
+    assert "group" not in mock_org.server.requests
+    assert mock_org.server.requests["config"] == 2
+
+def test_listings_are_read_page_by_page(mock_server):
+    org = MockOrg(mock_server, page_size=2)
+    assert [sddc['id'] for sddc in iter_deployments(org.org_id, org.session_token)] == [sddc['id'] for sddc in org.vmc.sddcs]
+    assert mock_server.requests["deployments"] == 3
+
+def test_an_error_page_raises(mock_server):
+    org = MockOrg(mock_server, page_size=2, retries=0, breaker_threshold=0)
+    sddcs = iter_deployments(org.org_id, org.session_token)
+    next(sddcs)
+    mock_server.error_rate = 1
+    with pytest.raises(APIError, match="HTTP 503 from /api/inventory/{}/core/deployments".format(org.org_id)):
+        list(sddcs)
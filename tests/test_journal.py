@@ -0,0 +1,46 @@
+from vtclib.journal import Journal, get_journal
+from vtclib.operations import update_members
+from vtclib.tasks import wait_for_tasks, resume_tasks
+
+from conftest import MockOrg
+
+
+def test_pending_are_the_operations_never_finished(tmp_path):
+    journal = Journal(str(tmp_path / "journal"))
+    journal.submitted("org-1", "op-1", "UPDATE_MEMBERS", "ncc-1")
+    journal.submitted("org-1", "op-2", "ADD_EXTERNAL_ACCOUNT", "ncc-1")
+    journal.submitted("org-2", "op-3", "UPDATE_MEMBERS", "ncc-2")
+    journal.finished("org-1", "op-1", "COMPLETED")
+    assert [entry.task_id for entry in journal.pending()] == ["op-2", "op-3"]
+    assert [entry.task_id for entry in journal.pending("org-1")] == ["op-2"]
+    entry = journal.pending("org-1")[0]
+    assert (entry.kind, entry.resource) == ("ADD_EXTERNAL_ACCOUNT", "ncc-1")
+
+def test_a_torn_line_is_skipped_and_not_extended(tmp_path):
+    path = tmp_path / "journal"
+    journal = Journal(str(path))
+    journal.submitted("org-1", "op-1", "UPDATE_MEMBERS", "ncc-1")
+    with open(path, "ab") as f:
+        f.write(b'{"event":"submitted","org_id":"org-1","task_')     # power loss in the middle of a write
+    journal.submitted("org-1", "op-2", "UPDATE_MEMBERS", "ncc-1")
+    assert [entry.task_id for entry in journal.pending()] == ["op-1", "op-2"]
+    assert path.read_bytes().endswith(b"\n")
+    assert len(path.read_bytes().splitlines()) == 3
+
+def test_missing_file_has_nothing_pending(tmp_path):
+    assert Journal(str(tmp_path / "none")).pending() == []
+
+def test_an_interrupted_wait_is_resumed_without_resubmitting(mock_server, tmp_path):
+    org = MockOrg(mock_server, journal=str(tmp_path / "journal"))
+    mock_server.vmc.op_duration = 0.3
+    resource_id = org.group("group-00")['resource_id']
+    task_id = update_members([], [], resource_id, org.org_id, org.session_token)
+    # interrupted before it completed
+    assert wait_for_tasks([task_id], org.org_id, org.session_token, timeout=0.05)[task_id]['state']['name'] != "COMPLETED"
+    [entry] = get_journal().pending(org.org_id)
+    assert (entry.task_id, entry.kind, entry.resource) == (task_id, "UPDATE_MEMBERS", resource_id)
+    get_journal().submitted(org.org_id, "op-expired", "UPDATE_MEMBERS", resource_id)
+    results = resume_tasks(get_journal().pending(org.org_id), org.org_id, org.session_token)
+    assert {task_id: result['state']['name'] for task_id, result in results.items()} == {task_id: "COMPLETED"}
+    assert mock_server.requests["aws_operation"] == 1
+    assert get_journal().pending(org.org_id) == []
@@ -0,0 +1,26 @@
+import random
+
+from vtclib.metrics import Histogram, endpoint
+
+
+def test_percentiles_are_within_one_percent():
+    values = sorted(random.Random(1).lognormvariate(-4, 2) for _ in range(10000))
+    histogram = Histogram()
+    for value in values:
+        histogram.record(value)
+    for fraction in (0.01, 0.5, 0.9, 0.99, 0.999):
+        exact = values[round(fraction * len(values)) - 1]
+        assert abs(histogram.percentile(fraction) - exact) <= exact / 100
+
+def test_cumulative_counts_every_value_under_a_bound():
+    histogram = Histogram()
+    for micros in range(4900, 5100):
+        histogram.record(micros / 1e6)
+    (bound, count), = histogram.cumulative([0.005])
+    assert 101 <= count <= 101 + 5000 // 128        # 4900..5000 at least, and the rest of the straddling bucket at most
+
+def test_endpoint_templates_ids():
+    assert endpoint("https://vmc.vmware.com/api/inventory/org-1/core/deployment-groups/g-2?x=1") == \
+        "/api/inventory/{org}/core/deployment-groups/{id}"
+    assert endpoint("https://vmc.vmware.com/api/network/org-1/core/network-connectivity-configs/create-group-network-connectivity") == \
+        "/api/network/{org}/core/network-connectivity-configs/create-group-network-connectivity"
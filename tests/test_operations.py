@@ -0,0 +1,18 @@
+from vtclib.operations import connect_aws_account, find_attachments, apply_attachment_batch
+from vtclib.tasks import wait_for_tasks
+
+
+def test_attachment_batch_runs_one_operation_at_a_time(mock_org):
+    resource_id = mock_org.group("group-00")['resource_id']
+    for account in ("111122223333", "444455556666"):
+        wait_for_tasks([connect_aws_account(account, "us-west-2", resource_id, mock_org.org_id, mock_org.session_token)],
+                       mock_org.org_id, mock_org.session_token)
+    pending = find_attachments(resource_id, mock_org.org_id, mock_org.session_token, "PENDING_ACCEPTANCE")
+    vpcs = [(account, att.attach_id) for account, attachments in pending.items() for att in attachments]
+    results = apply_attachment_batch("ACCEPT", vpcs, resource_id, mock_org.org_id, mock_org.session_token)
+    assert [result['state']['name'] for result in results.values()] == ["COMPLETED", "COMPLETED"]
+    operations = [operation for operation in mock_org.vmc.operations.values() if operation['type'] == "APPLY_ATTACHMENT_ACTION"]
+    # the second one submitted once the first was done
+    assert operations[1]['submitted'] - operations[0]['submitted'] >= mock_org.vmc.op_duration
+    assert find_attachments(resource_id, mock_org.org_id, mock_org.session_token, "PENDING_ACCEPTANCE") == \
+        {"111122223333": [], "444455556666": []}
@@ -0,0 +1,46 @@
+import io
+import json
+from dataclasses import dataclass
+
+from vtclib.output import Output
+
+
+@dataclass
+class Sddc:
+    id: str
+    name: str
+    members: list
+
+RECORDS = [Sddc("sddc-1", "prod", ["a", "b"]), Sddc("sddc-2", "dev", [])]
+
+
+def render(fmt, records=RECORDS):
+    stream = io.StringIO()
+    n = Output(fmt, stream).emit(iter(records))
+    return n, stream.getvalue()
+
+def test_json_is_one_document():
+    n, text = render("json")
+    assert n == 2
+    assert json.loads(text) == [{'id': "sddc-1", 'name': "prod", 'members': ["a", "b"]}, {'id': "sddc-2", 'name': "dev", 'members': []}]
+
+def test_ndjson_is_one_record_per_line():
+    _, text = render("ndjson")
+    assert [json.loads(line)['id'] for line in text.splitlines()] == ["sddc-1", "sddc-2"]
+
+def test_csv_has_a_header_and_flat_values():
+    _, text = render("csv")
+    assert text.splitlines() == ["id,name,members", "sddc-1,prod,a b", "sddc-2,dev,"]
+
+def test_nothing_to_render_is_an_empty_document():
+    assert render("json", []) == (0, "[]\n")
+    assert render("csv", []) == (0, "")
+
+def test_several_profiles_come_out_in_profile_order():
+    stream = io.StringIO()
+    output = Output("json", stream)
+    for profile, records in (("dev", RECORDS[1:]), ("prod", RECORDS[:1])):
+        output.local.profile = profile
+        output.emit(records)
+    output.flush(["prod", "dev"])
+    assert [(row['profile'], row['id']) for row in json.loads(stream.getvalue())] == [("prod", "sddc-1"), ("dev", "sddc-2")]
@@ -0,0 +1,65 @@
+import threading
+import time
+
+import pytest
+
+import vtclib.plans
+from vtclib.plans import plan_steps, plan_group, run_plan
+
+
+def test_steps_are_keyed_by_id_or_position():
+    steps, max_workers = plan_steps({'max_workers': 2, 'steps': [
+        {'id': "group", 'op': "create-group", 'name': "prod", 'sddc': "sddc-01"},
+        {'op': "update-members", 'group': "prod", 'add': ["sddc-02"], 'after': ["group"]},
+        {'op': "connect-aws", 'group': "prod", 'after': ["group"]},
+    ]})
+    assert list(steps) == ["group", "2", "3"]
+    assert steps["2"]['after'] == ["group"]
+    assert max_workers == 2
+
+def test_dependency_cycle_is_rejected():
+    with pytest.raises(ValueError, match="Dependency cycle: a -> b -> c -> a"):
+        plan_steps({'steps': [{'id': "a", 'op': "detach-tgw", 'group': "g", 'after': ["b"]},
+                              {'id': "b", 'op': "detach-tgw", 'group': "g", 'after': ["c"]},
+                              {'id': "c", 'op': "detach-tgw", 'group': "g", 'after': ["a"]}]})
+
+def test_unknown_dependency_is_rejected():
+    with pytest.raises(ValueError, match="Step 'a' depends on unknown step 'b'"):
+        plan_steps({'steps': [{'id': "a", 'op': "detach-tgw", 'group': "g", 'after': ["b"]}]})
+
+@pytest.mark.parametrize("steps, message", [
+    ([{'id': "a", 'op': "detach-tgw"}, {'id': "a", 'op': "detach-tgw"}], "Duplicate step id 'a'"),
+    ([{'id': "a", 'op': "explode"}], "Step 'a': unknown op 'explode'"),
+    ([{'id': "a", 'op': "attach-tgw", 'prefixes': ["10.0.0.1/8"]}], "Step 'a': '10.0.0.1/8' has host bits set"),
+])
+def test_bad_steps_are_rejected(steps, message):
+    with pytest.raises(ValueError, match=message):
+        plan_steps({'steps': steps})
+
+def test_steps_on_one_group_never_overlap(monkeypatch):
+    running = []
+    overlaps = []
+    lock = threading.Lock()
+    def run_step(step_id, step, org_id, session_token):
+        with lock:
+            overlaps.extend(other for other in running if plan_group(steps[other]) == plan_group(step))
+            running.append(step_id)
+        time.sleep(0.05)
+        with lock:
+            running.remove(step_id)
+        return "COMPLETED"
+    monkeypatch.setattr(vtclib.plans, "run_plan_step", run_step)
+    steps, _ = plan_steps({'steps': [
+        {'id': "create", 'op': "create-group", 'name': "prod", 'sddc': "sddc-01"},
+        {'id': "members", 'op': "update-members", 'group': "prod", 'add': ["sddc-02"], 'after': ["create"]},
+        {'id': "aws", 'op': "connect-aws", 'group': "prod", 'after': ["create"]},
+        {'id': "tgw", 'op': "attach-tgw", 'group': "prod", 'prefixes': ["10.0.0.0/8"], 'after': ["create"]},
+        {'id': "dev-tgw", 'op': "detach-tgw", 'group': "dev"},
+        {'id': "dev-aws", 'op': "disconnect-aws", 'group': "dev"},
+    ]})
+    start = time.time()
+    state = run_plan(steps, "org-1", "token", max_workers=4)
+    assert set(state.values()) == {"COMPLETED"}
+    assert overlaps == []
+    # prod's four steps one after the other, dev's two alongside them
+    assert time.time() - start < 0.05 * 5
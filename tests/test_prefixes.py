@@ -0,0 +1,67 @@
+import ipaddress
+
+import pytest
+
+from vtclib.operations import attach_dxgw, attach_tgw
+from vtclib.prefixes import PrefixError, parse_prefixes, aggregate, find_conflicts, prepare_prefixes
+from vtclib.routes import RouteIndex
+
+
+def networks(*values):
+    return [ipaddress.ip_network(value) for value in values]
+
+
+def test_parse_reports_every_bad_entry():
+    with pytest.raises(PrefixError) as e:
+        parse_prefixes(["10.0.0.0/16", "10.1.0.1/16", "nonsense", "10.2.0.0/33"])
+    message = str(e.value)
+    assert "'10.1.0.1/16' has host bits set, did you mean 10.1.0.0/16?" in message
+    assert "'nonsense' is not a CIDR" in message
+    assert "'10.2.0.0/33' is not a CIDR" in message
+
+def test_aggregate_collapses_duplicates_contained_and_adjacent():
+    collapsed = aggregate(networks("10.0.0.0/24", "10.0.1.0/24", "10.0.0.0/24", "10.0.0.128/25", "2001:db8::/48", "192.168.0.0/16"))
+    assert [str(network) for network in collapsed] == ["10.0.0.0/23", "192.168.0.0/16", "2001:db8::/48"]
+
+
+def route_index():
+    index = RouteIndex()
+    index.add("members", "10.0.0.0/16", "sddc-1")
+    index.add("members", "10.1.2.0/24", "vpc-attach-1")
+    index.add("members", "pl-123456", "vpc-attach-2")       # prefix list, not a CIDR
+    index.add("external", "172.16.0.0/12", "tgw-1")
+    return index
+
+def test_conflicts_exact_containing_and_contained():
+    conflicts = find_conflicts(networks("10.0.0.0/16", "10.0.4.0/24", "10.1.0.0/16", "192.168.0.0/24"), route_index())
+    found = {(conflict.prefix, conflict.destination, conflict.exact) for conflict in conflicts}
+    assert found == {("10.0.0.0/16", "10.0.0.0/16", True),
+                     ("10.0.4.0/24", "10.0.0.0/16", False),      # inside a route
+                     ("10.1.0.0/16", "10.1.2.0/24", False)}      # a route inside it
+
+def test_conflicts_ignore_own_targets():
+    assert find_conflicts(networks("10.1.2.0/24"), route_index(), ["vpc-attach-1"]) == []
+
+
+def test_prepare_collapses_and_checks_the_limit(mock_org):
+    assert prepare_prefixes(["10.50.0.0/24", "10.50.1.0/24"], org_id=mock_org.org_id) == ["10.50.0.0/23"]
+    with pytest.raises(PrefixError, match="more than the limit of 2"):
+        prepare_prefixes(["10.50.0.0/24", "10.52.0.0/24", "10.54.0.0/24"], org_id=mock_org.org_id, limit=2)
+
+def test_prepare_refuses_a_vpc_route_already_routed_elsewhere(mock_org):
+    group = mock_org.group("group-00")
+    with pytest.raises(PrefixError, match=r"10\.0\.0\.0/20 is already routed to sddc-0000 \(members\)"):
+        prepare_prefixes(["10.0.0.0/20"], group['resource_id'], mock_org.org_id, mock_org.session_token, ["tgw-attach-1"])
+
+def test_dxgw_may_advertise_the_sddc_cidrs(mock_org):
+    group = mock_org.group("group-00")
+    task_id = attach_dxgw(["10.0.0.0/20"], group['resource_id'], mock_org.org_id, "222233334444", "dxgw-1", "us-west-2",
+                          mock_org.session_token)
+    assert task_id
+    assert mock_org.vmc.operations[task_id]['config']['direct_connect_gateway_association']['peering_region_configs'][0]['allowed_prefixes'] == \
+        ["10.0.0.0/20"]
+
+def test_external_tgw_route_conflict_is_a_warning(mock_org, capsys):
+    group = mock_org.group("group-00")
+    assert attach_tgw(["10.0.0.0/20"], group['resource_id'], mock_org.org_id, mock_org.session_token)
+    assert "Warning: 10.0.0.0/20 is already routed to sddc-0000 (members)" in capsys.readouterr().out
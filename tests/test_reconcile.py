@@ -0,0 +1,97 @@
+import json
+
+import pytest
+
+from vtclib.reconcile import diff_group, read_group, reconcile
+
+
+def diff(mock_org, desired):
+    current = read_group(desired['name'], mock_org.org_id, mock_org.session_token)
+    return diff_group(desired, current, mock_org.org_id, mock_org.session_token)
+
+def connect_account(mock_org, group_name, number="111122223333"):
+    # what connect-aws leaves: an account whose owner requested two attachments
+    group = mock_org.group(group_name)
+    mock_org.vmc.apply("ADD_EXTERNAL_ACCOUNT", group['resource_id'], {'account': {'account_number': number}})
+    return group['accounts'][number]['attachments']
+
+
+def test_a_group_in_its_desired_state_needs_no_step(mock_org):
+    assert diff(mock_org, {'name': "group-00", 'sddcs': ["sddc-00"], 'aws_accounts': [], 'dxgw': None, 'tgw': None}) == []
+
+def test_keys_left_out_are_not_managed(mock_org):
+    connect_account(mock_org, "group-00")
+    assert diff(mock_org, {'name': "group-00"}) == []
+
+def test_a_missing_group_is_created_then_completed(mock_org):
+    steps = diff(mock_org, {'name': "new", 'sddcs': ["sddc-02", "sddc-03"]})
+    assert [(step['id'], step['op']) for step in steps] == [("new:create", "create-group"), ("new:members", "update-members")]
+    assert steps[0]['sddc'] == "sddc-02"
+    assert steps[1]['add'] == ["sddc-0003"] and steps[1]['after'] == ["new:create"]
+
+def test_membership_is_made_exact(mock_org):
+    steps = diff(mock_org, {'name': "group-00", 'sddcs': ["sddc-04", "sddc-05"]})
+    assert len(steps) == 1
+    assert (steps[0]['add'], steps[0]['remove']) == (["sddc-0004", "sddc-0005"], ["sddc-0000"])
+
+def test_vpcs_are_accepted_before_their_routes_are_set(mock_org):
+    attachments = connect_account(mock_org, "group-00")
+    vpc_id = attachments[0]['vpc_id']
+    steps = {step['op']: step for step in diff(mock_org, {'name': "group-00", 'vpcs': {vpc_id: ["10.60.0.0/16"]}})}
+    assert steps['accept-vpcs']['vpcs'] == [vpc_id]
+    assert steps['vpc-prefixes']['attachment'] == attachments[0]['attach_id']
+    assert steps['accept-vpcs']['id'] in steps['vpc-prefixes']['after']
+
+def test_same_prefixes_in_another_form_are_in_sync(mock_org):
+    group = mock_org.group("group-00")
+    mock_org.vmc.apply("ASSOCIATE_DIRECT_CONNECT_GATEWAY", group['resource_id'], {'direct_connect_gateway_association': {
+        'direct_connect_gateway_id': "dxgw-1", 'peering_region_configs': [{'allowed_prefixes': ["10.99.0.0/16"]}]}})
+    assert diff(mock_org, {'name': "group-00", 'dxgw': {'prefixes': ["10.99.0.0/17", "10.99.128.0/17"]}}) == []
+
+def test_disconnecting_an_account_waits_for_its_detached_vpcs(mock_org):
+    attachments = connect_account(mock_org, "group-00")
+    attachments[0]['state'] = "AVAILABLE"
+    steps = {step['op']: step for step in diff(mock_org, {'name': "group-00", 'aws_accounts': [], 'vpcs': {}})}
+    assert steps['detach-vpcs']['vpcs'] == [attachments[0]['attach_id']]
+    assert steps['detach-vpcs']['id'] in steps['disconnect-aws']['after']
+
+def test_the_steps_of_a_group_run_one_after_the_other(mock_org):
+    connect_account(mock_org, "group-00")
+    steps = diff(mock_org, {'name': "group-00", 'sddcs': ["sddc-00", "sddc-04"], 'aws_accounts': ["111122223333", "444455556666"],
+                            'tgw': {'prefixes': ["10.98.0.0/16"]}})
+    assert len(steps) == 3
+    for previous, following in zip(steps, steps[1:]):
+        assert previous['id'] in following['after']
+
+def associate(mock_org, operation_type, association):
+    mock_org.vmc.apply(operation_type, mock_org.group("group-00")['resource_id'], association)
+
+def test_tgw_prefixes_are_updated_in_place(mock_org, tmp_path):
+    associate(mock_org, "ASSOCIATE_CUSTOMER_TRANSIT_GATEWAY", {'customer_transit_gateway_association': {
+        'customer_transit_gateway_id': "tgw-customer", 'peering_region_configs': [{'action': "ADD", 'configured_prefixes': ["10.98.0.0/16"]}]}})
+    desired = {'name': "group-00", 'tgw': {'prefixes': ["10.97.0.0/16"]}}
+    assert [step['op'] for step in diff(mock_org, desired)] == ["update-tgw"]
+    path = tmp_path / "state.json"
+    path.write_text(json.dumps({'groups': [desired]}))
+    assert reconcile(str(path), mock_org.org_id, mock_org.session_token) == {"group-00:update-tgw": "COMPLETED"}
+    assert mock_org.group("group-00")['customer_tgws']["tgw-customer"]['peering_regions'][0]['configured_prefixes'] == ["10.97.0.0/16"]
+
+def test_recreating_a_dxgw_association_needs_allow_disruptive(mock_org, tmp_path):
+    associate(mock_org, "ASSOCIATE_DIRECT_CONNECT_GATEWAY", {'direct_connect_gateway_association': {
+        'direct_connect_gateway_id': "dxgw-1", 'peering_region_configs': [{'allowed_prefixes': ["10.99.0.0/16"]}]}})
+    desired = {'name': "group-00", 'dxgw': {'prefixes': ["10.0.0.0/20"]}}
+    steps = diff(mock_org, desired)
+    assert [(step['op'], step.get('disruptive')) for step in steps] == [("detach-dxgw", True), ("attach-dxgw", True)]
+    path = tmp_path / "state.json"
+    path.write_text(json.dumps({'groups': [desired]}))
+    assert reconcile(str(path), mock_org.org_id, mock_org.session_token, dry_run=True) == {}
+    with pytest.raises(ValueError, match="--allow-disruptive"):
+        reconcile(str(path), mock_org.org_id, mock_org.session_token)
+    assert mock_org.vmc.operations == {}
+    state = reconcile(str(path), mock_org.org_id, mock_org.session_token, allow_disruptive=True)
+    assert set(state.values()) == {"COMPLETED"}
+
+def test_removing_a_dxgw_association_is_not_disruptive(mock_org):
+    associate(mock_org, "ASSOCIATE_DIRECT_CONNECT_GATEWAY", {'direct_connect_gateway_association': {
+        'direct_connect_gateway_id': "dxgw-1", 'peering_region_configs': [{'allowed_prefixes': ["10.99.0.0/16"]}]}})
+    assert [(step['op'], step.get('disruptive')) for step in diff(mock_org, {'name': "group-00", 'dxgw': None})] == [("detach-dxgw", None)]
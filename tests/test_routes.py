@@ -0,0 +1,60 @@
+from vtclib.mock import MockError, MockHandler
+from vtclib.routes import RouteIndex, RouteWatcher, get_route_index
+
+from conftest import MockOrg
+
+
+def test_lookup_is_longest_prefix_match_per_table():
+    index = RouteIndex()
+    index.add("members", "10.0.0.0/8", "tgw-1")
+    index.add("members", "10.1.0.0/16", "sddc-1")
+    index.add("members", "10.1.2.0/24", "vpc-attach-1")
+    index.add("external", "0.0.0.0/0", "dxgw-1")
+    index.add("external", "2001:db8::/32", "dxgw-1")
+    assert index.lookup("10.1.2.3") == [("members", "10.1.2.0/24", ["vpc-attach-1"]), ("external", "0.0.0.0/0", ["dxgw-1"])]
+    assert index.lookup("10.1.3.3") == [("members", "10.1.0.0/16", ["sddc-1"]), ("external", "0.0.0.0/0", ["dxgw-1"])]
+    assert index.lookup("10.200.0.1")[0] == ("members", "10.0.0.0/8", ["tgw-1"])
+    assert index.lookup("2001:db8::1") == [("external", "2001:db8::/32", ["dxgw-1"])]
+    assert index.lookup("192.168.0.1") == [("external", "0.0.0.0/0", ["dxgw-1"])]
+
+def test_targets_and_prefix_lists():
+    index = RouteIndex()
+    index.add("members", "10.1.0.0/16", "sddc-1")
+    index.add("members", "10.1.0.0/16", "sddc-2")
+    index.add("members", "pl-123", "vpc-attach-1")
+    assert list(index.routes("members")) == [("10.1.0.0/16", ["sddc-1", "sddc-2"]), ("pl-123", ["vpc-attach-1"])]
+    assert index.by_target("vpc-attach-1") == [("members", "pl-123", ["vpc-attach-1"])]
+
+def test_route_index_of_a_mock_group(mock_org):
+    group = mock_org.group("group-01")
+    index = get_route_index(group['resource_id'], mock_org.org_id, mock_org.session_token)
+    assert set(index.tables) == {"members", "external"}
+    assert index.lookup("10.0.17.1") == [("members", "10.0.16.0/20", ["sddc-0001"]), ("external", "10.0.16.0/20", [group['tgw']])]
+
+def test_the_watcher_reports_only_changes(mock_server):
+    org = MockOrg(mock_server, page_size=2)
+    group = org.group("group-01")
+    watcher = RouteWatcher(group['resource_id'], org.org_id, org.session_token)
+    first = watcher.poll()
+    assert first and {change for _, change, _, _, _ in first} == {"+"}
+    assert watcher.poll() == []
+    sddc = next(sddc for sddc in org.vmc.sddcs if sddc['id'] not in group['members'])
+    with org.vmc.lock:
+        group['members'].append(sddc['id'])
+    assert ("members", "+", sddc['cidr'], (), (sddc['id'],)) in watcher.poll()
+
+def test_a_table_that_cant_be_read_keeps_its_routes(mock_server, monkeypatch):
+    org = MockOrg(mock_server, retries=0, breaker_threshold=0)
+    watcher = RouteWatcher(org.group("group-01")['resource_id'], org.org_id, org.session_token)
+    watcher.poll()
+    routes = dict(watcher.routes)
+    def unavailable(handler, org, resource, table):
+        raise MockError(503, "Service unavailable")
+    with monkeypatch.context() as patch:
+        patch.setattr(MockHandler, "handle_routes", unavailable)
+        assert watcher.poll() == []
+    assert watcher.routes == routes
+    mock_server.error_rate = 1         # the table listing too
+    assert watcher.poll() == []
+    mock_server.error_rate = 0
+    assert watcher.poll() == []
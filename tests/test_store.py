@@ -0,0 +1,52 @@
+import pytest
+
+from vtclib.inventory import GroupInfo, get_group_info
+from vtclib.models import TransitGateway
+from vtclib.store import Store, get_store
+from vtclib.tasks import wait_for_tasks
+from vtclib.operations import update_members
+
+from conftest import MockOrg
+
+
+def group_record(**sections):
+    values = dict.fromkeys(("sddcs", "tgws", "aws_accounts", "dxgws", "customer_tgws"))
+    values.update(sections)
+    return GroupInfo("org-1", "prod", "group-1", "me@example.com", "2024-01-01", **values)
+
+
+def test_listings_are_found_by_id_name_or_menu_number(tmp_path):
+    store = Store(str(tmp_path / "state.db"))
+    store.save_listing("sddcs", "org-1", [{'id': "sddc-1", 'name': "prod"}, {'id': "sddc-2", 'name': "dev"}])
+    assert [store.find("sddcs", "org-1", key) for key in ("sddc-2", "prod", "2")] == ["sddc-2", "sddc-1", "sddc-2"]
+    with pytest.raises(KeyError, match="No SDDC matching 'test'"):
+        store.find("sddcs", "org-1", "test")
+
+def test_a_new_listing_keeps_the_resource_ids(tmp_path):
+    store = Store(str(tmp_path / "state.db"))
+    store.save_listing("groups", "org-1", [{'id': "group-1", 'name': "prod"}, {'id': "group-2", 'name': "dev"}])
+    store.save_resource_id("org-1", "group-1", "ncc-1")
+    store.save_listing("groups", "org-1", [{'id': "group-1", 'name': "production"}])
+    assert store.resource_id("org-1", "group-1") == "ncc-1"
+    assert store.listing("groups", "org-1") == [(0, "production", "group-1")]
+
+def test_a_partial_snapshot_keeps_the_other_sections(tmp_path):
+    store = Store(str(tmp_path / "state.db"))
+    assert store.group_info("org-1", "group-1") is None
+    store.save_group_info(group_record(sddcs=["sddc-1", "sddc-2"], tgws=[TransitGateway("tgw-1", "us-west-2")]))
+    store.save_group_info(group_record(sddcs=["sddc-1"]))
+    record = store.group_info("org-1", "group-1")
+    assert record.sddcs == ["sddc-1"]
+    assert record.tgws == [TransitGateway("tgw-1", "us-west-2")]
+    assert record.aws_accounts is None
+
+def test_reads_and_waits_are_recorded(mock_server, tmp_path):
+    org = MockOrg(mock_server, state_db=str(tmp_path / "state.db"))
+    group = org.group("group-00")
+    record = get_group_info(group['id'], group['resource_id'], org.org_id, org.session_token)
+    assert get_store().group_info(org.org_id, group['id']) == record
+    task_id = update_members([], [], group['resource_id'], org.org_id, org.session_token)
+    wait_for_tasks([task_id], org.org_id, org.session_token)
+    [operation] = get_store().operations(org.org_id)
+    assert (operation.id, operation.type, operation.resource_id, operation.state) == \
+        (task_id, "UPDATE_MEMBERS", group['resource_id'], "COMPLETED")
@@ -0,0 +1,61 @@
+import threading
+
+import requests
+
+import vtclib.tasks
+from vtclib.config import settings
+from vtclib.journal import get_journal
+from vtclib.operations import update_members
+from vtclib.tasks import wait_for_tasks, resume_tasks
+
+from conftest import MockOrg
+
+
+def submit(org):
+    return update_members([], [], org.group("group-00")['resource_id'], org.org_id, org.session_token)
+
+
+def test_many_operations_are_waited_on_together(mock_org):
+    task_ids = [submit(mock_org) for _ in range(5)]
+    results = wait_for_tasks(task_ids, mock_org.org_id, mock_org.session_token)
+    assert list(results) == task_ids
+    assert {result['state']['name'] for result in results.values()} == {"COMPLETED"}
+
+def test_an_unknown_task_fails_alone(mock_org):
+    task_id = submit(mock_org)
+    results = wait_for_tasks([task_id, "op-unknown"], mock_org.org_id, mock_org.session_token)
+    assert results[task_id]['state']['name'] == "COMPLETED"
+    assert results["op-unknown"]['state']['name'] == "FAILED"
+    assert results["op-unknown"]['state']['error_code'] == "HTTP 404"
+
+def test_an_unknown_task_stays_in_flight_in_the_journal(mock_org, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "journal", str(tmp_path / "journal"))
+    get_journal().submitted(mock_org.org_id, "op-unknown", "UPDATE_MEMBERS", "ncc-1")
+    wait_for_tasks(["op-unknown"], mock_org.org_id, mock_org.session_token)
+    assert [entry.task_id for entry in get_journal().pending(mock_org.org_id)] == ["op-unknown"]
+
+def test_an_outage_while_polling_is_waited_out(mock_server):
+    # an open circuit says nothing about the operation: the poller tries again after the cooldown
+    org = MockOrg(mock_server, retries=0, breaker_threshold=2, breaker_cooldown=0.2)
+    mock_server.vmc.op_duration = 0.3
+    task_id = submit(org)
+    mock_server.error_rate = 1
+    threading.Timer(0.5, setattr, (mock_server, "error_rate", 0)).start()
+    results = wait_for_tasks([task_id], org.org_id, org.session_token)
+    assert results[task_id]['state']['name'] == "COMPLETED"
+
+def test_resume_survives_a_failing_check(mock_org, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "journal", str(tmp_path / "journal"))
+    task_ids = [submit(mock_org) for _ in range(2)]
+    get_journal().submitted(mock_org.org_id, "op-gone", "UPDATE_MEMBERS", "ncc-1")
+    failed = set()
+    get_operation = vtclib.tasks.get_operation
+    def flaky(task_id, org_id, session_token):
+        if task_id == task_ids[0] and task_id not in failed:
+            failed.add(task_id)
+            raise requests.exceptions.ConnectionError("connection reset")
+        return get_operation(task_id, org_id, session_token)
+    monkeypatch.setattr(vtclib.tasks, "get_operation", flaky)
+    results = resume_tasks(get_journal().pending(mock_org.org_id), mock_org.org_id, mock_org.session_token)
+    assert {task_id: result['state']['name'] for task_id, result in results.items()} == {task_id: "COMPLETED" for task_id in task_ids}
+    assert get_journal().pending(mock_org.org_id) == []
@@ -0,0 +1,41 @@
+import json
+import os
+import stat
+import time
+
+from vtclib.client import TokenManager
+
+from conftest import MockOrg
+
+
+def test_the_token_is_reused_until_the_refresh_margin(mock_org):
+    tokens = TokenManager("test-token", "", 300, mock_org.client)
+    token = tokens.get_token()
+    assert tokens.get_token() == token
+    assert mock_org.server.requests["authorize"] == 2      # MockOrg's own login, then this manager's
+    tokens.expires_at = time.time() + 299                   # within the margin: refreshed ahead of expiry
+    tokens.get_token()
+    assert mock_org.server.requests["authorize"] == 3
+
+def test_the_cache_file_is_reused_by_the_next_run(mock_server, tmp_path):
+    cache_file = str(tmp_path / "tokens.json")
+    org = MockOrg(mock_server, token_cache=cache_file)
+    assert stat.S_IMODE(os.stat(cache_file).st_mode) == 0o600
+    again = MockOrg(mock_server, token_cache=cache_file)
+    assert again.session_token == org.session_token
+    assert mock_server.requests["authorize"] == 1
+
+def test_one_cache_file_holds_every_api_token(mock_server, tmp_path):
+    cache_file = str(tmp_path / "tokens.json")
+    first = MockOrg(mock_server, token_cache=cache_file)
+    second = MockOrg(mock_server, token_cache=cache_file, api_token="other-token")
+    assert first.session_token != second.session_token
+    with open(cache_file) as f:
+        assert len(json.load(f)) == 2
+    assert TokenManager("test-token", cache_file).access_token == first.session_token
+
+def test_a_single_token_file_of_older_versions_is_read(tmp_path):
+    cache_file = tmp_path / "tokens.json"
+    tokens = TokenManager("test-token")
+    cache_file.write_text(json.dumps({'key_id': tokens.key_id, 'access_token': "mock-old", 'expires_at': time.time() + 3600}))
+    assert TokenManager("test-token", str(cache_file)).get_token() == "mock-old"
@@ -0,0 +1,54 @@
+"""VMC Transit Connect (SDDC Groups) API helpers.
+
+Nothing happens at import: config.ini is read and the CSP token fetched on
+first use, or explicitly with
+
+    import vtclib
+    client = vtclib.connect("config.ini")
+    session_token = client.tokens.get_token()
+    for record in vtclib.group_records(client.settings.org_id, session_token):
+        ...
+
+The names below are imported from their submodule on first access, so that
+the command line can print its usage without loading requests.
+"""
+
+import importlib
+
+EXPORTS = {
+    "config": ("Settings", "settings", "load_settings"),
+    "client": ("VMCClient", "InventoryCache", "TokenManager", "CircuitOpenError", "APIError", "LoginError", "RateLimiter", "CircuitBreaker",
+               "connect", "get_client", "authorize", "getAccessToken", "decode"),
+    "tasks": ("TASK_DONE_STATES", "get_operation", "wait_for_tasks", "get_task_status", "get_tasks_status",
+              "resume_tasks"),
+    "output": ("OUTPUT_FORMATS", "Output", "out", "info"),
+    "models": ("VpcAttachment", "AwsAccount", "TransitGateway", "DxgwAssociation", "TgwAssociation", "Route", "SddcGroup",
+               "ConnectivityConfig"),
+    "inventory": ("iter_pages", "iter_deployments", "iter_groups", "SddcRecord", "GroupRecord", "sddc_records",
+                  "group_records", "get_deployment_id", "get_group_id", "fetch_group", "GROUP_INFO_SECTIONS",
+                  "fetch_connectivity_config", "fetch_group_config", "GroupInfo", "get_group_info", "get_all_groups_info",
+                  "lookup_resource_id", "get_resource_id", "InventoryIndex", "get_index", "NsxInfo", "get_nsx_info"),
+    "operations": ("create_sddc_group", "update_members", "attach_sddc", "remove_sddc", "update_group_members",
+                   "check_empty_group", "delete_sddc_group", "connect_aws_account", "disconnect_aws_account",
+                   "find_attachments", "apply_attachment_actions", "apply_attachment_batch", "attach_vpc", "detach_vpc",
+                   "add_vpc_prefixes", "attach_dxgw", "detach_dxgw", "attach_tgw", "detach_tgw"),
+    "routes": ("RouteIndex", "get_route_index", "route_records", "RouteWatcher", "RouteChange", "watch_routes"),
+    "store": ("Store", "get_store", "OperationRecord"),
+    "journal": ("Journal", "JournalEntry", "get_journal"),
+    "aio": ("AsyncVMCClient",),
+    "plans": ("PLAN_OPS", "load_plan", "plan_steps", "run_plan"),
+    "reconcile": ("load_state", "diff_group", "reconcile_steps"),
+    "metrics": ("Histogram", "CallEvent", "Metrics", "otel_hook"),
+    "mock": ("MockServer",),
+    "cli": ("main",),
+}
+MODULES = {name: module for module, names in EXPORTS.items() for name in names}
+
+__all__ = list(MODULES)
+
+def __getattr__(name):
+    if name not in MODULES:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    value = getattr(importlib.import_module("." + MODULES[name], __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,200 @@
+"""asyncio counterpart of the API helpers (needs httpx)."""
+
+import asyncio
+import time
+
+try:
+    import httpx                        # optional, only needed for AsyncVMCClient
+except ImportError:
+    httpx = None
+
+from .config import settings
+from .client import decode, backoff, retry_after_seconds, APIError, RETRY_STATUSES
+from .metrics import metrics
+from .journal import get_journal
+from .tasks import TASK_DONE_STATES, POLL_FINAL_STATUSES, next_poll_delay, poll_error
+from .models import SddcGroup, ConnectivityConfig, Route
+from .inventory import GROUP_INFO_SECTIONS, GroupInfo, NsxInfo, NsxUser, LoginUrl
+
+
+class AsyncVMCClient:
+    """asyncio counterpart of the API helpers, sharing one httpx connection pool.
+
+    One event loop can drive hundreds of concurrent reads and task waits;
+    max_concurrency bounds the requests in flight. Use as an async context
+    manager, or call aclose()."""
+
+    def __init__(self, base_url, tokens=None, pool_size=100, timeout=60, retries=3, max_concurrency=50):
+        if httpx is None:
+            raise RuntimeError("httpx is needed for the async client: pip install httpx")
+        self.base_url = base_url
+        self.tokens = tokens
+        self.retries = retries
+        self.client = httpx.AsyncClient(timeout=timeout,
+                                        limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+                                        headers={'Content-Type': 'application/json', 'Accept': 'application/json'})
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def token(self, session_token):
+        if not self.tokens or not self.tokens.replaces(session_token):
+            return session_token
+        if self.tokens.valid():
+            return self.tokens.access_token
+        return await asyncio.to_thread(self.tokens.get_token)     # refresh without blocking the loop
+
+    async def request(self, method, url, session_token=None, **kwargs):
+        idempotent = method == "GET"
+        attempt = 0
+        start = time.time()
+        try:
+            while True:
+                headers = {'csp-auth-token': await self.token(session_token)} if session_token or self.tokens else {}
+                try:
+                    async with self.semaphore:
+                        response = await self.client.request(method, url, headers=headers, **kwargs)
+                except (httpx.ConnectError, httpx.ConnectTimeout):
+                    if attempt >= self.retries:
+                        raise
+                    delay = backoff(attempt)
+                except httpx.TransportError:
+                    if attempt >= self.retries or not idempotent:
+                        raise
+                    delay = backoff(attempt)
+                else:
+                    status = response.status_code
+                    if attempt >= self.retries or status not in RETRY_STATUSES or (status != 429 and not idempotent):
+                        break
+                    delay = retry_after_seconds(response) or backoff(attempt)
+                await asyncio.sleep(delay)
+                attempt += 1
+        except Exception as e:
+            metrics.record_call("request", method, url, type(e).__name__, start, attempt + 1)
+            raise
+        metrics.record_call("request", method, url, response.status_code, start, attempt + 1, len(response.content))
+        return response
+
+    async def get_json(self, url, session_token=None):
+        # like checked() in the sync client: an error answer raises APIError
+        response = await self.request("GET", url, session_token)
+        json_response = decode(response)
+        if not response.is_success:
+            raise APIError(response, json_response)
+        return json_response
+
+    async def pages(self, myURL, session_token=None):
+        items = []
+        page = 0
+        while True:
+            json_response = await self.get_json("{}?page={}&size={}".format(myURL, page, settings.page_size), session_token)
+            items.extend(json_response['content'])
+            if json_response.get('last', page + 1 >= json_response.get('total_pages', 1)) or not json_response['content']:
+                return items
+            page += 1
+
+    async def deployments(self, org_id, session_token=None):
+        return await self.pages("{}/inventory/{}/core/deployments".format(self.base_url, org_id), session_token)
+
+    async def groups(self, org_id, session_token=None):
+        return await self.pages("{}/inventory/{}/core/deployment-groups".format(self.base_url, org_id), session_token)
+
+    async def group(self, group_id, org_id, session_token=None):
+        myURL = "{}/inventory/{}/core/deployment-groups/{}".format(self.base_url, org_id, group_id)
+        return SddcGroup.from_json(await self.get_json(myURL, session_token))
+
+    async def resource_id(self, group_id, org_id, session_token=None):
+        myURL = "{}/network/{}/core/network-connectivity-configs/?group_id={}".format(self.base_url, org_id, group_id)
+        return (await self.get_json(myURL, session_token))[0]['id']
+
+    async def connectivity_config(self, resource_id, org_id, session_token=None, sections=None):
+        traits = [GROUP_INFO_SECTIONS[section] for section in sections or GROUP_INFO_SECTIONS]
+        myURL = "{}/network/{}/core/network-connectivity-configs/{}/?trait={}".format(self.base_url, org_id, resource_id, ",".join(traits))
+        return ConnectivityConfig(await self.get_json(myURL, session_token))
+
+    async def group_info(self, group_id, org_id, session_token=None, sections=None):
+        async def config():
+            resource_id = await self.resource_id(group_id, org_id, session_token)
+            return await self.connectivity_config(resource_id, org_id, session_token, sections)
+        group, group_config = await asyncio.gather(self.group(group_id, org_id, session_token), config())
+        return GroupInfo(group.org_id, group.name, group.id, group.creator, group.created,
+                         group_config.sddcs, group_config.transit_gateways, group_config.aws_accounts,
+                         group_config.dxgw_associations, group_config.tgw_associations)
+
+    async def operation(self, task_id, org_id, session_token=None):
+        myURL = "{}/operation/{}/core/operations/{}".format(self.base_url, org_id, task_id)
+        return await self.request("GET", myURL, session_token)
+
+    async def submit(self, body, org_id, session_token=None):
+        # POST an /aws/operations body, returns the operation id (0 on error, like the sync helpers)
+        myURL = "{}/network/{}/aws/operations".format(self.base_url, org_id)
+        response = await self.request("POST", myURL, session_token, json=body)
+        json_response = decode(response)
+        if not response.is_success:
+            print("    Error: " + json_response.get('message', str(response.status_code)))
+            return 0
+        # the same ID the sync helpers keep, see update_members
+        task_id = json_response['config']['operation_id'] if body.get('type') == "UPDATE_MEMBERS" else json_response['id']
+        journal = get_journal()
+        if journal:
+            journal.submitted(org_id, task_id, body.get('type', ""), body.get('resource_id', ""))
+        return task_id
+
+    async def wait_for_task(self, task_id, org_id, session_token=None, timeout=None):
+        """Adaptive polling (see next_poll_delay) until the task is done, returns the last operation json.
+
+        Like the sync wait_for_tasks, a poll answered with 401, 403 or 404 ends
+        the wait with a FAILED result, and a poll that raised is tried again."""
+        start = time.monotonic()
+        started = time.time()
+        delay = settings.poll_initial / 2
+        json_response = None
+        polls = 0
+        while True:
+            polls += 1
+            try:
+                response = await self.operation(task_id, org_id, session_token)
+            except Exception:       # a connection error after the retries says nothing about the operation
+                response = None
+            if response is not None and response.status_code in POLL_FINAL_STATUSES:
+                metrics.record_call("wait", "operation", "operation", response.status_code, started, polls)
+                return poll_error(task_id, "HTTP {}".format(response.status_code), decode(response).get('message', response.reason_phrase))
+            if response is not None and response.is_success:
+                json_response = decode(response)
+                if json_response['state']['name'] in TASK_DONE_STATES:
+                    metrics.record_call("wait", json_response.get('type') or "operation", "operation",
+                                        json_response['state']['name'], started, polls)
+                    journal = get_journal()
+                    if journal:
+                        journal.finished(org_id, task_id, json_response['state']['name'])
+                    return json_response
+            if timeout and time.monotonic() - start >= timeout:
+                return json_response
+            sleep, delay = next_poll_delay(delay, retry_after_seconds(response) if response is not None else None)
+            await asyncio.sleep(sleep)
+
+    async def wait_for_tasks(self, task_ids, org_id, session_token=None, timeout=None):
+        results = await asyncio.gather(*(self.wait_for_task(task_id, org_id, session_token, timeout) for task_id in task_ids))
+        return dict(zip(task_ids, results))
+
+    async def route_tables(self, resource_id, org_id, session_token=None):
+        myURL = "{}/network/{}/core/network-connectivity-configs/{}/route-tables".format(self.base_url, org_id, resource_id)
+        tables = await self.pages(myURL, session_token)
+        routes = await asyncio.gather(*(self.pages("{}/{}/routes".format(myURL, table['id']), session_token) for table in tables))
+        return [Route(table.get('name') or table['id'], route['destination'], [route['target']['id']])
+                for table, table_routes in zip(tables, routes) for route in table_routes]
+
+    async def nsx_info(self, deployment_id, org_id, session_token=None):
+        myURL = "{}/network/{}/core/deployments/{}/nsx".format(self.base_url, org_id, deployment_id)
+        json_response = await self.get_json(myURL, session_token)
+        return NsxInfo(json_response['nsx_private_ip'],
+                       [NsxUser(user['user_name'], user['password']) for user in json_response['nsx_users']],
+                       json_response['nsx_public_fqdn'], json_response['nsx_private_fqdn'],
+                       [LoginUrl(url['preferred_url'], url.get('other_urls') or []) for url in json_response['login_urls']])
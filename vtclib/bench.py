@@ -0,0 +1,220 @@
+"""Throughput and latency of the API helpers, against the local mock or any URL.
+
+    python -m vtclib.bench                                  # in-process mock, no latency
+    python -m vtclib.bench --latency 40 --json after.json --baseline before.json
+
+Each scenario runs --iterations times. Its HTTP requests are counted and
+timed one by one from the metrics events: calls, calls/s and the p50, p95
+and max latency of a call, plus the p50 of a whole run of the scenario. With
+--baseline, a scenario whose p50 (of a call or of a run) grew by more than
+--threshold (default 20%) is a regression and the exit status is 1.
+
+batch-members and wait-tasks submit membership changes: against --url they
+only run with --allow-writes."""
+
+import sys
+import json
+import time
+import argparse
+import threading
+import ipaddress
+from concurrent.futures import ThreadPoolExecutor
+
+from .config import Settings, settings
+from .client import connect
+from .tasks import wait_for_tasks
+from .inventory import iter_deployments, iter_groups, InventoryIndex, get_index, get_group_info
+from .operations import update_members
+from .routes import get_route_index
+from .metrics import metrics
+from .mock import MockServer
+
+
+class Bench:
+    """The org under test and what the scenarios share."""
+
+    def __init__(self, org_id, session_token, batch):
+        self.org_id = org_id
+        self.session_token = session_token
+        self.batch = batch
+        index = get_index(org_id, session_token)
+        self.sddcs = [sddc['id'] for sddc in iter_deployments(org_id, session_token)]
+        self.group = index.group(next(iter_groups(org_id, session_token))['id'])
+        self.resource_id = index.resource_id(self.group['id'])
+        self.spare = [sddc_id for sddc_id in self.sddcs
+                      if sddc_id not in {member['id'] for member in self.group['membership']['included']}][:batch]
+        # a group takes one operation at a time: concurrent operations go to different groups
+        self.resource_ids = [index.resource_id(group['id']) for group in list(iter_groups(org_id, session_token))[:batch]]
+
+
+def bench_list_sddcs(bench):
+    list(iter_deployments(bench.org_id, bench.session_token))
+
+def bench_list_groups(bench):
+    list(iter_groups(bench.org_id, bench.session_token))
+
+def bench_lookups(bench):
+    # a cold index: two listings, then every SDDC by name and by menu number
+    index = InventoryIndex(bench.org_id, bench.session_token)
+    for n, sddc_id in enumerate(bench.sddcs, 1):
+        index.sddc(index.sddc(sddc_id)['name'])
+        index.sddc(n)
+
+def bench_group_info(bench):
+    get_group_info(bench.group['id'], bench.resource_id, bench.org_id, bench.session_token)
+
+def bench_routes(bench):
+    index = get_route_index(bench.resource_id, bench.org_id, bench.session_token)
+    addresses = [ipaddress.ip_network(destination).network_address + 1 for destination, _ in index.routes("members")]
+    for address in addresses:
+        index.lookup(str(address))
+
+def bench_batch_members(bench):
+    # add the spare SDDCs to the group in one operation, then remove them in another
+    for add_ids, remove_ids in ((bench.spare, []), ([], bench.spare)):
+        task_id = update_members(add_ids, remove_ids, bench.resource_id, bench.org_id, bench.session_token)
+        if task_id:
+            wait_for_tasks([task_id], bench.org_id, bench.session_token)
+
+def bench_wait_tasks(bench):
+    # one no-op membership change per group, submitted at once and waited on together
+    with ThreadPoolExecutor(max_workers=len(bench.resource_ids) or 1) as pool:
+        task_ids = list(pool.map(lambda resource_id: update_members([], [], resource_id, bench.org_id, bench.session_token), bench.resource_ids))
+    wait_for_tasks([task_id for task_id in task_ids if task_id], bench.org_id, bench.session_token)
+
+SCENARIOS = {
+    "list-sddcs": bench_list_sddcs,
+    "list-groups": bench_list_groups,
+    "lookups": bench_lookups,
+    "group-info": bench_group_info,
+    "routes": bench_routes,
+    "batch-members": bench_batch_members,
+    "wait-tasks": bench_wait_tasks,
+}
+# change the group membership of the org (and back)
+WRITE_SCENARIOS = ("batch-members", "wait-tasks")
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))] if values else 0.0
+
+class RequestTimes:
+    """Metrics hook keeping the latency of every HTTP request made while it is added."""
+
+    def __init__(self):
+        self.seconds = []
+        self.lock = threading.Lock()
+
+    def __call__(self, event):
+        if event.kind == "request":
+            with self.lock:
+                self.seconds.append(event.seconds)
+
+def run_scenario(bench, function, iterations):
+    runs = []
+    requests = metrics.add_hook(RequestTimes())
+    start = time.perf_counter()
+    try:
+        for _ in range(iterations):
+            begin = time.perf_counter()
+            function(bench)
+            runs.append(time.perf_counter() - begin)
+    finally:
+        metrics.remove_hook(requests)
+    seconds = time.perf_counter() - start
+    calls = requests.seconds
+    return {'calls': len(calls), 'seconds': round(seconds, 4), 'calls_per_sec': round(len(calls) / seconds, 1) if seconds else 0.0,
+            'p50_ms': round(percentile(calls, 0.50) * 1000, 3), 'p95_ms': round(percentile(calls, 0.95) * 1000, 3),
+            'max_ms': round(max(calls, default=0.0) * 1000, 3), 'run_p50_ms': round(percentile(runs, 0.50) * 1000, 3)}
+
+def print_results(results, baseline=None):
+    print("{:<15} {:>7} {:>9} {:>10} {:>9} {:>9} {:>9} {:>10}".format("scenario", "calls", "seconds", "calls/s", "p50 ms", "p95 ms", "max ms",
+                                                                    "run p50 ms"))
+    for name, result in results.items():
+        line = "{:<15} {calls:>7} {seconds:>9.3f} {calls_per_sec:>10.1f} {p50_ms:>9.3f} {p95_ms:>9.3f} {max_ms:>9.3f} {run_p50_ms:>10.3f}".format(
+            name, **result)
+        if baseline and name in baseline and baseline[name].get('run_p50_ms'):
+            line += "  {:+.0%}".format(result['run_p50_ms'] / baseline[name]['run_p50_ms'] - 1)
+        print(line)
+
+def regressions(results, baseline, threshold):
+    return [name for name, result in results.items() if name in baseline
+            and any(baseline[name].get(key) and result[key] > baseline[name][key] * (1 + threshold) for key in ("p50_ms", "run_p50_ms"))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m vtclib.bench", description="Benchmark the API helpers.")
+    parser.add_argument("scenarios", nargs="*", metavar="scenario",
+                        help="any of " + ", ".join(SCENARIOS) + " (default: all)")
+    parser.add_argument("--url", help="BaseURL of a running server (CSP_URL is derived from it) instead of the in-process mock")
+    parser.add_argument("--org", default="bench-org")
+    parser.add_argument("--token", default="bench-token", help="API token")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--batch", type=int, default=4, help="SDDCs moved by batch-members, groups waited on at once by wait-tasks")
+    parser.add_argument("--latency", type=float, default=0, help="mock latency, milliseconds")
+    parser.add_argument("--jitter", type=float, default=0, help="mock jitter, milliseconds")
+    parser.add_argument("--error-rate", type=float, default=0, help="mock 503 rate")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--sddcs", type=int, default=50, help="SDDCs in the mock org")
+    parser.add_argument("--routes", type=int, default=200, help="extra routes per group in the mock org")
+    parser.add_argument("--op-duration", type=float, default=0.2, help="seconds a mock operation takes")
+    parser.add_argument("--json", metavar="FILE", help="write the results to FILE")
+    parser.add_argument("--baseline", metavar="FILE", help="compare with the results of an earlier --json run")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed p50 growth over the baseline")
+    parser.add_argument("--allow-writes", action="store_true",
+                        help="run " + " and ".join(WRITE_SCENARIOS) + " against --url too: they change the group membership")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error("unknown scenario(s): " + ", ".join(unknown))
+    scenarios = args.scenarios or list(SCENARIOS)
+    if args.url and not args.allow_writes:
+        writes = [name for name in scenarios if name in WRITE_SCENARIOS]
+        if args.scenarios and writes:
+            parser.error(", ".join(writes) + " change the group membership of the org at --url, give --allow-writes to run them")
+        if writes:
+            print("Skipping " + ", ".join(writes) + " (they change the group membership), give --allow-writes to run them")
+        scenarios = [name for name in scenarios if name not in WRITE_SCENARIOS]
+
+    server = None
+    if args.url:
+        base_url = args.url.rstrip("/")
+        csp_url = base_url.rsplit("/api", 1)[0] + "/csp/gateway"
+    else:
+        server = MockServer(latency=args.latency / 1000, jitter=args.jitter / 1000, error_rate=args.error_rate,
+                            max_page_size=args.page_size, seed=1, sddcs=args.sddcs, groups=max(args.batch, 2), routes=args.routes,
+                            op_duration=args.op_duration).start()
+        base_url, csp_url = server.base_url, server.csp_url
+    # no inventory cache and no client-side rate limit, so every call reaches the server
+    config = Settings(base_url=base_url, csp_url=csp_url, api_token=args.token, org_id=args.org, page_size=args.page_size,
+                      inventory_ttl=0.0, rate_limit=0.0, poll_initial=0.05, poll_max=1.0, max_workers=max(args.batch, 1))
+    settings.update(config)
+    try:
+        client = connect(config)
+        bench = Bench(args.org, client.tokens.get_token(), args.batch)
+        results = {}
+        for name in scenarios:
+            results[name] = run_scenario(bench, SCENARIOS[name], args.iterations)
+    finally:
+        if server:
+            server.stop()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+    print_results(results, baseline)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({'timestamp': time.time(), 'base_url': base_url, 'iterations': args.iterations, 'results': results}, f, indent=2)
+    if baseline:
+        slower = regressions(results, baseline, args.threshold)
+        if slower:
+            print("Regression (p50 more than {:.0%} above baseline): {}".format(args.threshold, ", ".join(slower)))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+"""Command line interface, see main().
+
+Only the config and output modules are loaded until a command actually runs,
+so printing the usage costs neither a login nor the import of requests."""
+
+import sys
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from .config import CONFIG_SECTION, settings, load_profiles
+from .output import OUTPUT_FORMATS, out, info, ThreadStdout
+from .metrics import metrics, otel_hook
+
+COMMANDS = ("create-sddc-group", "delete-sddc-group", "get-group-info", "get-all-groups-info", "attach-sddc", "detach-sddc",
+            "update-members", "run-plan", "reconcile", "get-sddc-info", "connect-aws", "attach-vpc", "detach-vpc", "disconnect-aws",
+            "vpc-prefixes", "attach-dxgw", "detach-dxgw", "show-routes", "watch-routes", "get-nsx-info", "attach-tgw", "detach-tgw",
+            "get-operations", "resume")
+
+def pop_option(args, option, default=None):
+    # removes "--option value" so the positional arguments keep their place
+    if option not in args:
+        return default
+    i = args.index(option)
+    value = args[i+1] if i+1 < len(args) else default
+    del args[i:i+2]
+    return value
+
+def pop_values(args, option):
+    # removes "--option value ..." up to the next --flag, returns the values
+    values = option_values(args, option)
+    if option in args:
+        i = args.index(option)
+        del args[i:i+1+len(values)]
+    return values
+
+def pop_flag(args, flag):
+    if flag not in args:
+        return False
+    args.remove(flag)
+    return True
+
+def option_values(args, option):
+    # values following --option up to the next --flag, e.g. --add sddc1 sddc2
+    if option not in args:
+        return []
+    values = []
+    for value in args[args.index(option)+1:]:
+        if value.startswith("--"):
+            break
+        values.append(value)
+    return values
+
+def print_usage():
+    print("\nPlease give an argument like:")
+    print("\nReaders (get-*, show-routes, watch-routes) accept --output table|json|ndjson|csv")
+    print("\nAll commands accept --config FILE (default ./config.ini)")
+    print("and --profile NAME ... | all to run on the orgs of other config sections, concurrently")
+    print("--metrics prints the latency of every API endpoint and operation wait at the end (to stderr),")
+    print("--metrics-file FILE writes them in Prometheus text format, --otel sends them to OpenTelemetry")
+    print("\n[group] and [sddc] can be a name, an ID or a menu number; when omitted you are prompted")
+    print("\nSDDC-Group Operations:")
+    print("    create-sddc-group [name] [sddc]")
+    print("    delete-sddc-group [group]")
+    print("    get-group-info [group] [--section sddcs tgw aws dxgw external-tgw]")
+    print("    get-all-groups-info [--section ...]")
+    print("    run-plan plan.yaml|plan.json")
+    print("    reconcile state.yaml|state.json [--dry-run] [--allow-disruptive]\n")
+    print("SDDC Operations:")
+    print("    get-sddc-info")
+    print("    get-nsx-info [sddc]")
+    print("    attach-sddc [group] [sddc]")
+    print("    detach-sddc [group] [sddc]")
+    print("    update-members [group] --add [sddc ...] --remove [sddc ...]\n")
+    print("AWS Operations:")
+    print("    connect-aws [group]")
+    print("    disconnect-aws [group]\n")
+    print("VPC Operations:")
+    print("    attach-vpc [group] [--all]")
+    print("    detach-vpc [group] [--all]")
+    print("    vpc-prefixes [group]\n")
+    print("DXGW Operations:")
+    print("    attach-dxgw [group]")
+    print("    detach-dxgw [group]\n")
+    print("TGW Operations:")
+    print("    show-routes [group] [--lookup IP] [--target ID]")
+    print("    watch-routes [group] [--interval SECONDS]")
+    print("    attach-tgw [group]")
+    print("    detach-tgw [group]\n")
+    print("Journal (journal in the config):")
+    print("    resume [--list]    waits on the operations left in flight by an interrupted run\n")
+    print("Local store (state_db in the config):")
+    print("    get-operations")
+    print("    get-sddc-info, get-group-info, get-all-groups-info and show-routes accept --offline\n")
+
+
+def main(argv=None):
+    """Runs one command, argv defaults to sys.argv[1:]. Returns the exit status.
+
+    The arguments are parsed from a copy: the command gets the list without
+    the options handled here, args[0] being its name."""
+    args = list(sys.argv[1:] if argv is None else argv)
+    config_path = pop_option(args, "--config")
+    offline = pop_flag(args, "--offline")
+    out.fmt = pop_option(args, "--output", "table")
+    if out.fmt not in OUTPUT_FORMATS:
+        print("--output must be one of: " + ", ".join(OUTPUT_FORMATS))
+        return 1
+    show_metrics = pop_flag(args, "--metrics")
+    metrics_file = pop_option(args, "--metrics-file")
+    otel = pop_flag(args, "--otel")
+
+    # what does our user want us to do
+    intent_name = args[0] if args else ""
+    if intent_name not in COMMANDS:
+        # usage needs neither the config nor a login
+        print_usage()
+        return 0
+
+    try:
+        profiles = load_profiles(config_path)
+    except (OSError, KeyError, ValueError) as e:
+        print("   Can't read config: " + str(e).strip("'\""))
+        return 1
+    names = pop_values(args, "--profile") or [CONFIG_SECTION]
+    if names == ["all"]:
+        names = list(profiles)
+    unknown = [name for name in names if name not in profiles]
+    if unknown:
+        print("   Unknown profile(s): " + ", ".join(unknown) + ", the config has: " + ", ".join(profiles))
+        return 1
+    if otel:
+        try:
+            metrics.add_hook(otel_hook())
+        except RuntimeError as e:
+            print("   " + str(e))
+            return 1
+    try:
+        if len(names) == 1:
+            return run_profile(intent_name, args, profiles[names[0]], offline)
+        return run_profiles(intent_name, args, {name: profiles[name] for name in dict.fromkeys(names)}, offline)
+    finally:
+        if show_metrics:
+            metrics.print_summary()
+        if metrics_file:
+            write_metrics(metrics_file)
+
+def write_metrics(path):
+    # replaced in one go, so that a Prometheus textfile collector never reads half a file
+    tmp_file = "{}.{}.tmp".format(path, os.getpid())
+    with open(tmp_file, "w") as f:
+        f.write(metrics.prometheus())
+    os.replace(tmp_file, path)
+
+def run_profile(intent_name, args, config, offline=False):
+    from .client import APIError, LoginError, connect
+    from .commands import OFFLINE_COMMANDS, run_command, run_offline
+
+    if offline or intent_name == "get-operations":
+        if intent_name not in OFFLINE_COMMANDS:
+            print("   " + intent_name + " can't run --offline")
+            return 1
+        return run_offline(intent_name, args, config.org_id) or 0
+
+    # Get our access token
+    client = connect(config)
+    org_id = config.org_id
+    try:
+        session_token = client.tokens.get_token()
+        return run_command(intent_name, args, config, org_id, session_token) or 0
+    except LoginError as e:
+        print("Failed to login\n" + str(e))
+        return 1
+    except APIError as e:
+        print("   " + str(e))
+        return 1
+    finally:
+        client.close()
+
+def run_in_profile(name, intent_name, args, config, offline, stdout):
+    # runs in a worker thread: output is tagged (machine formats) or buffered (table)
+    out.local.profile = name
+    stdout.local.buffer = io.StringIO()
+    try:
+        status = run_profile(intent_name, args, config, offline)
+    except SystemExit as e:
+        status = e.code
+    except Exception as e:
+        print("   " + (e.args[0] if isinstance(e, KeyError) and e.args else repr(e)))
+        status = 1
+    return status, stdout.local.buffer.getvalue()
+
+def run_profiles(intent_name, args, profiles, offline=False):
+    """Runs the command for every profile at once, each with its own client,
+    token and connection pool. Text output is printed profile by profile."""
+    orgs = {}
+    for name, config in profiles.items():
+        if config.org_id in orgs:
+            print("   Profiles " + orgs[config.org_id] + " and " + name + " use the same org " + config.org_id)
+            return 1
+        orgs[config.org_id] = name
+    stdout = ThreadStdout(sys.stdout)
+    sys.stdout = stdout
+    try:
+        with ThreadPoolExecutor(max_workers=min(len(profiles), settings.max_workers)) as pool:
+            futures = {name: pool.submit(run_in_profile, name, intent_name, args, config, offline, stdout) for name, config in profiles.items()}
+            results = {}
+            for name, future in futures.items():
+                results[name], text = future.result()
+                if out.human or text:
+                    # in machine formats only errors are left in the buffer; they go with the banners to stderr
+                    stream = stdout.stream if out.human else sys.stderr
+                    stream.write("\n===== Profile " + name + " (org " + profiles[name].org_id + ") =========\n" + text)
+                    stream.flush()
+    finally:
+        sys.stdout = stdout.stream
+    if not out.human:
+        out.flush(profiles)
+    info("\n===== Profiles =========")
+    for name, status in results.items():
+        info("    " + name + " (org " + profiles[name].org_id + "): " + ("OK" if not status else "FAILED"))
+    return 0 if not any(results.values()) else 1
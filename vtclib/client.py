@@ -0,0 +1,434 @@
+"""HTTP client shared by the API helpers: keep-alive session, rate limiting,
+circuit breaking, retries, the inventory cache and CSP tokens."""
+
+import requests                         # need this for Get/Post/Delete
+from requests.adapters import HTTPAdapter
+import time
+import json
+import os
+import hashlib
+import urllib.parse
+import threading
+import random
+
+try:
+    import orjson                       # optional, faster decoding of large connectivity configs
+except ImportError:
+    orjson = None
+
+from .config import Settings, settings, load_settings
+from .metrics import metrics
+
+
+def decode(response):
+    # parse straight from the raw body bytes, with orjson when it is installed
+    try:
+        if orjson is not None:
+            return orjson.loads(response.content)
+        return json.loads(response.content)
+    except ValueError:
+        if response.status_code < 400:
+            raise
+        # gateways answer errors with HTML; give callers the usual error payload shape
+        return {'message': "HTTP {}".format(response.status_code)}
+
+
+def checked(response):
+    # the decoded body of a successful answer; an error answer raises APIError
+    json_response = decode(response)
+    if not response.ok:
+        raise APIError(response, json_response)
+    return json_response
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    pass
+
+
+class APIError(requests.exceptions.HTTPError):
+    """An error answer to a request the caller can't do without, e.g. a page of a listing."""
+
+    def __init__(self, response, json_response=None):
+        message = json_response.get('message') if isinstance(json_response, dict) else None
+        # the path only: the query can hold a token; response is a requests or an httpx one
+        reason = getattr(response, "reason", None) or getattr(response, "reason_phrase", "")
+        super().__init__("HTTP {} from {}: {}".format(response.status_code, urllib.parse.urlsplit(str(response.url)).path,
+                                                      message or reason), response=response)
+
+
+class LoginError(APIError):
+    """CSP refused the API token."""
+
+
+class RateLimiter:
+    """Token bucket shared by every thread; rate is requests per second, 0 disables it."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.paused_until = 0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        # the server asked everybody to slow down
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0
+
+    def update(self, response):
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        reset = response.headers.get("X-RateLimit-Reset")
+        if remaining == "0" and reset:
+            try:
+                reset = float(reset)
+            except ValueError:
+                return
+            # the header is either seconds to wait or an epoch timestamp
+            self.pause(reset - time.time() if reset > 1e9 else reset)
+
+
+class CircuitBreaker:
+    """Fails fast after threshold consecutive failures, then lets one trial request through after cooldown."""
+
+    def __init__(self, threshold, cooldown):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial = False
+        self.lock = threading.Lock()
+
+    def check(self, host):
+        with self.lock:
+            if self.opened_at is None:
+                return
+            if time.monotonic() - self.opened_at < self.cooldown or self.trial:
+                raise CircuitOpenError("{} is failing, not sending requests for up to {:.0f}s".format(host, self.cooldown))
+            self.trial = True       # half-open: this request decides
+
+    def success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial = False
+
+    def failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial or (self.threshold and self.failures >= self.threshold):
+                self.opened_at = time.monotonic()
+            self.trial = False
+
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+def backoff(attempt):
+    return min(2 ** attempt, settings.poll_max) * random.uniform(0.5, 1.0)
+
+
+class VMCClient:
+    """Shared keep-alive HTTP session used by every API helper.
+
+    Requests go through a shared rate limiter and a per-host circuit breaker.
+    Failures are retried with backoff, but a POST is only retried when the API
+    certainly didn't act on it (429, or the connection was never made)."""
+
+    def __init__(self, settings=None):
+        self.settings = settings or Settings()
+        self.base_url = self.settings.base_url
+        self.timeout = self.settings.timeout
+        self.retries = self.settings.retries
+        self.limiter = RateLimiter(self.settings.rate_limit, self.settings.rate_burst)
+        self.breakers = {}
+        self.lock = threading.Lock()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.settings.pool_size, pool_maxsize=self.settings.pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({'Content-Type': 'application/json', 'Accept': 'application/json'})
+        self._token = None
+        self._auth = {}
+        self.tokens = None      # optional TokenManager, supplies a fresh token in place of the ones it issued
+        self.cache = None       # optional InventoryCache for the deployment/group listings
+        if self.settings.inventory_ttl > 0:
+            self.cache = InventoryCache(self.settings.inventory_ttl, self.settings.inventory_cache_dir, self.settings.org_id)
+
+    def auth_header(self, session_token):
+        # reuse the same header dict for as long as the token doesn't change
+        if session_token != self._token:
+            self._auth = {'csp-auth-token': session_token}
+            self._token = session_token
+        return self._auth
+
+    def breaker(self, host):
+        with self.lock:
+            if host not in self.breakers:
+                self.breakers[host] = CircuitBreaker(self.settings.breaker_threshold, self.settings.breaker_cooldown)
+            return self.breakers[host]
+
+    def request(self, method, url, session_token=None, idempotent=None, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        if idempotent is None:
+            idempotent = method in ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+        host = urllib.parse.urlsplit(url).netloc
+        breaker = self.breaker(host)
+        headers = kwargs.pop("headers", {})
+        attempt = 0
+        start = time.time()
+        try:
+            while True:
+                breaker.check(host)
+                try:
+                    self.limiter.acquire()
+                    token = session_token
+                    if self.tokens and url.startswith(self.base_url) and self.tokens.replaces(session_token):
+                        token = self.tokens.get_token()
+                    if token:
+                        kwargs["headers"] = {**self.auth_header(token), **headers}
+                    elif headers:
+                        kwargs["headers"] = headers
+                    response = self.session.request(method, url, **kwargs)
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                    breaker.failure()
+                    never_sent = isinstance(e, requests.exceptions.ConnectTimeout)
+                    if attempt >= self.retries or not (idempotent or never_sent):
+                        raise
+                    delay = backoff(attempt)
+                except BaseException:
+                    breaker.failure()       # whatever went wrong, a half-open trial must not stay pending
+                    raise
+                else:
+                    self.limiter.update(response)
+                    if response.status_code >= 500:
+                        breaker.failure()
+                    else:
+                        breaker.success()
+                    status = response.status_code
+                    if attempt >= self.retries or status not in RETRY_STATUSES or (status != 429 and not idempotent):
+                        break
+                    delay = retry_after_seconds(response) or backoff(attempt)
+                    if status == 429:
+                        self.limiter.pause(delay)
+                time.sleep(delay)
+                attempt += 1
+        except Exception as e:
+            metrics.record_call("request", method, url, type(e).__name__, start, attempt + 1)
+            raise
+        metrics.record_call("request", method, url, response.status_code, start, attempt + 1, len(response.content))
+        return response
+
+    def get(self, url, session_token=None, **kwargs):
+        return self.request("GET", url, session_token, **kwargs)
+
+    def post(self, url, session_token=None, **kwargs):
+        if self.cache and url.startswith(self.base_url):
+            self.cache.invalidate()
+        return self.request("POST", url, session_token, **kwargs)
+
+    def get_cached(self, url, session_token=None):
+        # listings are served from the cache while fresh, then revalidated with the ETag; an error answer raises APIError
+        if not self.cache:
+            return checked(self.get(url, session_token))
+        entry = self.cache.get(url)
+        if entry and self.cache.fresh(entry):
+            return entry['data']
+        headers = {'If-None-Match': entry['etag']} if entry and entry['etag'] else {}
+        response = self.get(url, session_token, headers=headers)
+        if response.status_code == 304:
+            self.cache.put(url, entry['etag'], entry['data'])
+            return entry['data']
+        json_response = checked(response)
+        self.cache.put(url, response.headers.get('ETag'), json_response)
+        return json_response
+
+    def close(self):
+        self.session.close()
+
+
+class InventoryCache:
+    """In-memory (and optionally on-disk) cache of inventory listings.
+
+    On disk, its files are named vtc-inventory-<name>-<hash of the URL>.json,
+    so that the caches of several orgs (and anything else) can share cache_dir."""
+
+    def __init__(self, ttl=60, cache_dir="", name=""):
+        self.ttl = ttl
+        self.cache_dir = os.path.expanduser(cache_dir) if cache_dir else ""
+        self.prefix = "vtc-inventory-{}-".format(name)
+        self.entries = {}
+        self.lock = threading.Lock()
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+
+    def path(self, url):
+        return os.path.join(self.cache_dir, self.prefix + hashlib.sha256(url.encode()).hexdigest() + ".json")
+
+    def fresh(self, entry):
+        return time.time() - entry['fetched_at'] < self.ttl
+
+    def get(self, url):
+        with self.lock:
+            entry = self.entries.get(url)
+        if entry or not self.cache_dir:
+            return entry
+        try:
+            with open(self.path(url)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        with self.lock:
+            self.entries[url] = entry
+        return entry
+
+    def put(self, url, etag, data):
+        entry = {'fetched_at': time.time(), 'etag': etag, 'data': data}
+        with self.lock:
+            self.entries[url] = entry
+        if self.cache_dir:
+            with open(self.path(url), "w") as f:
+                json.dump(entry, f)
+
+    def invalidate(self):
+        with self.lock:
+            self.entries.clear()
+        if self.cache_dir:
+            # only this cache's own files
+            for name in os.listdir(self.cache_dir):
+                if name.startswith(self.prefix) and name.endswith(".json"):
+                    try:
+                        os.remove(os.path.join(self.cache_dir, name))
+                    except FileNotFoundError:
+                        pass        # removed by another process meanwhile
+
+
+def authorize(myKey, client=None):
+    client = client or get_client()
+    params = {'refresh_token': myKey}
+    response = client.post(client.settings.csp_url + '/am/api/auth/api-tokens/authorize', params=params)
+    json_response = decode(response)
+    if response.status_code != 200:
+        raise LoginError(response, json_response)
+    return json_response
+
+def getAccessToken(myKey):
+    return authorize(myKey)['access_token']
+
+
+cache_file_lock = threading.Lock()
+
+class TokenManager:
+    """Caches the CSP access token and refreshes it ahead of expiry."""
+
+    def __init__(self, refresh_token, cache_file="", refresh_margin=300, client=None):
+        self.refresh_token = refresh_token
+        self.client = client    # the client that talks to CSP, the default one if None
+        self.cache_file = os.path.expanduser(cache_file) if cache_file else ""
+        self.refresh_margin = refresh_margin
+        self.key_id = hashlib.sha256(refresh_token.encode()).hexdigest()
+        self.access_token = None
+        self.expires_at = 0
+        self.issued = set()     # every access token handed out, expired ones included
+        self.lock = threading.Lock()
+        self.load()
+
+    def valid(self):
+        return self.access_token and time.time() < self.expires_at - self.refresh_margin
+
+    def replaces(self, session_token):
+        # a caller's own token (another org, another API token) is never swapped for ours
+        return not session_token or session_token in self.issued
+
+    def get_token(self):
+        if self.valid():
+            return self.access_token
+        with self.lock:
+            if not self.valid():    # another thread may have refreshed while we waited
+                self.refresh()
+            return self.access_token
+
+    def refresh(self):
+        json_response = authorize(self.refresh_token, self.client)
+        self.access_token = json_response['access_token']
+        self.expires_at = time.time() + int(json_response.get('expires_in', 1800))
+        self.issued.add(self.access_token)
+        self.save()
+
+    def read_cache(self):
+        # one file holds the tokens of every profile, keyed by a hash of their API token
+        try:
+            with open(self.cache_file) as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if 'key_id' in cached:
+            cached = {cached['key_id']: cached}     # single token file written by older versions
+        return cached
+
+    def load(self):
+        if not self.cache_file:
+            return
+        cached = self.read_cache().get(self.key_id)
+        if cached:
+            self.access_token = cached['access_token']
+            self.expires_at = cached['expires_at']
+            self.issued.add(self.access_token)
+
+    def save(self):
+        if not self.cache_file:
+            return
+        with cache_file_lock:
+            cached = self.read_cache()
+            cached[self.key_id] = {'access_token': self.access_token, 'expires_at': self.expires_at}
+            tmp_file = "{}.{}.tmp".format(self.cache_file, os.getpid())
+            fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as f:
+                json.dump(cached, f)
+            os.replace(tmp_file, self.cache_file)
+
+
+def retry_after_seconds(response):
+    try:
+        return float(response.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+# one client per org; the entry under None is the default used for any other org
+clients = {}
+clients_lock = threading.Lock()
+
+def connect(config=None, org_id=None):
+    """Builds a client (and its token manager) from settings and registers it for its org.
+
+    config is a Settings object or a path to a config.ini; the shared settings
+    (loaded from ./config.ini if need be) are used when it is None."""
+    if config is None:
+        config = settings if settings.api_token else load_settings()
+    elif not isinstance(config, Settings):
+        config = load_settings(config)
+    client = VMCClient(config)
+    client.tokens = TokenManager(config.api_token, config.token_cache, config.token_margin, client)
+    with clients_lock:
+        clients[org_id or config.org_id] = client
+        clients.setdefault(None, client)
+    return client
+
+def get_client(org_id=None):
+    client = clients.get(org_id) or clients.get(None)
+    return client or connect()
@@ -0,0 +1,366 @@
+"""The commands behind the command line, see cli.main()."""
+
+import sys
+
+from .tasks import get_task_status, resume_tasks
+from .output import out, info
+from .cli import option_values
+from .inventory import (SddcRecord, get_deployments, get_deployment_id, get_sddc_groups, get_group_id, get_resource_id, sddc_records, print_sddc,
+                        GROUP_INFO_SECTIONS, get_group_info, get_all_groups_info, print_group_info, get_nsx_info, print_nsx_info)
+from .operations import (create_sddc_group, check_empty_group, delete_sddc_group, attach_sddc, remove_sddc, update_group_members,
+                         connect_aws_account, disconnect_aws_account, get_pending_att, get_available_att, apply_attachment_batch,
+                         add_vpc_prefixes, attach_dxgw, detach_dxgw, attach_tgw, detach_tgw)
+from .routes import get_route_tables, print_route_index, watch_routes, print_route_change
+from .plans import load_plan, run_plan
+from .reconcile import reconcile
+from .store import get_store, print_operation
+from .journal import get_journal, print_journal_entry
+
+# answered from the local store with --offline (get-operations always is)
+OFFLINE_COMMANDS = ("get-sddc-info", "get-group-info", "get-all-groups-info", "show-routes", "get-operations")
+
+
+def ask(prompt):
+    if getattr(out.local, "profile", None) is not None:
+        raise KeyError("Can't prompt while running several profiles, give the answer on the command line")
+    # prompts follow the menus to stderr when stdout is machine-readable
+    if out.human:
+        return input(prompt)
+    sys.stderr.write(prompt)
+    sys.stderr.flush()
+    return input()
+
+def select_group(args, arg, org_id, session_token):
+    # a group name or ID on the command line skips the menu
+    try:
+        if len(args) > arg and not args[arg].startswith("--"):
+            return get_group_id(args[arg], org_id, session_token)
+        if not get_sddc_groups(org_id, session_token):
+            return None
+        group = ask('   Select SDDC Group: ')
+        return get_group_id(group, org_id, session_token)
+    except KeyError as e:
+        info("   " + e.args[0])
+        sys.exit(1)
+
+def select_sddc(prompt, args, arg, org_id, session_token):
+    # an SDDC name or deployment ID on the command line skips the menu
+    try:
+        if len(args) > arg and not args[arg].startswith("--"):
+            return get_deployment_id(args[arg], org_id, session_token)
+        get_deployments(org_id, session_token)
+        sddc = ask(prompt)
+        return get_deployment_id(sddc, org_id, session_token)
+    except KeyError as e:
+        info("   " + e.args[0])
+        sys.exit(1)
+
+def group_sections(args):
+    sections = option_values(args, "--section")
+    if set(sections) - set(GROUP_INFO_SECTIONS):
+        print("--section must be among: " + ", ".join(GROUP_INFO_SECTIONS))
+        sys.exit(1)
+    return sections
+
+def pick(items, answer):
+    # menu numbers (space separated) or "all"
+    if answer.strip().lower() == "all":
+        return items
+    return [items[int(n)-1] for n in answer.split()]
+
+def run_command(intent_name, args, config, org_id, session_token):
+    """Runs a command; args[0] is its name, args[1:] its arguments."""
+    sections = group_sections(args)
+
+    #------------------------
+    #--- execute the user's command
+    #------------------------
+
+    if intent_name == "create-sddc-group":
+        info("\n=====Creating SDDC Group=========")
+        group_name = args[1]
+        deployment_id = select_sddc('   Select one SDDC to attach: ', args, 2, org_id, session_token)
+        task_id = create_sddc_group(group_name, deployment_id, org_id, session_token) 
+        if task_id:
+            get_task_status(task_id, org_id, session_token)
+
+    elif intent_name == "delete-sddc-group":
+        info("=====Deleting SDDC Group=========")
+        group_id = select_group(args, 1, org_id, session_token)
+        if (check_empty_group(group_id, org_id, session_token)):
+            resource_id = get_resource_id(group_id, org_id, session_token)
+            task_id = delete_sddc_group(resource_id, org_id, session_token)
+            if task_id:
+                get_task_status(task_id, org_id, session_token)
+        else:
+            print("SDDC Group not empty: detach all members")      
+
+    elif intent_name == "get-group-info":
+        info("===== SDDC Group info =========")
+        group_id = select_group(args, 1, org_id, session_token)
+        if group_id:
+            resource_id = get_resource_id(group_id, org_id, session_token)
+            out.emit([get_group_info(group_id, resource_id, org_id, session_token, sections)], lambda record: print_group_info(record, sections))  
+
+    elif intent_name == "get-all-groups-info":
+        info("===== All SDDC Groups info =========")
+        out.emit(get_all_groups_info(org_id, session_token, sections), lambda record: print_group_info(record, sections))
+
+    elif intent_name == "attach-sddc":
+        info("===== Connecting SDDC =========")
+        group_id = select_group(args, 1, org_id, session_token)
+        deployment_id = select_sddc('   Select one SDDC to attach: ', args, 2, org_id, session_token)
+        resource_id = get_resource_id(group_id, org_id, session_token)
+        task_id = attach_sddc(deployment_id, resource_id, org_id, session_token)     
+        if task_id:
+            get_task_status(task_id, org_id, session_token)
+
+    elif intent_name == "detach-sddc":
+        info("===== Removing SDDC =========")
+        group_id = select_group(args, 1, org_id, session_token)
+        deployment_id = select_sddc('   Select one SDDC to detach: ', args, 2, org_id, session_token)
+        resource_id = get_resource_id(group_id, org_id, session_token)
+        task_id = remove_sddc(deployment_id, resource_id, org_id, session_token)     
+        if task_id:
+            get_task_status(task_id, org_id, session_token)
+
+    elif intent_name == "update-members":
+        info("===== Updating SDDC Group members =========")
+        group_id = select_group(args, 1, org_id, session_token)
+        try:
+            add_ids = [get_deployment_id(sddc, org_id, session_token) for sddc in option_values(args, "--add")]
+            remove_ids = [get_deployment_id(sddc, org_id, session_token) for sddc in option_values(args, "--remove")]
+        except KeyError as e:
+            info("   " + e.args[0])
+            return 1
+        if set(add_ids) & set(remove_ids):
+            print("   An SDDC can't be added and removed in the same run")
+        elif not add_ids and not remove_ids:
+            print("   Nothing to do: give --add and/or --remove followed by SDDC names or IDs")
+        else:
+            resource_id = get_resource_id(group_id, org_id, session_token)
+            update_group_members({resource_id: (add_ids, remove_ids)}, org_id, session_token)
+
+    elif intent_name == "run-plan":
+        info("===== Running plan =========")
+        if len(args) < 2 or args[1].startswith("--"):
+            print("   Usage: run-plan plan.yaml|plan.json")
+            return 1
+        try:
+            steps, max_workers = load_plan(args[1])
+        except (OSError, ValueError, KeyError) as e:
+            print("   Can't load plan: " + str(e))
+            return 1
+        state = run_plan(steps, org_id, session_token, max_workers)
+        if any(result != "COMPLETED" for result in state.values()):
+            return 1
+
+    elif intent_name == "reconcile":
+        info("===== Reconciling SDDC Groups =========")
+        positional = [arg for arg in args if not arg.startswith("--")]
+        if len(positional) < 2:
+            print("   Usage: reconcile state.yaml|state.json [--dry-run] [--allow-disruptive]")
+            return 1
+        try:
+            state = reconcile(positional[1], org_id, session_token, "--dry-run" in args, "--allow-disruptive" in args)
+        except (OSError, ValueError, KeyError) as e:
+            print("   Can't reconcile: " + str(e).strip("'\""))
+            return 1
+        if any(result != "COMPLETED" for result in state.values()):
+            return 1
+
+    elif intent_name == "resume":
+        info("===== Resuming operations =========")
+        journal = get_journal()
+        if journal is None:
+            print("   Set journal in the config to keep a journal of the operations")
+            return 1
+        entries = journal.pending(org_id)
+        if not out.emit(entries, print_journal_entry):
+            info("    Nothing to resume")
+        elif "--list" not in args:
+            results = resume_tasks(entries, org_id, session_token)
+            if any(json_response['state']['name'] != "COMPLETED" for json_response in results.values()):
+                return 1
+
+    elif intent_name == "get-sddc-info":
+        info("===== SDDC Info =========")
+        if not out.emit(sddc_records(org_id, session_token), print_sddc):
+            info("\n=====No SDDC found=========")
+
+    elif intent_name == "connect-aws":
+        info("=====Connecting AWS account=========")
+        group_id = select_group(args, 1, org_id, session_token)
+        resource_id = get_resource_id(group_id, org_id, session_token)
+        task_id = connect_aws_account(config.aws_account, config.region, resource_id, org_id, session_token) 
+        if task_id: 
+            get_task_status(task_id, org_id, session_token)  
+
+    elif intent_name == "attach-vpc":
+        info("=====Attaching VPCs=========")
+        group_id = select_group(args, 1, org_id, session_token)
+        resource_id = get_resource_id(group_id, org_id, session_token)
+        vpc_list = get_pending_att(resource_id, org_id, session_token)
+        if vpc_list == []:
+            print('   No VPC to attach')
+        else:    
+            if "--all" in args:
+                selected = vpc_list
+            else:
+                selected = pick(vpc_list, ask('   Select VPC(s) to attach (space separated, or all): '))
+            apply_attachment_batch("ACCEPT", selected, resource_id, org_id, session_token)
+
+    elif intent_name == "detach-vpc":
+        info("=====Detaching VPCs=========")
+        group_id = select_group(args, 1, org_id, session_token)
+        resource_id = get_resource_id(group_id, org_id, session_token)
+        vpc_list = get_available_att(resource_id, org_id, session_token)
+        if vpc_list == []:
+            print('   No VPC to detach')
+        else:    
+            if "--all" in args:
+                selected = vpc_list
+            else:
+                selected = pick(vpc_list, ask('  Select VPC(s) to detach (space separated, or all): '))
+            apply_attachment_batch("DELETE", selected, resource_id, org_id, session_token)
+
+    elif intent_name == "disconnect-aws":
+        info("===== Disconnecting AWS account =========")
+        group_id = select_group(args, 1, org_id, session_token)
+        resource_id = get_resource_id(group_id, org_id, session_token)
+        task_id = disconnect_aws_account(config.aws_account, resource_id, org_id, session_token) 
+        if task_id:   
+            get_task_status(task_id, org_id, session_token)   
+
+    elif intent_name == "vpc-prefixes":
+        info("===== Adding/Removing VPC Static Routes =========")
+        group_id = select_group(args, 1, org_id, session_token)
+        resource_id = get_resource_id(group_id, org_id, session_token)
+        vpc_list = get_available_att(resource_id, org_id, session_token)
+        if vpc_list == []:
+            print('   No VPC attached')
+        else:    
+            n = ask('   Select VPC: ')
+            routes = ask('   Enter route(s) to add (space separated), or press Enter to remove all: ')
+            user_list = routes.split()
+            account, att_id = vpc_list[int(n)-1]
+            task_id = add_vpc_prefixes(user_list, att_id, resource_id, org_id, account, session_token)   
+            if task_id:
+                get_task_status(task_id, org_id, session_token)           
+
+
+    elif intent_name == "attach-dxgw":
+        info("===== Add DXGW Association =========")
+        group_id = select_group(args, 1, org_id, session_token)
+        resource_id = get_resource_id(group_id, org_id, session_token)
+        routes = ask('   Enter route(s) to add (space separated): ')
+        user_list = routes.split()
+        task_id = attach_dxgw(user_list, resource_id, org_id, config.dxgw_owner, config.dxgw_id, config.region, session_token)   
+        if task_id:
+            get_task_status(task_id, org_id, session_token)
+
+    elif intent_name == "detach-dxgw":
+        info("===== Remove DXGW Association =========")
+        group_id = select_group(args, 1, org_id, session_token)
+        resource_id = get_resource_id(group_id, org_id, session_token)
+        task_id = detach_dxgw(resource_id, org_id, config.dxgw_id, session_token)   
+        if task_id:
+            get_task_status(task_id, org_id, session_token)
+
+    elif intent_name == "show-routes":
+        info("===== Show TGW route tables =========")
+        group_id = select_group(args, 1, org_id, session_token)
+        resource_id = get_resource_id(group_id, org_id, session_token)
+        lookup = option_values(args, "--lookup")
+        target = option_values(args, "--target")
+        get_route_tables(resource_id, org_id, session_token, lookup[0] if lookup else None, target[0] if target else None)   
+
+    elif intent_name == "watch-routes":
+        info("===== Watch TGW route tables =========")
+        group_id = select_group(args, 1, org_id, session_token)
+        resource_id = get_resource_id(group_id, org_id, session_token)
+        interval = option_values(args, "--interval")
+        out.emit(watch_routes(resource_id, org_id, session_token, float(interval[0]) if interval else 30), print_route_change)
+
+    elif intent_name == "get-nsx-info":
+        info("===== get deployments =========")
+        deployment_id = select_sddc('   Select SDDC: ', args, 1, org_id, session_token)
+        out.emit([get_nsx_info( org_id, deployment_id, session_token)], print_nsx_info)
+
+    elif intent_name == "attach-tgw":
+        info("===== attach external TGW =========")
+        group_id = select_group(args, 1, org_id, session_token)
+        resource_id = get_resource_id(group_id, org_id, session_token)
+        routes = ask('   Enter route(s) to add (space separated): ')
+        user_list = routes.split()
+        task_id = attach_tgw(user_list, resource_id, org_id, session_token)   
+        if task_id:
+            get_task_status(task_id, org_id, session_token)
+
+    elif intent_name == "detach-tgw":
+        info("===== detach external TGW =========")
+        group_id = select_group(args, 1, org_id, session_token)
+        resource_id = get_resource_id(group_id, org_id, session_token)
+        task_id = detach_tgw(resource_id, org_id, session_token)   
+        if task_id:
+            get_task_status(task_id, org_id, session_token)
+
+
+def select_stored_group(store, args, org_id):
+    # like select_group, from the local store
+    try:
+        if len(args) > 1 and not args[1].startswith("--"):
+            return store.find("groups", org_id, args[1])
+        groups = store.listing("groups", org_id)
+        if not groups:
+            info("     No SDDC Group in the local store\n")
+            return None
+        for position, name, group_id in groups:
+            info(str(position + 1) + ": " + name + ": " + group_id)
+        return store.find("groups", org_id, ask('   Select SDDC Group: '))
+    except KeyError as e:
+        info("   " + e.args[0])
+        sys.exit(1)
+
+def run_offline(intent_name, args, org_id):
+    """Answers the readers from the local store, without a login."""
+    store = get_store()
+    if store is None:
+        print("   Set state_db in the config to keep a local store")
+        return 1
+    sections = group_sections(args)
+
+    if intent_name == "get-sddc-info":
+        info("===== SDDC Info (local store) =========")
+        records = (SddcRecord(position + 1, name, deployment_id) for position, name, deployment_id in store.listing("sddcs", org_id))
+        if not out.emit(records, print_sddc):
+            info("\n=====No SDDC found=========")
+
+    elif intent_name == "get-group-info":
+        info("===== SDDC Group info (local store) =========")
+        group_id = select_stored_group(store, args, org_id)
+        record = group_id and store.group_info(org_id, group_id)
+        if group_id and not record:
+            print("   Not in the local store yet: run get-group-info online once")
+            return 1
+        if record:
+            out.emit([record], lambda record: print_group_info(record, sections))
+
+    elif intent_name == "get-all-groups-info":
+        info("===== All SDDC Groups info (local store) =========")
+        records = (store.group_info(org_id, group_id) for _, _, group_id in store.listing("groups", org_id))
+        out.emit((record for record in records if record), lambda record: print_group_info(record, sections))
+
+    elif intent_name == "show-routes":
+        info("===== Show TGW route tables (local store) =========")
+        group_id = select_stored_group(store, args, org_id)
+        if group_id:
+            lookup = option_values(args, "--lookup")
+            target = option_values(args, "--target")
+            index = store.route_index(org_id, store.resource_id(org_id, group_id) or "")
+            print_route_index(index, lookup[0] if lookup else None, target[0] if target else None)
+
+    elif intent_name == "get-operations":
+        info("===== Operations (local store) =========")
+        if not out.emit(store.operations(org_id), print_operation):
+            info("    No operation recorded")
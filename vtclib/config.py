@@ -0,0 +1,103 @@
+"""Settings read from the [vmcConfig] section of config.ini.
+
+Nothing is read at import time: the defaults below apply until load_settings()
+is called, either explicitly or by the first API call that needs a client."""
+
+import configparser                     # parsing config file
+import os
+
+CONFIG_FILE = "./config.ini"
+CONFIG_SECTION = "vmcConfig"
+
+# attribute, config.ini key, default (which also gives the type)
+OPTIONS = (
+    ("base_url",            "BaseURL",              "https://vmc.vmware.com/api"),
+    ("csp_url",             "CSP_URL",              "https://console.cloud.vmware.com/csp/gateway"),
+    ("api_token",           "API_Token",            ""),
+    ("org_id",              "org_id",               ""),
+    ("aws_account",         "MyAWS",                ""),
+    ("region",              "AWS_region",           ""),
+    ("dxgw_id",             "DXGW_id",              ""),
+    ("dxgw_owner",          "DXGW_owner",           ""),
+    ("tgw_id",              "TGW_id",               ""),
+    ("tgw_owner",           "TGW_owner",            ""),
+    ("tgw_region",          "TGW_region",           ""),
+    ("pool_size",           "pool_size",            10),
+    ("timeout",             "timeout",              60.0),
+    ("poll_initial",        "poll_initial",         1.0),
+    ("poll_max",            "poll_max",             30.0),
+    ("token_cache",         "token_cache",          ""),
+    ("token_margin",        "token_refresh_margin", 300),
+    ("inventory_ttl",       "inventory_ttl",        60.0),
+    ("inventory_cache_dir", "inventory_cache_dir",  ""),
+    ("state_db",            "state_db",             ""),
+    ("journal",             "journal",              ""),
+    ("page_size",           "page_size",            100),
+    ("prefix_limit",        "prefix_limit",         200),
+    ("max_workers",         "max_workers",          8),
+    ("retries",             "retries",              3),
+    ("rate_limit",          "rate_limit",           10.0),
+    ("rate_burst",          "rate_burst",           20),
+    ("breaker_threshold",   "breaker_threshold",    5),
+    ("breaker_cooldown",    "breaker_cooldown",     30.0),
+)
+
+
+class Settings:
+    """One set of config values; unset keys keep their defaults."""
+
+    __slots__ = tuple(option[0] for option in OPTIONS)
+
+    def __init__(self, **values):
+        for name, _, default in OPTIONS:
+            setattr(self, name, values.pop(name, default))
+        if values:
+            raise TypeError("unknown settings: " + ", ".join(values))
+
+    def update(self, other):
+        for name in self.__slots__:
+            setattr(self, name, getattr(other, name))
+        return self
+
+    @classmethod
+    def from_section(cls, section):
+        # section is a config section or any mapping of config keys (in any case) to strings
+        section = {key.lower(): value for key, value in section.items()}
+        values = {}
+        for name, key, default in OPTIONS:
+            if key.lower() in section:
+                values[name] = type(default)(section[key.lower()])
+        return cls(**values)
+
+
+def read_config(path=None):
+    path = path or CONFIG_FILE
+    if not os.path.exists(path):
+        raise FileNotFoundError("{} not found, copy 'config copy.ini' to config.ini and fill it in".format(path))
+    config = configparser.ConfigParser()
+    config.read(path)
+    return config
+
+
+def load_settings(path=None, section=CONFIG_SECTION):
+    """Reads config.ini into the shared settings and returns them."""
+    config = read_config(path)
+    if not config.has_section(section):
+        raise KeyError("no [{}] section in {}".format(section, path or CONFIG_FILE))
+    return settings.update(Settings.from_section(config[section]))
+
+
+def load_profiles(path=None, section=CONFIG_SECTION):
+    """Reads every section of config.ini as a named profile, returns {name: Settings}.
+
+    A profile only needs the keys that differ from the main section, e.g. its
+    org_id and API_Token; the main section also becomes the shared settings."""
+    config = read_config(path)
+    if not config.has_section(section):
+        raise KeyError("no [{}] section in {}".format(section, path or CONFIG_FILE))
+    main = dict(config[section])
+    settings.update(Settings.from_section(main))
+    return {name: Settings.from_section({**main, **config[name]}) for name in config.sections()}
+
+
+settings = Settings()
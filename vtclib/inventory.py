@@ -0,0 +1,422 @@
+"""Reading the inventory: SDDCs, SDDC Groups, their connectivity configs and NSX details."""
+
+import threading
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+
+from .config import settings
+from .client import decode, checked, get_client
+from .output import info
+from .models import SddcGroup, ConnectivityConfig
+from .store import get_store
+
+
+def iter_pages(myURL, session_token, size=None, cached=True, org_id=None):
+    """Yield every item of a paged listing, prefetching the next page while the caller works.
+
+    An error answer to any page raises APIError (status and message)."""
+    api = get_client(org_id)
+    size = size or settings.page_size
+    def fetch(page):
+        pageURL = "{}?page={}&size={}".format(myURL, page, size)
+        if cached:
+            return api.get_cached(pageURL, session_token)
+        return checked(api.get(pageURL, session_token))
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        page = 0
+        json_response = fetch(page)
+        while True:
+            last = json_response.get('last', page + 1 >= json_response.get('total_pages', 1))
+            next_page = None if last or not json_response['content'] else pool.submit(fetch, page + 1)
+            yield from json_response['content']
+            if next_page is None:
+                return
+            page += 1
+            json_response = next_page.result()
+
+def iter_deployments(org_id, session_token):
+    api = get_client(org_id)
+    myURL = "{}/inventory/{}/core/deployments".format(api.base_url, org_id)
+    return iter_pages(myURL, session_token, org_id=org_id)
+
+def iter_groups(org_id, session_token):
+    api = get_client(org_id)
+    myURL = "{}/inventory/{}/core/deployment-groups".format(api.base_url, org_id)
+    return iter_pages(myURL, session_token, org_id=org_id)
+
+@dataclass
+class SddcRecord:
+    number: int
+    name: str
+    id: str
+
+@dataclass
+class GroupRecord:
+    number: int
+    name: str
+    id: str
+
+def sddc_records(org_id, session_token):
+    for n, deployment in enumerate(iter_deployments(org_id, session_token), 1):
+        yield SddcRecord(n, deployment['name'], deployment['id'])
+
+def group_records(org_id, session_token):
+    for n, group in enumerate(iter_groups(org_id, session_token), 1):
+        yield GroupRecord(n, group['name'], group['id'])
+
+def print_sddc(record):
+    print(str(record.number) + ": " + record.name)
+
+def get_deployments(org_id, session_token):
+    n = 0
+    for record in sddc_records(org_id, session_token):
+        n = record.number
+        info(str(record.number) + ": " + record.name)
+    if n == 0:
+        info("\n=====No SDDC found=========")
+    return
+
+def get_deployment_id(sddc, org_id, session_token):
+    deployment_id = get_index(org_id, session_token).sddc(sddc)['id']
+    return deployment_id
+
+def get_group_id(group, org_id, session_token):
+    group_id = get_index(org_id, session_token).group(group)['id']
+    return group_id
+
+def get_sddc_groups(org_id, session_token):
+    n = 0
+    for record in group_records(org_id, session_token):
+        n = record.number
+        info(str(record.number) + ": " + record.name + ": " + record.id)
+    if n == 0:
+        info("     No SDDC Group found\n")
+        return False
+    return True
+
+def fetch_group(group_id, org_id, session_token):
+    api = get_client(org_id)
+    myURL = "{}/inventory/{}/core/deployment-groups/{}".format(api.base_url, org_id, group_id)
+    response = api.get(myURL, session_token)
+    return decode(response)
+
+GROUP_INFO_SECTIONS = {
+    "sddcs": "AwsRealizedSddcConnectivityTrait",
+    "tgw": "AwsNetworkConnectivityTrait",
+    "aws": "AwsVpcAttachmentsTrait",
+    "dxgw": "AwsDirectConnectGatewayAssociationsTrait",
+    "external-tgw": "AwsCustomerTransitGatewayAssociationsTrait",
+}
+
+def fetch_connectivity_config(resource_id, org_id, session_token, sections=None):
+    # only ask for the traits the caller is going to read
+    traits = [GROUP_INFO_SECTIONS[section] for section in sections or GROUP_INFO_SECTIONS]
+    api = get_client(org_id)
+    myURL = "{}/network/{}/core/network-connectivity-configs/{}/?trait={}".format(api.base_url, org_id, resource_id, ",".join(traits))
+    response = api.get(myURL, session_token)
+    return decode(response)
+
+def fetch_group_config(group_id, org_id, session_token, sections=None):
+    resource_id = get_resource_id(group_id, org_id, session_token)
+    return fetch_connectivity_config(resource_id, org_id, session_token, sections)
+
+@dataclass
+class GroupInfo:
+    __slots__ = ("org_id", "name", "id", "creator", "created", "sddcs", "tgws", "aws_accounts", "dxgws", "customer_tgws")
+    org_id: str
+    name: str
+    id: str
+    creator: str
+    created: str
+    sddcs: list             # None when the trait wasn't returned
+    tgws: list
+    aws_accounts: list
+    dxgws: list
+    customer_tgws: list
+
+def group_info_record(group, group_config):
+    group = SddcGroup.from_json(group)
+    group_config = ConnectivityConfig(group_config)
+    return GroupInfo(group.org_id, group.name, group.id, group.creator, group.created,
+                     group_config.sddcs, group_config.transit_gateways, group_config.aws_accounts,
+                     group_config.dxgw_associations, group_config.tgw_associations)
+
+def save_group_info(record):
+    store = get_store()
+    if store:
+        store.save_group_info(record)
+    return record
+
+def get_group_info(group_id, resource_id, org_id, session_token, sections=None):
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        group = pool.submit(fetch_group, group_id, org_id, session_token)
+        group_config = pool.submit(fetch_connectivity_config, resource_id, org_id, session_token, sections)
+    return save_group_info(group_info_record(group.result(), group_config.result()))
+
+def get_all_groups_info(org_id, session_token, sections=None, max_workers=None):
+    """Fetch every group's connectivity config concurrently, yield the reports in listing order.
+
+    The listing already holds the group records: only the configs are fetched."""
+    groups = list(iter_groups(org_id, session_token))
+    if not groups:
+        info("     No SDDC Group found\n")
+        return
+    with ThreadPoolExecutor(max_workers=max_workers or settings.max_workers) as pool:
+        reports = [(group, pool.submit(fetch_group_config, group['id'], org_id, session_token, sections)) for group in groups]
+        for group, group_config in reports:
+            try:
+                yield save_group_info(group_info_record(group, group_config.result()))
+            except Exception as e:
+                info("\n    Failed to read SDDC Group " + group['name'] + ": " + repr(e))
+
+def print_group_info(record, sections=None):
+    print("\nORG ID      : " + record.org_id)
+    print("SDDC Group")
+    print("==========")
+    print("    Name      : " + record.name)
+    print("    Group ID  : " + record.id)
+    print("    Creator   : " + record.creator)
+    print("    Date/Time : " + record.created)
+
+    if not sections or "sddcs" in sections:
+        print("SDDCs")
+        print("=====")    
+        if record.sddcs is not None:
+            for i, sddc_id in enumerate(record.sddcs):
+                print("    SDDC_ID " + str(i+1) + ": " + sddc_id)
+            if not record.sddcs:
+                print("    No SDDC attached")
+
+    if not sections or "tgw" in sections:
+        print("Transit Gateway")
+        print("===============")
+        if record.tgws is not None:
+            for tgw in record.tgws:
+                print("    TGW_ID    : " + tgw.id)
+                print("    Region    : " + tgw.region)  
+            if not record.tgws:
+                print("    No TGW")
+
+    if not sections or "aws" in sections:
+        print("AWS info")
+        print("========")
+        if not record.aws_accounts:
+            print("    No AWS account attached")    
+        for account in record.aws_accounts or []:
+            print("    AWS Account  : " + account.account_number)
+            print("    RAM Share ID : " + account.resource_share_name)
+            print("    Status       : " + account.state)
+            if account.state == "ASSOCIATING":
+                print("        Go to AWS console/RAM and accept the share and wait for Status ASSOCIATED (5-10 mins)")
+            else:   
+                print("VPC info")
+                print("========")
+                if not account.attachments:
+                    print("    No VPC attached")
+                for i, vpc in enumerate(account.attachments):
+                    print("    VPC " + str(i+1) + "        :" + vpc.vpc_id)
+                    print("        State         : " + vpc.state)
+                    print("        Attachment    : " + vpc.attach_id)
+                    if vpc.prefixes:
+                        print("        Static Routes : " + ', '.join(vpc.prefixes))
+
+    if not sections or "dxgw" in sections:
+        print("DX Gateway")
+        print("==========")
+        if not record.dxgws:
+            print("    No DXGW Association")
+        for dxgw in record.dxgws or []:
+            print("    DXGW ID   : " + dxgw.id)
+            print("    DXGW Owner: " + dxgw.owner)
+            print("    Status    : " + dxgw.state)
+            print("    Prefixes  : " + ', '.join(dxgw.prefixes))
+
+    if not sections or "external-tgw" in sections:
+        print("external TGW")
+        print("============")
+        if not record.customer_tgws:
+            print("    No TGW Association")
+        for tgw in record.customer_tgws or []:
+            print("    TGW ID     : " + tgw.id)
+            print("    TGW Owner  : " + tgw.owner)
+            print("    TGW Region : " + tgw.region)
+            print("    Prefixes   : " + ', '.join(tgw.prefixes))
+
+    return  
+
+def lookup_resource_id(group_id, org_id, session_token):
+    api = get_client(org_id)
+    myURL = "{}/network/{}/core/network-connectivity-configs/?group_id={}".format(api.base_url, org_id, group_id)
+    response = api.get(myURL, session_token)
+    json_response = decode(response)
+    # pretty_data = json.dumps(response.json(), indent=4)
+    # print(pretty_data)    
+    resource_id = json_response[0]['id']
+    return resource_id
+
+def get_resource_id(group_id, org_id, session_token):
+    return get_index(org_id, session_token).resource_id(group_id)
+
+
+class InventoryIndex:
+    """Maps SDDC and group names/IDs (and connectivity-config IDs) to each other."""
+
+    def __init__(self, org_id, session_token, tokens=None):
+        self.org_id = org_id
+        self.session_token = session_token
+        self.tokens = tokens        # a TokenManager: its fresh token rather than session_token, which may expire
+        self.sddcs = []             # listing order, for the numbered menus
+        self.sddc_by_id = {}
+        self.sddc_by_name = {}
+        self.groups = []
+        self.group_by_id = {}
+        self.group_by_name = {}
+        self.resource_by_group = {}
+        self.group_by_resource = {}
+        self.lock = threading.Lock()
+        self.loaded = False
+
+    def token(self):
+        return self.tokens.get_token() if self.tokens else self.session_token
+
+    def refresh(self):
+        # the listings are ETag-revalidated, so an unchanged org costs two 304s
+        sddcs = list(iter_deployments(self.org_id, self.token()))
+        groups = list(iter_groups(self.org_id, self.token()))
+        with self.lock:
+            self.update(sddcs, self.sddc_by_id, self.sddc_by_name)
+            self.update(groups, self.group_by_id, self.group_by_name)
+            for group_id in set(self.resource_by_group) - set(self.group_by_id):
+                del self.group_by_resource[self.resource_by_group.pop(group_id)]
+            self.sddcs = sddcs
+            self.groups = groups
+            self.loaded = True
+        store = get_store()
+        if store:
+            store.save_inventory(self.org_id, sddcs, groups)
+
+    @staticmethod
+    def update(items, by_id, by_name):
+        current = {item['id'] for item in items}
+        for item_id in set(by_id) - current:
+            by_name.pop(by_id.pop(item_id)['name'], None)
+        for item in items:
+            old = by_id.get(item['id'])
+            if old is not None and old['name'] != item['name']:
+                by_name.pop(old['name'], None)
+            by_id[item['id']] = item
+            by_name.setdefault(item['name'], item)
+
+    def find(self, key, items, by_id, by_name):
+        key = str(key).strip()
+        if key in by_id:
+            return by_id[key]
+        if key in by_name:
+            return by_name[key]
+        if key.isdigit() and 1 <= int(key) <= len(items):
+            return items[int(key)-1]
+        return None
+
+    def lookup(self, key, kind):
+        if not self.loaded:
+            self.refresh()
+        for attempt in range(2):
+            if kind == "sddc":
+                item = self.find(key, self.sddcs, self.sddc_by_id, self.sddc_by_name)
+            else:
+                item = self.find(key, self.groups, self.group_by_id, self.group_by_name)
+                if item is None and attempt == 1:
+                    self.learn_resource(key)
+                if item is None and key in self.group_by_resource:
+                    item = self.group_by_id.get(self.group_by_resource[key])
+            if item is not None:
+                return item
+            if attempt == 0:
+                self.refresh()      # might have been created since we last looked
+        raise KeyError("No {} matching '{}'".format("SDDC" if kind == "sddc" else "SDDC Group", key))
+
+    def sddc(self, key):
+        return self.lookup(key, "sddc")
+
+    def group(self, key):
+        return self.lookup(key, "group")
+
+    def learn_resource(self, resource_id):
+        api = get_client(self.org_id)
+        myURL = "{}/network/{}/core/network-connectivity-configs/{}".format(api.base_url, self.org_id, resource_id)
+        response = api.get(myURL, self.token())
+        if response.ok and decode(response).get('group_id'):
+            with self.lock:
+                self.resource_by_group[decode(response)['group_id']] = resource_id
+                self.group_by_resource[resource_id] = decode(response)['group_id']
+
+    def resource_id(self, group_id):
+        resource_id = self.resource_by_group.get(group_id)
+        store = get_store()
+        if resource_id is None and store:
+            resource_id = store.resource_id(self.org_id, group_id)     # never changes once the group exists
+        if resource_id is None:
+            resource_id = lookup_resource_id(group_id, self.org_id, self.token())
+            if store:
+                store.save_resource_id(self.org_id, group_id, resource_id)
+        if group_id not in self.resource_by_group:
+            with self.lock:
+                self.resource_by_group[group_id] = resource_id
+                self.group_by_resource[resource_id] = group_id
+        return resource_id
+
+
+indexes = {}
+indexes_lock = threading.Lock()
+
+def get_index(org_id, session_token):
+    # shared by every caller of the org: it uses the client's token manager, not the token of whoever came first
+    with indexes_lock:
+        if org_id not in indexes:
+            indexes[org_id] = InventoryIndex(org_id, session_token, get_client(org_id).tokens)
+        return indexes[org_id]
+
+
+@dataclass
+class NsxUser:
+    user_name: str
+    password: str
+
+@dataclass
+class LoginUrl:
+    preferred_url: str
+    other_urls: list
+
+@dataclass
+class NsxInfo:
+    nsx_private_ip: str
+    nsx_users: list
+    nsx_public_fqdn: str
+    nsx_private_fqdn: str
+    login_urls: list        # public CSP, private CSP, private local
+
+def get_nsx_info( org_id, deployment_id, session_token):
+    api = get_client(org_id)
+    myURL = "{}/network/{}/core/deployments/{}/nsx".format(api.base_url, org_id, deployment_id)
+    response = api.get(myURL, session_token)
+    json_response = decode(response)
+    # pretty_data = json.dumps(response.json(), indent=4)
+    # print(pretty_data) 
+    return NsxInfo(json_response['nsx_private_ip'],
+                   [NsxUser(user['user_name'], user['password']) for user in json_response['nsx_users']],
+                   json_response['nsx_public_fqdn'], json_response['nsx_private_fqdn'],
+                   [LoginUrl(url['preferred_url'], url.get('other_urls') or []) for url in json_response['login_urls']])
+
+def print_nsx_info(record):
+    print("    NSX private IP:   " + record.nsx_private_ip)
+    for user in record.nsx_users:
+        print("    NSX User : " + user.user_name + " - Password: " + user.password)
+    print("    NSX public FQDN:  " + record.nsx_public_fqdn)
+    print("    NSX private FQDN: " + record.nsx_private_fqdn)
+    print("    LOGIN URLs:")
+    print("       Public CSP:    " + record.login_urls[0].preferred_url)
+    print("       Private CSP:   " + record.login_urls[1].preferred_url)
+    for url in record.login_urls[1].other_urls:
+        print("                      " + url)
+    print("       Private local: " + record.login_urls[2].preferred_url)
+    return
@@ -0,0 +1,100 @@
+"""Append-only journal of the operations submitted, so that waits can be resumed.
+
+Every operation is written down (org, task ID, type, resource) as soon as
+the API accepted it, and again when it is seen done. After a crash or a
+Ctrl-C, the `resume` command waits on whatever was left in flight instead
+of submitting it again. Enabled with journal in config.ini.
+
+One JSON object per line; a line is written with a single appending write and
+fsynced, so several processes can share the file and a torn last line (power
+loss) is all that can be lost."""
+
+import os
+import json
+import time
+import threading
+from dataclasses import dataclass
+
+from .config import settings
+
+
+@dataclass
+class JournalEntry:
+    org_id: str
+    task_id: str
+    kind: str               # operation type, e.g. ASSOCIATE_DIRECT_CONNECT_GATEWAY
+    resource: str           # the connectivity config, or the name of a group being created
+    submitted: str
+    pid: int
+
+
+class Journal:
+    """The journal file; entries are never rewritten."""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def append(self, entry):
+        line = (json.dumps(entry, separators=(",", ":")) + "\n").encode()
+        with self.lock:
+            with open(self.path, "a+b", opener=lambda path, flags: os.open(path, flags, 0o600)) as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell():
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        line = b"\n" + line    # end a line torn by a crash, rather than extend it
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def submitted(self, org_id, task_id, kind, resource):
+        self.append({'event': "submitted", 'time': time.strftime("%Y-%m-%dT%H:%M:%S"), 'org_id': org_id, 'task_id': task_id,
+                     'kind': kind, 'resource': resource, 'pid': os.getpid()})
+
+    def finished(self, org_id, task_id, state):
+        self.append({'event': "finished", 'time': time.strftime("%Y-%m-%dT%H:%M:%S"), 'org_id': org_id, 'task_id': task_id,
+                     'state': state})
+
+    def entries(self):
+        try:
+            with open(self.path) as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue    # torn line
+        except FileNotFoundError:
+            return
+
+    def pending(self, org_id=None):
+        """Operations submitted and never seen done, oldest first."""
+        pending = {}
+        for entry in self.entries():
+            if org_id and entry.get('org_id') != org_id:
+                continue
+            key = (entry.get('org_id'), entry.get('task_id'))
+            if entry.get('event') == "submitted":
+                pending[key] = JournalEntry(entry['org_id'], entry['task_id'], entry.get('kind', ""), entry.get('resource', ""),
+                                            entry.get('time', ""), entry.get('pid', 0))
+            elif entry.get('event') == "finished":
+                pending.pop(key, None)
+        return list(pending.values())
+
+
+journals = {}
+journals_lock = threading.Lock()
+
+def get_journal(path=None):
+    """The journal at path (default: journal from the config), None when not configured."""
+    path = os.path.expanduser(path or settings.journal)
+    if not path:
+        return None
+    with journals_lock:
+        if path not in journals:
+            journals[path] = Journal(path)
+        return journals[path]
+
+
+def print_journal_entry(record):
+    print("    " + record.task_id + "  " + record.submitted + "  " + record.kind + " " + record.resource)
@@ -0,0 +1,277 @@
+"""Timing of every API call and operation wait.
+
+VMCClient.request, AsyncVMCClient.request and the task waits record one
+CallEvent each: endpoint (IDs replaced by placeholders), status, bytes,
+latency and attempts. The events feed per-endpoint latency histograms and
+are passed to the hooks, e.g. to export them:
+
+    from vtclib.metrics import metrics, otel_hook
+    metrics.add_hook(otel_hook())           # OpenTelemetry spans and histograms
+    ...
+    metrics.print_summary()
+    open("vtc.prom", "w").write(metrics.prometheus())
+
+The command line does this with --metrics, --metrics-file FILE and --otel."""
+
+import sys
+import time
+import threading
+import functools
+import urllib.parse
+from dataclasses import dataclass
+
+try:
+    from opentelemetry import metrics as otel_metrics, trace as otel_trace     # optional, only for otel_hook()
+except ImportError:
+    otel_metrics = otel_trace = None
+
+# path segments followed by an ID; a few fixed names can follow them too
+ID_PARENTS = {"inventory": "{org}", "network": "{org}", "operation": "{org}", "deployments": "{id}", "deployment-groups": "{id}",
+              "network-connectivity-configs": "{id}", "route-tables": "{id}", "operations": "{id}"}
+FIXED_NAMES = {"create-group-network-connectivity"}
+
+# upper bounds (seconds) of the Prometheus histogram buckets
+PROMETHEUS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+@functools.lru_cache(maxsize=1024)
+def endpoint(url):
+    # "https://vmc.vmware.com/api/inventory/org-1/core/deployment-groups/g-2?x" -> "/api/inventory/{org}/core/deployment-groups/{id}"
+    segments = urllib.parse.urlsplit(url).path.rstrip("/").split("/")
+    for i in range(1, len(segments)):
+        placeholder = ID_PARENTS.get(segments[i-1])
+        if placeholder and segments[i] not in FIXED_NAMES:
+            segments[i] = placeholder
+    return "/".join(segments)
+
+
+class Histogram:
+    """Log-linear latency histogram in the manner of HdrHistogram.
+
+    Values are kept in microseconds. Each power of two is split into 2**precision
+    buckets of equal width (values under 2**(precision+1) have a bucket each),
+    so a bucket is at most 1/2**precision of the values it holds wide and every
+    percentile is within that (under 0.8% by default) of the recorded value,
+    whatever its magnitude."""
+
+    __slots__ = ("precision", "counts", "count", "total", "min", "max")
+
+    def __init__(self, precision=7):
+        self.precision = precision
+        self.counts = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = 0.0
+
+    def index(self, micros):
+        # the top precision+1 bits of the value (sub in [2**precision, 2**(precision+1)) once shifted) and the shift
+        magnitude = max(micros.bit_length() - self.precision - 1, 0)
+        return (magnitude << (self.precision + 1)) + (micros >> magnitude)
+
+    def bounds(self, index):
+        # lowest and highest value (microseconds) counted in a bucket
+        magnitude, sub = index >> (self.precision + 1), index & ((1 << (self.precision + 1)) - 1)
+        return sub << magnitude, ((sub + 1) << magnitude) - 1
+
+    def record(self, seconds):
+        index = self.index(int(seconds * 1e6))
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def merge(self, other):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def percentile(self, fraction):
+        # seconds; the highest value of the bucket holding the percentile, capped by the maximum seen
+        if not self.count:
+            return 0.0
+        rank = max(1, round(fraction * self.count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self.bounds(index)[1] / 1e6, self.max)
+        return self.max
+
+    def cumulative(self, upper_bounds):
+        # (bound, count of values <= bound) for the Prometheus buckets. A bucket straddling a bound
+        # counts towards it: no value <= bound is left out, values up to one bucket width above may be in.
+        cumulative = []
+        for bound in upper_bounds:
+            limit = bound * 1e6
+            cumulative.append((bound, sum(count for index, count in self.counts.items() if self.bounds(index)[0] <= limit)))
+        return cumulative
+
+
+@dataclass
+class CallEvent:
+    kind: str               # "request", or "wait" for an operation waited on until it was done
+    method: str             # HTTP method; the operation type for a wait
+    endpoint: str
+    status: str             # HTTP status, exception name, or the final state of an operation
+    start: float            # epoch seconds
+    seconds: float
+    bytes: int = 0
+    attempts: int = 1       # HTTP attempts (1 + retries), or polls of an operation
+
+
+class CallStats:
+    """Everything recorded for one kind/method/endpoint."""
+
+    __slots__ = ("histogram", "statuses", "bytes", "attempts")
+
+    def __init__(self):
+        self.histogram = Histogram()
+        self.statuses = {}
+        self.bytes = 0
+        self.attempts = 0
+
+
+@dataclass
+class CallSummary:
+    kind: str
+    method: str
+    endpoint: str
+    calls: int
+    errors: int
+    retries: int
+    bytes: int
+    total_s: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+
+
+def is_error(status):
+    if status.isdigit():
+        return int(status) >= 400
+    return status != "COMPLETED"
+
+
+class Metrics:
+    """Histograms and counters of the calls made by this process, plus the hooks they go to."""
+
+    def __init__(self):
+        self.stats = {}
+        self.hooks = []
+        self.lock = threading.Lock()
+
+    def add_hook(self, hook):
+        """hook(event) is called with every CallEvent, from the thread that made the call."""
+        self.hooks.append(hook)
+        return hook
+
+    def remove_hook(self, hook):
+        self.hooks.remove(hook)
+
+    def record(self, event):
+        key = (event.kind, event.method, event.endpoint)
+        with self.lock:
+            stats = self.stats.get(key)
+            if stats is None:
+                stats = self.stats[key] = CallStats()
+            stats.histogram.record(event.seconds)
+            stats.statuses[event.status] = stats.statuses.get(event.status, 0) + 1
+            stats.bytes += event.bytes
+            stats.attempts += event.attempts
+        for hook in self.hooks:
+            hook(event)
+
+    def record_call(self, kind, method, url, status, start, attempts=1, size=0):
+        self.record(CallEvent(kind, method, endpoint(url) if "/" in url else url, str(status), start, time.time() - start, size, attempts))
+
+    def reset(self):
+        with self.lock:
+            self.stats.clear()
+
+    def summary(self):
+        with self.lock:
+            items = sorted(self.stats.items(), key=lambda item: -item[1].histogram.total)
+            return [CallSummary(kind, method, path, stats.histogram.count,
+                                sum(count for status, count in stats.statuses.items() if is_error(status)),
+                                stats.attempts - stats.histogram.count if kind == "request" else 0,
+                                stats.bytes, round(stats.histogram.total, 3),
+                                *(round(stats.histogram.percentile(fraction) * 1000, 1) for fraction in (0.5, 0.95, 0.99)),
+                                round(stats.histogram.max * 1000, 1))
+                    for (kind, method, path), stats in items]
+
+    def print_summary(self, stream=None):
+        stream = stream or sys.stderr
+        rows = self.summary()
+        if not rows:
+            return
+        method_width = max(len(row.method) for row in rows)
+        width = max(len(row.endpoint) for row in rows)
+        print("\n===== API calls =========", file=stream)
+        print("{:<7} {:<{}} {:<{}} {:>6} {:>6} {:>7} {:>10} {:>8} {:>8} {:>8} {:>8} {:>8}".format(
+            "kind", "method", method_width, "endpoint", width, "calls", "errors", "retries", "bytes", "total s", "p50 ms", "p95 ms", "p99 ms", "max ms"),
+            file=stream)
+        for row in rows:
+            print("{:<7} {:<{}} {:<{}} {:>6} {:>6} {:>7} {:>10} {:>8.3f} {:>8.1f} {:>8.1f} {:>8.1f} {:>8.1f}".format(
+                row.kind, row.method, method_width, row.endpoint, width, row.calls, row.errors, row.retries, row.bytes, row.total_s,
+                row.p50_ms, row.p95_ms, row.p99_ms, row.max_ms), file=stream)
+
+    def prometheus(self):
+        """The histograms and counters in the Prometheus text exposition format."""
+        lines = ["# HELP vtc_call_duration_seconds Latency of VMC API requests and operation waits.",
+                 "# TYPE vtc_call_duration_seconds histogram"]
+        with self.lock:
+            items = sorted(self.stats.items())
+            for (kind, method, path), stats in items:
+                labels = 'kind="{}",method="{}",endpoint="{}"'.format(kind, method, path)
+                for bound, count in stats.histogram.cumulative(PROMETHEUS_BUCKETS):
+                    lines.append('vtc_call_duration_seconds_bucket{{{},le="{}"}} {}'.format(labels, bound, count))
+                lines.append('vtc_call_duration_seconds_bucket{{{},le="+Inf"}} {}'.format(labels, stats.histogram.count))
+                lines.append('vtc_call_duration_seconds_sum{{{}}} {}'.format(labels, stats.histogram.total))
+                lines.append('vtc_call_duration_seconds_count{{{}}} {}'.format(labels, stats.histogram.count))
+            lines += ["# HELP vtc_calls_total Calls by final status.", "# TYPE vtc_calls_total counter"]
+            for (kind, method, path), stats in items:
+                for status, count in sorted(stats.statuses.items()):
+                    lines.append('vtc_calls_total{{kind="{}",method="{}",endpoint="{}",status="{}"}} {}'.format(kind, method, path, status, count))
+            lines += ["# HELP vtc_call_attempts_total HTTP attempts, or operation polls.", "# TYPE vtc_call_attempts_total counter"]
+            lines += ['vtc_call_attempts_total{{kind="{}",method="{}",endpoint="{}"}} {}'.format(kind, method, path, stats.attempts)
+                      for (kind, method, path), stats in items]
+            lines += ["# HELP vtc_response_bytes_total Bytes of the response bodies.", "# TYPE vtc_response_bytes_total counter"]
+            lines += ['vtc_response_bytes_total{{kind="{}",method="{}",endpoint="{}"}} {}'.format(kind, method, path, stats.bytes)
+                      for (kind, method, path), stats in items if kind == "request"]
+        return "\n".join(lines) + "\n"
+
+
+def otel_hook(name="vtclib"):
+    """A hook that turns every event into an OpenTelemetry span and histogram point.
+
+    Uses the globally configured tracer and meter providers (opentelemetry-sdk,
+    or opentelemetry-instrument), e.g. metrics.add_hook(otel_hook())."""
+    if otel_metrics is None:
+        raise RuntimeError("opentelemetry is needed for the OpenTelemetry export: pip install opentelemetry-sdk")
+    tracer = otel_trace.get_tracer(name)
+    duration = otel_metrics.get_meter(name).create_histogram("vtc.call.duration", unit="s",
+                                                             description="Latency of VMC API requests and operation waits")
+    size = otel_metrics.get_meter(name).create_counter("vtc.response.size", unit="By", description="Bytes of the response bodies")
+
+    def hook(event):
+        attributes = {'vtc.kind': event.kind, 'vtc.method': event.method, 'vtc.endpoint': event.endpoint,
+                      'vtc.status': event.status, 'vtc.attempts': event.attempts}
+        span = tracer.start_span("{} {}".format(event.method, event.endpoint), start_time=int(event.start * 1e9), attributes=attributes)
+        if is_error(event.status):
+            span.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR, event.status))
+        span.end(end_time=int((event.start + event.seconds) * 1e9))
+        duration.record(event.seconds, attributes)
+        if event.bytes:
+            size.add(event.bytes, attributes)
+    return hook
+
+
+metrics = Metrics()
@@ -0,0 +1,445 @@
+"""Local stand-in for the VMC and CSP endpoints used by vtclib.
+
+    python -m vtclib.mock --port 8765 --latency 50 --error-rate 0.01
+
+then point a config at it:
+
+    BaseURL = http://127.0.0.1:8765/api
+    CSP_URL = http://127.0.0.1:8765/csp/gateway
+
+The org is held in memory. Operations go SUBMITTED -> IN_PROGRESS ->
+COMPLETED (or FAILED) over op_duration seconds and change the org when they
+complete. Latency, the maximum page size and injected errors (503, or 429
+with a Retry-After) are configurable. Any org ID and any API token work."""
+
+import re
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+import itertools
+import urllib.parse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+class MockError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class MockVMC:
+    """In-memory org: SDDCs, SDDC Groups with their connectivity config, and operations."""
+
+    def __init__(self, sddcs=8, groups=2, routes=0, op_duration=1.0, fail_rate=0.0, region="us-west-2", seed=None):
+        self.random = random.Random(seed)
+        self.op_duration = op_duration
+        self.fail_rate = fail_rate
+        self.region = region
+        self.routes = routes        # extra static routes per group, to size the route tables
+        self.lock = threading.RLock()
+        self.ids = itertools.count(1)
+        self.sddcs = [{'id': "sddc-{:04}".format(n), 'name': "sddc-{:02}".format(n), 'cidr': "10.{}.{}.0/20".format(n // 16, n % 16 * 16)}
+                      for n in range(sddcs)]
+        self.groups = {}            # group id -> group
+        self.operations = {}
+        for n in range(groups):
+            self.add_group("group-{:02}".format(n), [self.sddcs[n]['id']] if n < sddcs else [])
+
+    def new_id(self, prefix):
+        return "{}-{:06}".format(prefix, next(self.ids))
+
+    def add_group(self, name, members):
+        group_id = self.new_id("group")
+        self.groups[group_id] = {
+            'id': group_id, 'name': name, 'resource_id': self.new_id("ncc"), 'created': time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            'members': list(members), 'tgw': self.new_id("tgw"), 'accounts': {}, 'dxgws': {}, 'customer_tgws': {}}
+        return self.groups[group_id]
+
+    def group(self, group_id):
+        if group_id not in self.groups:
+            raise MockError(404, "SDDC Group {} not found".format(group_id))
+        return self.groups[group_id]
+
+    def by_resource(self, resource_id):
+        for group in self.groups.values():
+            if group['resource_id'] == resource_id:
+                return group
+        raise MockError(404, "Network connectivity config {} not found".format(resource_id))
+
+    # ---- JSON documents
+
+    def group_json(self, org_id, group):
+        return {'id': group['id'], 'name': group['name'], 'org_id': org_id,
+                'creator': {'user_name': "mock@example.com", 'timestamp': group['created']},
+                'membership': {'included': [{'id': sddc_id} for sddc_id in group['members']]}}
+
+    def config_json(self, group, traits=None):
+        all_traits = {
+            'AwsRealizedSddcConnectivityTrait': {'sddcs': [{'sddc_id': sddc_id} for sddc_id in group['members']]},
+            'AwsNetworkConnectivityTrait': {'l3connectors': [{'id': group['tgw'], 'location': {'name': self.region}}]},
+            'AwsVpcAttachmentsTrait': {'accounts': [dict(account) for account in group['accounts'].values()]},
+            'AwsDirectConnectGatewayAssociationsTrait': {'direct_connect_gateway_associations': list(group['dxgws'].values())},
+            'AwsCustomerTransitGatewayAssociationsTrait': {'customer_transit_gateway_associations': list(group['customer_tgws'].values())},
+        }
+        return {'id': group['resource_id'], 'group_id': group['id'], 'name': group['name'],
+                'traits': {trait: value for trait, value in all_traits.items() if not traits or trait in traits}}
+
+    def route_tables(self, group):
+        # members: every member's CIDR plus what is reachable behind it; external: the members seen from a customer TGW
+        sddcs = {sddc['id']: sddc for sddc in self.sddcs}
+        members = [(sddcs[sddc_id]['cidr'], sddc_id) for sddc_id in group['members'] if sddc_id in sddcs]
+        for account in group['accounts'].values():
+            members += [(prefix, att['attach_id']) for att in account['attachments'] if att['state'] == "AVAILABLE"
+                        for prefix in att['configured_prefixes']]
+        for dxgw in group['dxgws'].values():
+            members += [(prefix, dxgw['direct_connect_gateway_id']) for peering in dxgw['peering_regions'] for prefix in peering['allowed_prefixes']]
+        for tgw in group['customer_tgws'].values():
+            members += [(prefix, tgw['customer_transit_gateway_id']) for peering in tgw['peering_regions'] for prefix in peering['configured_prefixes']]
+        members += [("100.{}.{}.0/24".format(64 + n // 256 % 64, n % 256), group['members'][n % len(group['members'])])
+                    for n in range(self.routes) if group['members']]
+        external = [(sddcs[sddc_id]['cidr'], group['tgw']) for sddc_id in group['members'] if sddc_id in sddcs]
+        return {'members': members, 'external': external}
+
+    def nsx_json(self, deployment_id):
+        if deployment_id not in {sddc['id'] for sddc in self.sddcs}:
+            raise MockError(404, "Deployment {} not found".format(deployment_id))
+        return {'nsx_private_ip': "10.0.0.4", 'nsx_users': [{'user_name': "admin", 'password': "mock"}],
+                'nsx_public_fqdn': "nsx-{}.mock.vmc".format(deployment_id), 'nsx_private_fqdn': "nsx.{}.local".format(deployment_id),
+                'login_urls': [{'preferred_url': "https://nsx-{}.mock.vmc/{}".format(deployment_id, kind), 'other_urls': []}
+                               for kind in ("public-csp", "private-csp", "private-local")]}
+
+    # ---- operations
+
+    def submit(self, operation_type, resource_id, config):
+        with self.lock:
+            operation_id = self.new_id("op")
+            self.operations[operation_id] = {'id': operation_id, 'type': operation_type, 'resource_id': resource_id, 'config': config,
+                                             'submitted': time.time(), 'done': None, 'error': ""}
+            return operation_id
+
+    def operation_json(self, operation_id):
+        with self.lock:
+            if operation_id not in self.operations:
+                raise MockError(404, "Operation {} not found".format(operation_id))
+            operation = self.operations[operation_id]
+            elapsed = time.time() - operation['submitted']
+            if operation['done'] is None and elapsed >= self.op_duration:
+                self.complete(operation)
+            if operation['done'] is not None:
+                state = operation['done']
+            else:
+                state = "IN_PROGRESS" if elapsed >= self.op_duration / 5 else "SUBMITTED"
+            return {'id': operation['id'], 'type': operation['type'], 'resource_id': operation['resource_id'],
+                    'resource_type': "network-connectivity-config",
+                    'state': {'name': state, 'error_msg': operation['error'], 'error_code': "MOCK_ERROR" if operation['error'] else "",
+                              'name_message': {'message_key': "mock.operation." + state.lower()}}}
+
+    def complete(self, operation):
+        try:
+            if self.random.random() < self.fail_rate:
+                raise MockError(500, "Injected failure")
+            self.apply(operation['type'], operation['resource_id'], operation['config'])
+        except MockError as e:
+            operation['done'] = "FAILED"
+            operation['error'] = str(e)
+        else:
+            operation['done'] = "COMPLETED"
+
+    def apply(self, operation_type, resource_id, config):
+        sddc_ids = {sddc['id'] for sddc in self.sddcs}
+        if operation_type == "CREATE_GROUP":
+            unknown = set(config['members']) - sddc_ids
+            if unknown:
+                raise MockError(400, "Unknown deployment(s): " + ", ".join(sorted(unknown)))
+            self.add_group(config['name'], config['members'])
+            return
+        group = self.by_resource(resource_id)
+        if operation_type == "UPDATE_MEMBERS":
+            add = [member['id'] for member in config.get('add_members') or []]
+            remove = [member['id'] for member in config.get('remove_members') or []]
+            if set(add) - sddc_ids:
+                raise MockError(400, "Unknown deployment(s): " + ", ".join(sorted(set(add) - sddc_ids)))
+            group['members'] = [sddc_id for sddc_id in group['members'] if sddc_id not in remove]
+            group['members'] += [sddc_id for sddc_id in add if sddc_id not in group['members']]
+        elif operation_type == "DELETE_DEPLOYMENT_GROUP":
+            if group['members']:
+                raise MockError(400, "SDDC Group still has members")
+            del self.groups[group['id']]
+        elif operation_type == "ADD_EXTERNAL_ACCOUNT":
+            number = config['account']['account_number']
+            # the account owner has two VPCs waiting for acceptance
+            group['accounts'][number] = {
+                'account_number': number, 'resource_share_name': "share-" + number, 'state': "ASSOCIATED",
+                'attachments': [{'vpc_id': self.new_id("vpc"), 'state': "PENDING_ACCEPTANCE", 'attach_id': self.new_id("tgw-attach"),
+                                 'configured_prefixes': []} for _ in range(2)]}
+        elif operation_type == "REMOVE_EXTERNAL_ACCOUNT":
+            group['accounts'].pop(config['account']['account_number'], None)
+        elif operation_type == "APPLY_ATTACHMENT_ACTION":
+            account = group['accounts'].get(config['account']['account_number'])
+            if account is None:
+                raise MockError(400, "Account not connected")
+            attachments = {att['attach_id']: att for att in account['attachments']}
+            for action in config['account']['attachments']:
+                att = attachments.get(action['attach_id'])
+                if att is None:
+                    raise MockError(400, "Unknown attachment " + action['attach_id'])
+                if action['action'] == "ACCEPT":
+                    att['state'] = "AVAILABLE"
+                elif action['action'] == "DELETE":
+                    account['attachments'].remove(att)
+                elif action['action'] == "UPDATE":
+                    att['configured_prefixes'] = list(action.get('configured_prefixes') or [])
+        elif operation_type == "ASSOCIATE_DIRECT_CONNECT_GATEWAY":
+            association = config['direct_connect_gateway_association']
+            group['dxgws'][association['direct_connect_gateway_id']] = {
+                'direct_connect_gateway_id': association['direct_connect_gateway_id'],
+                'direct_connect_gateway_owner': association.get('direct_connect_gateway_owner', ""), 'state': "ASSOCIATED",
+                'peering_regions': [{'allowed_prefixes': peering.get('allowed_prefixes') or []}
+                                    for peering in association.get('peering_region_configs') or []]}
+        elif operation_type == "DISASSOCIATE_DIRECT_CONNECT_GATEWAY":
+            group['dxgws'].pop(config['direct_connect_gateway_association']['direct_connect_gateway_id'], None)
+        elif operation_type == "ASSOCIATE_CUSTOMER_TRANSIT_GATEWAY":
+            association = config['customer_transit_gateway_association']
+            peerings = association.get('peering_region_configs') or []
+            existing = group['customer_tgws'].get(association['customer_transit_gateway_id'])
+            if any(peering.get('action') == "UPDATE" for peering in peerings):
+                # the prefixes of an association change in place
+                if existing is None:
+                    raise MockError(400, "No association with " + association['customer_transit_gateway_id'] + " to update")
+                existing['peering_regions'] = [{'configured_prefixes': peering.get('configured_prefixes') or []} for peering in peerings]
+                return
+            group['customer_tgws'][association['customer_transit_gateway_id']] = {
+                'customer_transit_gateway_id': association['customer_transit_gateway_id'],
+                'customer_transit_gateway_owner': association.get('customer_transit_gateway_owner', ""),
+                'customer_transit_gateway_region': {'code': association.get('customer_transit_gateway_region', "")},
+                'peering_regions': [{'configured_prefixes': peering.get('configured_prefixes') or []} for peering in peerings]}
+        elif operation_type == "DISASSOCIATE_CUSTOMER_TRANSIT_GATEWAY":
+            group['customer_tgws'].pop(config['customer_transit_gateway_association']['customer_transit_gateway_id'], None)
+        else:
+            raise MockError(400, "Unsupported operation type " + operation_type)
+
+
+def page(items, query, max_size):
+    # the API's paging envelope; without ?page everything comes back at once
+    if 'page' not in query:
+        return {'content': items, 'total_elements': len(items), 'total_pages': 1, 'number': 0, 'last': True, 'empty': not items}
+    number = int(query['page'][0])
+    size = max(1, min(int(query.get('size', [max_size])[0]), max_size))
+    total_pages = max(1, (len(items) + size - 1) // size)
+    return {'content': items[number * size:(number + 1) * size], 'total_elements': len(items), 'total_pages': total_pages,
+            'number': number, 'size': size, 'last': number >= total_pages - 1, 'empty': not items}
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"       # keep-alive, like the real endpoints
+    disable_nagle_algorithm = True      # headers and body go out as two writes
+
+    ROUTES = [
+        ("POST", r"/csp/gateway/am/api/auth/api-tokens/authorize", "authorize"),
+        ("GET", r"/api/inventory/(?P<org>[^/]+)/core/deployments", "deployments"),
+        ("GET", r"/api/inventory/(?P<org>[^/]+)/core/deployment-groups", "groups"),
+        ("GET", r"/api/inventory/(?P<org>[^/]+)/core/deployment-groups/(?P<group>[^/]+)", "group"),
+        ("GET", r"/api/network/(?P<org>[^/]+)/core/network-connectivity-configs", "configs"),
+        ("GET", r"/api/network/(?P<org>[^/]+)/core/network-connectivity-configs/(?P<resource>[^/]+)", "config"),
+        ("GET", r"/api/network/(?P<org>[^/]+)/core/network-connectivity-configs/(?P<resource>[^/]+)/route-tables", "route_tables"),
+        ("GET", r"/api/network/(?P<org>[^/]+)/core/network-connectivity-configs/(?P<resource>[^/]+)/route-tables/(?P<table>[^/]+)/routes", "routes"),
+        ("GET", r"/api/network/(?P<org>[^/]+)/core/deployments/(?P<deployment>[^/]+)/nsx", "nsx"),
+        ("GET", r"/api/operation/(?P<org>[^/]+)/core/operations/(?P<operation>[^/]+)", "operation"),
+        ("POST", r"/api/network/(?P<org>[^/]+)/core/network-connectivity-configs/create-group-network-connectivity", "create_group"),
+        ("POST", r"/api/network/(?P<org>[^/]+)/aws/operations", "aws_operation"),
+    ]
+    ROUTES = [(method, re.compile(pattern + "$"), name) for method, pattern, name in ROUTES]
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def dispatch(self, method):
+        server = self.server
+        url = urllib.parse.urlsplit(self.path)
+        path = url.path.rstrip("/")
+        self.query = urllib.parse.parse_qs(url.query)
+        length = int(self.headers.get('Content-Length') or 0)
+        self.body = json.loads(self.rfile.read(length) or b"{}") if length else {}
+        for route_method, pattern, name in self.ROUTES:
+            match = pattern.match(path)
+            if match and route_method == method:
+                break
+        else:
+            return self.send({'message': "No mock for {} {}".format(method, path)}, 404)
+        server.count(name)
+        delay = server.latency + server.random.uniform(0, server.jitter)
+        if delay:
+            time.sleep(delay)
+        roll = server.random.random()
+        if roll < server.error_rate:
+            return self.send({'message': "Injected error"}, 503)
+        if roll < server.error_rate + server.throttle_rate:
+            return self.send({'message': "Too many requests"}, 429, {'Retry-After': str(server.retry_after)})
+        if name != "authorize" and not (self.headers.get('csp-auth-token') or "").startswith("mock-"):
+            return self.send({'message': "Unauthorized"}, 401)
+        try:
+            with server.vmc.lock:
+                body = getattr(self, "handle_" + name)(**match.groupdict())
+        except MockError as e:
+            return self.send({'message': str(e)}, e.status)
+        self.send(body)
+
+    def send(self, body, status=200, headers=None):
+        data = json.dumps(body).encode()
+        etag = '"{}"'.format(hashlib.sha256(data).hexdigest()[:32])
+        if status == 200 and self.command == "GET" and self.headers.get('If-None-Match') == etag:
+            status, data = 304, b""
+        self.send_response(status)
+        for header, value in (headers or {}).items():
+            self.send_header(header, value)
+        if status in (200, 304):
+            self.send_header('ETag', etag)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    # ---- endpoints
+
+    def handle_authorize(self):
+        refresh_token = (self.query.get('refresh_token') or [""])[0]
+        if not refresh_token:
+            raise MockError(400, "refresh_token is required")
+        return {'access_token': "mock-" + hashlib.sha256(refresh_token.encode()).hexdigest()[:16],
+                'expires_in': self.server.token_lifetime, 'token_type': "bearer"}
+
+    def handle_deployments(self, org):
+        sddcs = [{'id': sddc['id'], 'name': sddc['name']} for sddc in self.server.vmc.sddcs]
+        return page(sddcs, self.query, self.server.max_page_size)
+
+    def handle_groups(self, org):
+        groups = [self.server.vmc.group_json(org, group) for group in self.server.vmc.groups.values()]
+        return page(groups, self.query, self.server.max_page_size)
+
+    def handle_group(self, org, group):
+        return self.server.vmc.group_json(org, self.server.vmc.group(group))
+
+    def handle_configs(self, org):
+        group_id = (self.query.get('group_id') or [""])[0]
+        return [self.server.vmc.config_json(self.server.vmc.group(group_id))]
+
+    def handle_config(self, org, resource):
+        traits = ",".join(self.query.get('trait') or []).split(",")
+        return self.server.vmc.config_json(self.server.vmc.by_resource(resource), [trait for trait in traits if trait])
+
+    def handle_route_tables(self, org, resource):
+        tables = self.server.vmc.route_tables(self.server.vmc.by_resource(resource))
+        return page([{'id': name, 'name': name} for name in tables], self.query, self.server.max_page_size)
+
+    def handle_routes(self, org, resource, table):
+        tables = self.server.vmc.route_tables(self.server.vmc.by_resource(resource))
+        if table not in tables:
+            raise MockError(404, "Route table {} not found".format(table))
+        routes = [{'destination': destination, 'target': {'id': target}} for destination, target in tables[table]]
+        return page(routes, self.query, self.server.max_page_size)
+
+    def handle_nsx(self, org, deployment):
+        return self.server.vmc.nsx_json(deployment)
+
+    def handle_operation(self, org, operation):
+        return self.server.vmc.operation_json(operation)
+
+    def handle_create_group(self, org):
+        members = [member['id'] for member in self.body.get('members') or []]
+        operation_id = self.server.vmc.submit("CREATE_GROUP", "", {'name': self.body.get('name', ""), 'members': members})
+        return {'operation_id': operation_id}
+
+    def handle_aws_operation(self, org):
+        operation_type = self.body.get('type', "")
+        resource_id = self.body.get('resource_id', "")
+        self.server.vmc.by_resource(resource_id)
+        operation_id = self.server.vmc.submit(operation_type, resource_id, self.body.get('config') or {})
+        # UPDATE_MEMBERS answers with the operation id inside the config
+        return {'id': operation_id, 'type': operation_type, 'resource_id': resource_id, 'config': {'operation_id': operation_id}}
+
+
+class MockServer(ThreadingHTTPServer):
+    """The HTTP side: latency, paging limit, injected errors and request counts."""
+
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, error_rate=0.0, throttle_rate=0.0, retry_after=1,
+                 max_page_size=100, token_lifetime=1800, seed=None, **org_options):
+        super().__init__((host, port), MockHandler)
+        self.vmc = MockVMC(seed=seed, **org_options)
+        self.random = random.Random(seed)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.max_page_size = max_page_size
+        self.token_lifetime = token_lifetime
+        self.requests = {}
+        self.requests_lock = threading.Lock()
+        self.thread = None
+
+    @property
+    def base_url(self):
+        return "http://{}:{}/api".format(*self.server_address[:2])
+
+    @property
+    def csp_url(self):
+        return "http://{}:{}/csp/gateway".format(*self.server_address[:2])
+
+    def count(self, name):
+        with self.requests_lock:
+            self.requests[name] = self.requests.get(name, 0) + 1
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m vtclib.mock", description="Local stand-in for the VMC and CSP APIs.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0, help="milliseconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0, help="up to this many more milliseconds, at random")
+    parser.add_argument("--error-rate", type=float, default=0, help="fraction of requests answered 503")
+    parser.add_argument("--throttle-rate", type=float, default=0, help="fraction of requests answered 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After of the 429s, seconds")
+    parser.add_argument("--max-page-size", type=int, default=100)
+    parser.add_argument("--sddcs", type=int, default=8)
+    parser.add_argument("--groups", type=int, default=2)
+    parser.add_argument("--routes", type=int, default=0, help="extra routes per group")
+    parser.add_argument("--op-duration", type=float, default=1.0, help="seconds an operation takes")
+    parser.add_argument("--fail-rate", type=float, default=0, help="fraction of operations that FAIL")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+    server = MockServer(args.host, args.port, args.latency / 1000, args.jitter / 1000, args.error_rate, args.throttle_rate,
+                        args.retry_after, args.max_page_size, seed=args.seed, sddcs=args.sddcs, groups=args.groups,
+                        routes=args.routes, op_duration=args.op_duration, fail_rate=args.fail_rate)
+    print("Mock VMC listening, use in config.ini:")
+    print("    BaseURL = " + server.base_url)
+    print("    CSP_URL = " + server.csp_url)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
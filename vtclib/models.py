@@ -0,0 +1,143 @@
+"""Compact (__slots__) models parsed once from the API responses.
+
+Missing keys are handled here rather than at every use. ConnectivityConfig
+only parses a trait the first time it is asked for."""
+
+from dataclasses import dataclass
+
+
+@dataclass
+class VpcAttachment:
+    __slots__ = ("vpc_id", "state", "attach_id", "prefixes")
+    vpc_id: str
+    state: str
+    attach_id: str
+    prefixes: list
+
+    @classmethod
+    def from_json(cls, att):
+        return cls(att.get('vpc_id', ""), att.get('state', ""), att.get('attach_id', ""), att.get('configured_prefixes') or [])
+
+@dataclass
+class AwsAccount:
+    __slots__ = ("account_number", "resource_share_name", "state", "attachments")
+    account_number: str
+    resource_share_name: str
+    state: str
+    attachments: list
+
+    @classmethod
+    def from_json(cls, account):
+        return cls(account.get('account_number', ""), account.get('resource_share_name') or "", account.get('state', ""),
+                   [VpcAttachment.from_json(att) for att in account.get('attachments') or []])
+
+@dataclass
+class TransitGateway:
+    __slots__ = ("id", "region")
+    id: str
+    region: str
+
+    @classmethod
+    def from_json(cls, l3connector):
+        return cls(l3connector.get('id', ""), (l3connector.get('location') or {}).get('name', ""))
+
+@dataclass
+class DxgwAssociation:
+    __slots__ = ("id", "owner", "state", "prefixes")
+    id: str
+    owner: str
+    state: str
+    prefixes: list
+
+    @classmethod
+    def from_json(cls, dxgw):
+        return cls(dxgw.get('direct_connect_gateway_id', ""), dxgw.get('direct_connect_gateway_owner', ""), dxgw.get('state', ""),
+                   [prefix for peering in dxgw.get('peering_regions') or [] for prefix in peering.get('allowed_prefixes') or []])
+
+@dataclass
+class TgwAssociation:
+    __slots__ = ("id", "owner", "region", "prefixes")
+    id: str
+    owner: str
+    region: str
+    prefixes: list
+
+    @classmethod
+    def from_json(cls, tgw):
+        return cls(tgw.get('customer_transit_gateway_id', ""), tgw.get('customer_transit_gateway_owner', ""),
+                   (tgw.get('customer_transit_gateway_region') or {}).get('code', ""),
+                   [prefix for peering in tgw.get('peering_regions') or [] for prefix in peering.get('configured_prefixes') or []])
+
+@dataclass
+class Route:
+    __slots__ = ("table", "destination", "targets")
+    table: str
+    destination: str
+    targets: list
+
+@dataclass
+class SddcGroup:
+    __slots__ = ("org_id", "name", "id", "creator", "created", "members")
+    org_id: str
+    name: str
+    id: str
+    creator: str
+    created: str
+    members: list
+
+    @classmethod
+    def from_json(cls, group):
+        creator = group.get('creator') or {}
+        members = [member.get('id') for member in (group.get('membership') or {}).get('included') or []]
+        return cls(group.get('org_id', ""), group.get('name', ""), group.get('id', ""),
+                   creator.get('user_name', ""), creator.get('timestamp', ""), members)
+
+
+class ConnectivityConfig:
+    """A network-connectivity-config; each trait is parsed on first access and
+    is None when the trait wasn't part of the response."""
+
+    __slots__ = ("id", "group_id", "traits", "parsed")
+
+    TRAITS = {
+        'sddcs': ('AwsRealizedSddcConnectivityTrait', 'sddcs', lambda sddc: sddc.get('sddc_id', "")),
+        'transit_gateways': ('AwsNetworkConnectivityTrait', 'l3connectors', TransitGateway.from_json),
+        'aws_accounts': ('AwsVpcAttachmentsTrait', 'accounts', AwsAccount.from_json),
+        'dxgw_associations': ('AwsDirectConnectGatewayAssociationsTrait', 'direct_connect_gateway_associations', DxgwAssociation.from_json),
+        'tgw_associations': ('AwsCustomerTransitGatewayAssociationsTrait', 'customer_transit_gateway_associations', TgwAssociation.from_json),
+    }
+
+    def __init__(self, json_response):
+        self.id = json_response.get('id', "")
+        self.group_id = json_response.get('group_id', "")
+        self.traits = json_response.get('traits') or {}
+        self.parsed = {}
+
+    def trait(self, name):
+        if name not in self.parsed:
+            trait, key, parse = self.TRAITS[name]
+            if trait in self.traits:
+                self.parsed[name] = [parse(item) for item in (self.traits[trait] or {}).get(key) or []]
+            else:
+                self.parsed[name] = None
+        return self.parsed[name]
+
+    @property
+    def sddcs(self):
+        return self.trait('sddcs')
+
+    @property
+    def transit_gateways(self):
+        return self.trait('transit_gateways')
+
+    @property
+    def aws_accounts(self):
+        return self.trait('aws_accounts')
+
+    @property
+    def dxgw_associations(self):
+        return self.trait('dxgw_associations')
+
+    @property
+    def tgw_associations(self):
+        return self.trait('tgw_associations')
@@ -0,0 +1,385 @@
+"""Operations that change an SDDC Group: membership, AWS accounts, VPC attachments, DXGW and TGW."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from .config import settings
+from .client import decode, get_client
+from .tasks import get_tasks_status
+from .output import info
+from .models import SddcGroup, ConnectivityConfig
+from .inventory import fetch_group
+from .prefixes import PrefixError, prepare_prefixes
+from .journal import get_journal
+
+
+def submitted(task_id, org_id, kind, resource):
+    # journaled before anybody waits on it, so that `resume` finds it after a crash
+    journal = get_journal()
+    if journal and task_id:
+        journal.submitted(org_id, task_id, kind, resource)
+    return task_id
+
+def create_sddc_group(name, deployment_id, org_id, session_token):
+    api = get_client(org_id)
+    myURL = "{}/network/{}/core/network-connectivity-configs/create-group-network-connectivity".format(api.base_url, org_id)
+    body = {
+        "name": name,
+        "description": name,
+        "members": [
+            {
+                "id": deployment_id
+            }
+        ]
+    }
+    response = api.post(myURL, session_token, json=body)
+    json_response = decode(response)
+    # pretty_data = json.dumps(response.json(), indent=4)
+    # print(pretty_data)
+    if not response.ok :
+        print ("    Error: " + json_response.get('message', str(response.status_code)))
+        task_id = 0
+    else:
+        task_id = json_response ['operation_id']
+    return submitted(task_id, org_id, "CREATE_GROUP", name)
+
+
+def update_members(add_ids, remove_ids, resource_id, org_id, session_token):
+    api = get_client(org_id)
+    myURL = "{}/network/{}/aws/operations".format(api.base_url, org_id)
+    body = {
+        "type": "UPDATE_MEMBERS",
+        "resource_id": resource_id,
+        "resource_type": "network-connectivity-config",
+        "config" : {
+            "type": "AwsUpdateDeploymentGroupMembersConfig",
+            "add_members": [{"id": deployment_id} for deployment_id in dict.fromkeys(add_ids)],
+            "remove_members": [{"id": deployment_id} for deployment_id in dict.fromkeys(remove_ids)]
+        }
+    }
+    response = api.post(myURL, session_token, json=body)
+    json_response = decode(response)
+    # pretty_data = json.dumps(response.json(), indent=4)
+    # print(pretty_data)
+    if not response.ok :
+        print ("    Error: " + json_response.get('message', str(response.status_code)))
+        task_id = 0
+    else:
+        task_id = json_response ['config']['operation_id']
+    return submitted(task_id, org_id, body['type'], resource_id)
+
+def remove_sddc(deployment_id, resource_id, org_id, session_token):
+    return update_members([], [deployment_id], resource_id, org_id, session_token)
+
+def attach_sddc(deployment_id, resource_id, org_id, session_token):
+    return update_members([deployment_id], [], resource_id, org_id, session_token)
+
+def update_group_members(changes, org_id, session_token, max_workers=None):
+    """changes is {resource_id: (add_ids, remove_ids)}: one operation per group, all waited on together."""
+    with ThreadPoolExecutor(max_workers=max_workers or settings.max_workers) as pool:
+        futures = {resource_id: pool.submit(update_members, add_ids, remove_ids, resource_id, org_id, session_token)
+                   for resource_id, (add_ids, remove_ids) in changes.items() if add_ids or remove_ids}
+    task_ids = [future.result() for future in futures.values() if future.result()]
+    if not task_ids:
+        return {}
+    return get_tasks_status(task_ids, org_id, session_token)
+
+def check_empty_group(group_id, org_id, session_token):
+    group = SddcGroup.from_json(fetch_group(group_id, org_id, session_token))
+    return not group.members
+
+def delete_sddc_group(resource_id, org_id, session_token):
+    api = get_client(org_id)
+    myURL = "{}/network/{}/aws/operations".format(api.base_url, org_id)
+    body = {
+        "type": "DELETE_DEPLOYMENT_GROUP",
+        "resource_id": resource_id,
+        "resource_type": "network-connectivity-config",
+        "config" : {
+            "type": "AwsDeleteDeploymentGroupConfig"
+        }
+    }
+    response = api.post(myURL, session_token, json=body)
+    json_response = decode(response)
+    # pretty_data = json.dumps(response.json(), indent=4)
+    # print(pretty_data)
+    if not response.ok :
+        print ("    Error: " + json_response.get('message', str(response.status_code)))
+        task_id = 0
+    else:
+        task_id = json_response ['id']
+    return submitted(task_id, org_id, body['type'], resource_id)
+
+def connect_aws_account(account, region, resource_id, org_id, session_token):
+    api = get_client(org_id)
+    myURL = "{}/network/{}/aws/operations".format(api.base_url, org_id)
+    body = {
+    "type": "ADD_EXTERNAL_ACCOUNT",
+    "resource_id": resource_id,
+    "resource_type": "network-connectivity-config",
+    "config" : {
+            "type": "AwsAddExternalAccountConfig",
+            "account" : {
+                "account_number": account,
+                "regions" : [region],
+                "auto_approval": "true"
+            }
+        }
+    }
+    response = api.post(myURL, session_token, json=body)   
+    json_response = decode(response)
+    # pretty_data = json.dumps(response.json(), indent=4)
+    # print(pretty_data)
+    if not response.ok :
+        print ("    Error: " + json_response.get('message', str(response.status_code)))
+        task_id = 0
+    else:
+        task_id = json_response ['id']
+    return submitted(task_id, org_id, body['type'], resource_id)
+
+def find_attachments(resource_id, org_id, session_token, state):
+    api = get_client(org_id)
+    myURL = "{}/network/{}/core/network-connectivity-configs/{}?trait=AwsVpcAttachmentsTrait".format(api.base_url, org_id, resource_id)
+    response = api.get(myURL, session_token)
+    json_response = decode(response)
+    # pretty_data = json.dumps(response.json(), indent=4)
+    # print(pretty_data) 
+    aws_accounts = ConnectivityConfig(json_response).aws_accounts
+    if aws_accounts is None :
+        return None
+    return {account.account_number: [att for att in account.attachments if att.state == state] for account in aws_accounts}
+
+def print_attachments(accounts, empty_message):
+    # numbered across accounts, returns [(account_number, attach_id)] in menu order
+    vpcs=[]
+    for account_number, attachments in accounts.items():
+        info("Account: " + account_number)
+        if not attachments:
+            info(empty_message)
+        for att in attachments:
+            vpcs.append((account_number, att.attach_id))
+            info(str(len(vpcs)) +": " + "VPC attachment = " + att.attach_id)
+    return vpcs
+
+def get_pending_att(resource_id, org_id, session_token):
+    accounts = find_attachments(resource_id, org_id, session_token, "PENDING_ACCEPTANCE")
+    if accounts is None:
+        info("No AWS account attached")
+        return []
+    return print_attachments(accounts, "   No VPCs Pending Acceptance")
+
+def get_available_att(resource_id, org_id, session_token):
+    accounts = find_attachments(resource_id, org_id, session_token, "AVAILABLE")
+    if accounts is None:
+        info("No AWS account attached")
+        return []
+    return print_attachments(accounts, "   No VPCs Available")
+
+def apply_attachment_actions(attachments, resource_id, org_id, account, session_token):
+    api = get_client(org_id)
+    myURL = "{}/network/{}/aws/operations".format(api.base_url, org_id)
+    body = {
+    "type": "APPLY_ATTACHMENT_ACTION",
+    "resource_id": resource_id,
+    "resource_type": "network-connectivity-config",
+    "config" : {
+            "type": "AwsApplyAttachmentActionConfig",
+            "account" : {
+                "account_number": account,
+                "attachments": attachments
+            }
+        }
+    }
+    response = api.post(myURL, session_token, json=body)  
+    json_response = decode(response)
+    # pretty_data = json.dumps(response.json(), indent=4)
+    # print(pretty_data)
+    if not response.ok :
+        print ("    Error: " + json_response.get('message', str(response.status_code)))
+        task_id = 0
+    else:
+        task_id = json_response ['id']
+    return submitted(task_id, org_id, body['type'], resource_id)
+
+def attach_vpc(att_id, resource_id, org_id, account, session_token):
+    return apply_attachment_actions([{"action": "ACCEPT", "attach_id": att_id}], resource_id, org_id, account, session_token)
+
+def detach_vpc(att_id, resource_id, org_id, account, session_token):
+    return apply_attachment_actions([{"action": "DELETE", "attach_id": att_id}], resource_id, org_id, account, session_token)
+
+def apply_attachment_batch(action, vpcs, resource_id, org_id, session_token):
+    """Apply one action to many (account, attach_id) pairs: one operation per account.
+
+    An operation takes a single account, and the group takes one operation at
+    a time: each is waited on before the next one is submitted."""
+    by_account = {}
+    for account, att_id in vpcs:
+        by_account.setdefault(account, {})[att_id] = {"action": action, "attach_id": att_id}
+    results = {}
+    for account, attachments in by_account.items():
+        task_id = apply_attachment_actions(list(attachments.values()), resource_id, org_id, account, session_token)
+        if task_id:
+            results.update(get_tasks_status([task_id], org_id, session_token))
+    return results
+
+def disconnect_aws_account(account, resource_id, org_id, session_token):
+    api = get_client(org_id)
+    myURL = "{}/network/{}/aws/operations".format(api.base_url, org_id)
+    body = {
+    "type": "REMOVE_EXTERNAL_ACCOUNT",
+    "resource_id": resource_id,
+    "resource_type": "network-connectivity-config",
+    "config" : {
+            "type": "AwsRemoveExternalAccountConfig",
+            "account" : {
+                "account_number": account
+            }
+        }
+    }
+    response = api.post(myURL, session_token, json=body)  
+    json_response = decode(response)
+    # pretty_data = json.dumps(response.json(), indent=4)
+    # print(pretty_data)
+    if not response.ok :
+        print("    Error: " + json_response.get('message', str(response.status_code)))
+        details = json_response.get('details')
+        if details and details[0].get('validation_error_message'):
+            print("    Message: " + details[0]['validation_error_message'])
+        task_id = 0
+    else:
+        task_id = json_response ['id']
+    return submitted(task_id, org_id, body['type'], resource_id)
+
+def add_vpc_prefixes(routes, att_id, resource_id, org_id, account, session_token):
+    try:
+        routes = prepare_prefixes(routes, resource_id, org_id, session_token, [att_id])
+    except PrefixError as e:
+        print("    Error: " + str(e))
+        return 0
+    return apply_attachment_actions([{"action": "UPDATE", "attach_id": att_id, "configured_prefixes": routes}], resource_id, org_id, account, session_token)
+      
+def attach_dxgw(routes, resource_id, org_id, dxgw_owner, dxgw_id, region, session_token):
+    api = get_client(org_id)
+    try:
+        routes = prepare_prefixes(routes, org_id=org_id)     # the SDDC CIDRs, which are in the route tables already
+    except PrefixError as e:
+        print("    Error: " + str(e))
+        return 0
+    myURL = "{}/network/{}/aws/operations".format(api.base_url, org_id)
+    body = {
+        "type": "ASSOCIATE_DIRECT_CONNECT_GATEWAY",
+        "resource_id": resource_id,
+        "resource_type": "network-connectivity-config",
+   	    "config" : {
+            "type": "AwsAssociateDirectConnectGatewayConfig",
+		    "direct_connect_gateway_association": {
+			    "direct_connect_gateway_id": dxgw_id,
+			    "direct_connect_gateway_owner": dxgw_owner,
+                "peering_region_configs": [
+				    {
+					"allowed_prefixes": routes,
+                    "region": region
+				    }
+			    ]
+		    }
+        }
+    }    
+    response = api.post(myURL, session_token, json=body)  
+    json_response = decode(response)
+    # pretty_data = json.dumps(response.json(), indent=4)
+    # print(pretty_data)
+    if not response.ok :
+        print ("    Error: " + json_response.get('message', str(response.status_code)))
+        task_id = 0
+    else:
+        task_id = json_response ['id']
+    return submitted(task_id, org_id, body['type'], resource_id)
+
+def detach_dxgw(resource_id, org_id, dxgw_id, session_token):
+    api = get_client(org_id)
+    myURL = "{}/network/{}/aws/operations".format(api.base_url, org_id)
+    body = {
+        "type": "DISASSOCIATE_DIRECT_CONNECT_GATEWAY",
+        "resource_id": resource_id,
+        "resource_type": "network-connectivity-config",
+   	    "config" : {
+            "type": "AwsDisassociateDirectConnectGatewayConfig",
+		    "direct_connect_gateway_association": {
+			    "direct_connect_gateway_id": dxgw_id
+		    }
+        }
+    }    
+    response = api.post(myURL, session_token, json=body)  
+    json_response = decode(response)
+    # pretty_data = json.dumps(response.json(), indent=4)
+    # print(pretty_data)
+    if not response.ok :
+        print ("    Error: " + json_response.get('message', str(response.status_code)))
+        task_id = 0
+    else:
+        task_id = json_response ['id']
+    return submitted(task_id, org_id, body['type'], resource_id)
+
+def attach_tgw(routes, resource_id, org_id, session_token, action="ADD"):
+    # action UPDATE changes the prefixes of the existing association in place
+    api = get_client(org_id)
+    try:
+        routes = prepare_prefixes(routes, resource_id, org_id, session_token, [api.settings.tgw_id], strict=False)
+    except PrefixError as e:
+        print("    Error: " + str(e))
+        return 0
+    myURL = "{}/network/{}/aws/operations".format(api.base_url, org_id)
+    body = {
+        "type": "ASSOCIATE_CUSTOMER_TRANSIT_GATEWAY",
+        "resource_id": resource_id,
+        "resource_type": "network-connectivity-config",
+   	    "config" : {
+            "type": "AwsAssociateCustomerTransitGatewayConfig",
+		    "customer_transit_gateway_association": {
+                "customer_transit_gateway_id": api.settings.tgw_id,
+                "customer_transit_gateway_owner": api.settings.tgw_owner,
+                "customer_transit_gateway_region": api.settings.tgw_region,
+                "peering_region_configs": [
+                    {
+                    "action": action,
+                    "region": api.settings.region,
+                    "configured_prefixes": routes,
+                    }
+                ]
+		    }
+        }
+    }    
+    response = api.post(myURL, session_token, json=body)  
+    json_response = decode(response)
+    # pretty_data = json.dumps(response.json(), indent=4)
+    # print(pretty_data)
+    if not response.ok :
+        print ("    Error: " + json_response.get('message', str(response.status_code)))
+        task_id = 0
+    else:
+        task_id = json_response ['id']
+    return submitted(task_id, org_id, body['type'], resource_id)
+
+def detach_tgw(resource_id, org_id, session_token):
+    api = get_client(org_id)
+    myURL = "{}/network/{}/aws/operations".format(api.base_url, org_id)
+    body = {
+        "type": "DISASSOCIATE_CUSTOMER_TRANSIT_GATEWAY",
+        "resource_id": resource_id,
+        "resource_type": "network-connectivity-config",
+        "config": {
+            "type": "AwsDisassociateCustomerTransitGatewayConfig",
+            "customer_transit_gateway_association": {
+            "customer_transit_gateway_id": api.settings.tgw_id
+            }
+        }
+    }
+    response = api.post(myURL, session_token, json=body)  
+    json_response = decode(response)
+    # pretty_data = json.dumps(response.json(), indent=4)
+    # print(pretty_data)
+    if not response.ok :
+        print ("    Error: " + json_response.get('message', str(response.status_code)))
+        task_id = 0
+    else:
+        task_id = json_response ['id']
+    return submitted(task_id, org_id, body['type'], resource_id)
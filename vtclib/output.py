@@ -0,0 +1,124 @@
+"""Rendering of reader records.
+
+Readers return records (dataclasses); the Output object renders them either
+as the usual text ("table") or as json, ndjson (one record per line, streamed
+as soon as it is read) or csv. Banners and menus go through info(), which
+moves them to stderr when stdout carries machine-readable output."""
+
+import json
+import csv
+import dataclasses
+import sys
+import threading
+
+
+OUTPUT_FORMATS = ("table", "json", "ndjson", "csv")
+
+def to_data(value):
+    if dataclasses.is_dataclass(value):
+        return {field.name: to_data(getattr(value, field.name)) for field in dataclasses.fields(value)}
+    if isinstance(value, (list, tuple)):
+        return [to_data(item) for item in value]
+    return value
+
+def csv_value(value):
+    if isinstance(value, list) and all(not isinstance(item, (dict, list)) for item in value):
+        return " ".join(str(item) for item in value)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+class Output:
+    """Renders reader records as text, json, ndjson or csv."""
+
+    def __init__(self, fmt="table", stream=None):
+        self.fmt = fmt
+        self.stream = stream or sys.stdout
+        self.local = threading.local()      # .profile, set by each thread when running several profiles
+        self.lock = threading.Lock()
+        self.rows = []                      # json/csv records of all the profiles, written by flush()
+
+    @property
+    def human(self):
+        return self.fmt == "table"
+
+    def emit(self, records, render=None):
+        # returns the number of records written
+        profile = getattr(self.local, "profile", None)
+        if profile is not None and not self.human:
+            return self.collect(profile, records)
+        n = 0
+        if self.fmt == "json":
+            data = [to_data(record) for record in records]
+            json.dump(data, self.stream, indent=2)
+            self.stream.write("\n")
+            return len(data)
+        writer = None
+        for record in records:
+            n += 1
+            if self.fmt == "ndjson":
+                self.stream.write(json.dumps(to_data(record)) + "\n")
+                self.stream.flush()
+            elif self.fmt == "csv":
+                row = {key: csv_value(value) for key, value in to_data(record).items()}
+                if writer is None:
+                    writer = csv.DictWriter(self.stream, fieldnames=list(row))
+                    writer.writeheader()
+                writer.writerow(row)
+            elif render:
+                render(record)
+            else:
+                print("  ".join("{}: {}".format(key, value) for key, value in to_data(record).items()), file=self.stream)
+        return n
+
+    def collect(self, profile, records):
+        # several profiles at once: tag every record with its profile, ndjson still streams
+        n = 0
+        for record in records:
+            row = {'profile': profile, **to_data(record)}
+            with self.lock:
+                if self.fmt == "ndjson":
+                    self.stream.write(json.dumps(row) + "\n")
+                    self.stream.flush()
+                else:
+                    self.rows.append(row)
+            n += 1
+        return n
+
+    def flush(self, profiles=()):
+        # writes what collect() kept for json and csv as one document, in the order of profiles
+        rows, self.rows = self.rows, []
+        order = {profile: n for n, profile in enumerate(profiles)}
+        rows.sort(key=lambda row: order.get(row['profile'], len(order)))
+        if self.fmt == "json":
+            json.dump(rows, self.stream, indent=2)
+            self.stream.write("\n")
+        elif self.fmt == "csv" and rows:
+            writer = csv.DictWriter(self.stream, fieldnames=list(dict.fromkeys(key for row in rows for key in row)))
+            writer.writeheader()
+            writer.writerows({key: csv_value(value) for key, value in row.items()} for row in rows)
+
+
+class ThreadStdout:
+    """Stands in for sys.stdout while several profiles run, so that each
+    thread's text output goes to its own buffer instead of interleaving."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()      # .buffer, set by each thread
+
+    def write(self, text):
+        return getattr(self.local, "buffer", self.stream).write(text)
+
+    def flush(self):
+        getattr(self.local, "buffer", self.stream).flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+out = Output()
+
+def info(*args):
+    print(*args, file=sys.stdout if out.human else sys.stderr)
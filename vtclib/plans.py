@@ -0,0 +1,219 @@
+"""Plans: several operations run as one dependency graph.
+
+A plan is a YAML/JSON file with a list of steps. Each step has an "op", an
+optional "id" and an optional "after" list of step ids it depends on, e.g.
+
+  max_workers: 4
+  steps:
+    - {id: group, op: create-group, name: prod, sddc: sddc-01}
+    - {id: members, op: update-members, group: prod, add: [sddc-02, sddc-03], after: [group]}
+    - {id: aws, op: connect-aws, group: prod, after: [group]}
+    - {op: accept-vpcs, group: prod, after: [aws]}
+
+Groups and SDDCs can be given by name or ID. Each step returns the operation
+ids it submitted; dependents only start once all of them have COMPLETED."""
+
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+try:
+    import yaml                         # optional, only needed for YAML plans
+except ImportError:
+    yaml = None
+
+from .client import get_client
+from .tasks import wait_for_tasks
+from .inventory import get_deployment_id, get_group_id, get_resource_id
+from .operations import (create_sddc_group, delete_sddc_group, update_members, connect_aws_account, disconnect_aws_account,
+                         find_attachments, apply_attachment_actions, add_vpc_prefixes, attach_dxgw, detach_dxgw, attach_tgw, detach_tgw)
+from .prefixes import PrefixError, parse_prefixes
+
+
+def plan_resource(step, org_id, session_token):
+    group_id = get_group_id(step['group'], org_id, session_token)
+    return get_resource_id(group_id, org_id, session_token)
+
+def plan_create_group(step, org_id, session_token):
+    deployment_id = get_deployment_id(step['sddc'], org_id, session_token)
+    return [create_sddc_group(step['name'], deployment_id, org_id, session_token)]
+
+def plan_delete_group(step, org_id, session_token):
+    return [delete_sddc_group(plan_resource(step, org_id, session_token), org_id, session_token)]
+
+def plan_update_members(step, org_id, session_token):
+    add_ids = [get_deployment_id(sddc, org_id, session_token) for sddc in step.get('add', [])]
+    remove_ids = [get_deployment_id(sddc, org_id, session_token) for sddc in step.get('remove', [])]
+    return [update_members(add_ids, remove_ids, plan_resource(step, org_id, session_token), org_id, session_token)]
+
+def plan_defaults(org_id):
+    # values a step leaves out come from the config of the org's client
+    return get_client(org_id).settings
+
+def plan_connect_aws(step, org_id, session_token):
+    resource_id = plan_resource(step, org_id, session_token)
+    defaults = plan_defaults(org_id)
+    return [connect_aws_account(str(step.get('account', defaults.aws_account)), step.get('region', defaults.region), resource_id, org_id, session_token)]
+
+def plan_disconnect_aws(step, org_id, session_token):
+    resource_id = plan_resource(step, org_id, session_token)
+    return [disconnect_aws_account(str(step.get('account', plan_defaults(org_id).aws_account)), resource_id, org_id, session_token)]
+
+def plan_attachments(action, state, step, org_id, session_token):
+    resource_id = plan_resource(step, org_id, session_token)
+    accounts = find_attachments(resource_id, org_id, session_token, state) or {}
+    wanted = set(step.get('vpcs', []))
+    task_ids = []
+    for account, attachments in accounts.items():
+        # "vpcs" restricts the step to some attachments, by attachment or VPC id
+        selected = [{"action": action, "attach_id": att.attach_id} for att in attachments
+                    if not wanted or att.attach_id in wanted or att.vpc_id in wanted]
+        if selected:
+            task_ids.append(apply_attachment_actions(selected, resource_id, org_id, account, session_token))
+    return task_ids
+
+def plan_accept_vpcs(step, org_id, session_token):
+    return plan_attachments("ACCEPT", "PENDING_ACCEPTANCE", step, org_id, session_token)
+
+def plan_detach_vpcs(step, org_id, session_token):
+    return plan_attachments("DELETE", "AVAILABLE", step, org_id, session_token)
+
+def plan_vpc_prefixes(step, org_id, session_token):
+    resource_id = plan_resource(step, org_id, session_token)
+    return [add_vpc_prefixes(step.get('prefixes', []), step['attachment'], resource_id, org_id, str(step.get('account', plan_defaults(org_id).aws_account)), session_token)]
+
+def plan_attach_dxgw(step, org_id, session_token):
+    resource_id = plan_resource(step, org_id, session_token)
+    defaults = plan_defaults(org_id)
+    return [attach_dxgw(step['prefixes'], resource_id, org_id, str(step.get('dxgw_owner', defaults.dxgw_owner)), step.get('dxgw_id', defaults.dxgw_id),
+                        step.get('region', defaults.region), session_token)]
+
+def plan_detach_dxgw(step, org_id, session_token):
+    resource_id = plan_resource(step, org_id, session_token)
+    return [detach_dxgw(resource_id, org_id, step.get('dxgw_id', plan_defaults(org_id).dxgw_id), session_token)]
+
+def plan_attach_tgw(step, org_id, session_token):
+    return [attach_tgw(step['prefixes'], plan_resource(step, org_id, session_token), org_id, session_token)]
+
+def plan_update_tgw(step, org_id, session_token):
+    return [attach_tgw(step['prefixes'], plan_resource(step, org_id, session_token), org_id, session_token, action="UPDATE")]
+
+def plan_detach_tgw(step, org_id, session_token):
+    return [detach_tgw(plan_resource(step, org_id, session_token), org_id, session_token)]
+
+PLAN_OPS = {
+    "create-group": plan_create_group,
+    "delete-group": plan_delete_group,
+    "update-members": plan_update_members,
+    "connect-aws": plan_connect_aws,
+    "disconnect-aws": plan_disconnect_aws,
+    "accept-vpcs": plan_accept_vpcs,
+    "detach-vpcs": plan_detach_vpcs,
+    "vpc-prefixes": plan_vpc_prefixes,
+    "attach-dxgw": plan_attach_dxgw,
+    "detach-dxgw": plan_detach_dxgw,
+    "attach-tgw": plan_attach_tgw,
+    "update-tgw": plan_update_tgw,
+    "detach-tgw": plan_detach_tgw,
+}
+
+def read_document(path):
+    # a plan or desired-state file, YAML or JSON
+    with open(path) as f:
+        if path.endswith((".yaml", ".yml")):
+            if yaml is None:
+                raise ValueError("PyYAML is needed for YAML files: pip install pyyaml")
+            return yaml.safe_load(f)
+        return json.load(f)
+
+def load_plan(path):
+    return plan_steps(read_document(path))
+
+def plan_steps(plan):
+    """Checks the steps of a plan, returns ({step id: step}, max_workers)."""
+    steps = {}
+    for n, step in enumerate(plan['steps'], 1):
+        step_id = str(step.get('id', n))
+        if step_id in steps:
+            raise ValueError("Duplicate step id '{}'".format(step_id))
+        if step.get('op') not in PLAN_OPS:
+            raise ValueError("Step '{}': unknown op '{}'".format(step_id, step.get('op')))
+        try:
+            parse_prefixes(step.get('prefixes', []))
+        except PrefixError as e:
+            raise ValueError("Step '{}': {}".format(step_id, e))
+        step['after'] = [str(dep) for dep in step.get('after', [])]
+        steps[step_id] = step
+    # reject unknown dependencies and cycles before anything is submitted
+    order = []
+    visiting = set()
+    def visit(step_id, path):
+        if step_id not in steps:
+            raise ValueError("Step '{}' depends on unknown step '{}'".format(path[-1], step_id))
+        if step_id in order:
+            return
+        if step_id in visiting:
+            raise ValueError("Dependency cycle: " + " -> ".join(path + [step_id]))
+        visiting.add(step_id)
+        for dep in steps[step_id]['after']:
+            visit(dep, path + [step_id])
+        order.append(step_id)
+    for step_id in steps:
+        visit(step_id, [])
+    return steps, plan.get('max_workers', 4)
+
+def run_plan_step(step_id, step, org_id, session_token):
+    task_ids = PLAN_OPS[step['op']](step, org_id, session_token)
+    if not all(task_ids):
+        return "FAILED"
+    results = wait_for_tasks(task_ids, org_id, session_token)
+    for task_id, json_response in results.items():
+        if json_response['state']['name'] != "COMPLETED":
+            print("    " + step_id + ": task " + task_id + " " + json_response['state']['name'])
+            return json_response['state']['name']
+    return "COMPLETED"
+
+def plan_group(step):
+    # the group a step changes, as the plan names it
+    return step.get('group', step.get('name'))
+
+def run_plan(steps, org_id, session_token, max_workers=4):
+    """Run independent steps concurrently, each step once everything in its "after" list COMPLETED.
+
+    Steps on the same group never overlap (the API doesn't take concurrent
+    operations on one group): only steps on different groups run together."""
+    state = {}
+    pending = dict(steps)
+    running = {}
+    busy = set()            # groups with a step running
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while pending or running:
+            for step_id, step in list(pending.items()):
+                deps = [state.get(dep) for dep in step['after']]
+                if any(dep not in (None, "COMPLETED") for dep in deps):
+                    state[step_id] = "SKIPPED"
+                    print("    {:<20} {:<15} SKIPPED".format(step_id, step['op']))
+                    del pending[step_id]
+                elif all(dep == "COMPLETED" for dep in deps) and plan_group(step) not in busy:
+                    busy.add(plan_group(step))
+                    print("    {:<20} {:<15} started".format(step_id, step['op']))
+                    running[pool.submit(run_plan_step, step_id, step, org_id, session_token)] = step_id
+                    del pending[step_id]
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                step_id = running.pop(future)
+                busy.discard(plan_group(steps[step_id]))
+                try:
+                    state[step_id] = future.result()
+                except Exception as e:
+                    print("    " + step_id + ": " + repr(e))
+                    state[step_id] = "FAILED"
+                print("    {:<20} {:<15} {}".format(step_id, steps[step_id]['op'], state[step_id]))
+    elapse = time.time() - start
+    minutes = elapse // 60
+    seconds = elapse - (minutes * 60)
+    print("\nFINISHED in", '{:02}min {:02}sec'.format(int(minutes), int(seconds)))
+    return state
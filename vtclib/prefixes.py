@@ -0,0 +1,130 @@
+"""Checking prefix lists before they are sent to the API.
+
+The VPC static routes (vpc-prefixes) and the allowed prefixes of a DXGW or
+external TGW association are validated, deduplicated and collapsed into the
+fewest covering networks, so that a bad list fails here instead of after a
+long operation. VPC static routes are also compared with the group's route
+tables (a route elsewhere means misrouting), external TGW prefixes only for
+warnings. DXGW allowed prefixes are not: they are normally the SDDC CIDRs
+advertised to on-prem, which are always in the route table already."""
+
+import bisect
+import ipaddress
+from dataclasses import dataclass
+
+from .client import APIError, get_client
+from .output import info
+from .routes import get_route_index
+
+
+class PrefixError(ValueError):
+    pass
+
+
+def parse_prefixes(values):
+    """CIDR strings to networks; every bad entry is reported in one PrefixError."""
+    networks = []
+    errors = []
+    for value in values:
+        try:
+            networks.append(ipaddress.ip_network(value))
+        except ValueError:
+            try:
+                network = ipaddress.ip_network(value, strict=False)
+            except ValueError:
+                errors.append("'{}' is not a CIDR".format(value))
+            else:
+                errors.append("'{}' has host bits set, did you mean {}?".format(value, network))
+    if errors:
+        raise PrefixError("; ".join(errors))
+    return networks
+
+def aggregate(networks):
+    # duplicates, contained and adjacent networks collapse into the minimal covering set, IPv4 first
+    return [network for version in (4, 6)
+            for network in ipaddress.collapse_addresses(network for network in networks if network.version == version)]
+
+
+@dataclass
+class PrefixConflict:
+    prefix: str
+    table: str
+    destination: str
+    targets: list
+    exact: bool             # same destination; otherwise one contains the other
+
+
+class RouteRanges:
+    """The CIDR routes of a RouteIndex, for overlap queries.
+
+    A route containing a prefix is found by masking the prefix at every
+    shorter length; routes inside it by bisecting the routes sorted by first
+    address (CIDR blocks are either nested or disjoint)."""
+
+    def __init__(self, index, ignore=()):
+        self.by_network = {}        # (version, network int, prefixlen) -> [(table, targets)]
+        self.starts = {4: [], 6: []}
+        self.routes = {4: [], 6: []}
+        entries = []
+        for table, by_length in index.tables.items():
+            for (version, prefixlen), networks in by_length.items():
+                for address, targets in networks.items():
+                    if set(targets) <= set(ignore):
+                        continue    # the routes of the attachment or gateway being changed
+                    self.by_network.setdefault((version, address, prefixlen), []).append((table, targets))
+                    entries.append((version, address, prefixlen, table, targets))
+        for version, address, prefixlen, table, targets in sorted(entries, key=lambda entry: entry[:3]):
+            self.starts[version].append(address)
+            self.routes[version].append((address, prefixlen, table, targets))
+
+    def conflicts(self, network):
+        bits = network.max_prefixlen
+        start = int(network.network_address)
+        found = []
+        for prefixlen in range(network.prefixlen, -1, -1):
+            supernet = start >> (bits - prefixlen) << (bits - prefixlen)
+            for table, targets in self.by_network.get((network.version, supernet, prefixlen), []):
+                destination = str(ipaddress.ip_network((supernet, prefixlen)))
+                found.append(PrefixConflict(str(network), table, destination, targets, prefixlen == network.prefixlen))
+        end = int(network.broadcast_address)
+        starts = self.starts[network.version]
+        for address, prefixlen, table, targets in self.routes[network.version][bisect.bisect_left(starts, start):bisect.bisect_right(starts, end)]:
+            if prefixlen > network.prefixlen:
+                found.append(PrefixConflict(str(network), table, str(ipaddress.ip_network((address, prefixlen))), targets, False))
+        return found
+
+def find_conflicts(networks, index, own_targets=()):
+    ranges = RouteRanges(index, own_targets)
+    return [conflict for network in networks for conflict in ranges.conflicts(network)]
+
+
+def prepare_prefixes(values, resource_id=None, org_id=None, session_token=None, own_targets=(), limit=None, strict=True):
+    """Validated, collapsed prefix list (strings) ready for the API, or PrefixError.
+
+    With a resource_id, the group's route tables are read: a prefix already
+    routed to another target is an error (a warning when not strict), an
+    overlapping one a warning. own_targets are the attachment or gateway the
+    prefixes are for."""
+    networks = parse_prefixes(values)
+    collapsed = aggregate(networks)
+    if len(collapsed) < len(networks):
+        info("    {} prefixes collapsed to {}".format(len(networks), len(collapsed)))
+    limit = get_client(org_id).settings.prefix_limit if limit is None else limit
+    if limit and len(collapsed) > limit:
+        raise PrefixError("{} prefixes, more than the limit of {} (prefix_limit)".format(len(collapsed), limit))
+    if resource_id and collapsed:
+        try:
+            index = get_route_index(resource_id, org_id, session_token)
+        except (KeyError, ValueError, APIError) as e:
+            info("    Route tables not readable, prefixes not checked against them: " + str(e))
+        else:
+            conflicts = find_conflicts(collapsed, index, own_targets)
+            exact = ["{} is already routed to {} ({})".format(conflict.prefix, ", ".join(conflict.targets), conflict.table)
+                     for conflict in conflicts if conflict.exact]
+            if exact and strict:
+                raise PrefixError("; ".join(exact))
+            for message in exact:
+                info("    Warning: " + message)
+            for conflict in (conflict for conflict in conflicts if not conflict.exact):
+                info("    Warning: {} overlaps {} via {} ({})".format(conflict.prefix, conflict.destination, ", ".join(conflict.targets), conflict.table))
+    return [str(network) for network in collapsed]
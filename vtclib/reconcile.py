@@ -0,0 +1,215 @@
+"""Desired state: SDDC Groups declared in a file and brought in line with the
+fewest operations.
+
+  max_workers: 4
+  groups:
+    - name: prod
+      sddcs: [sddc-01, sddc-02]           # the exact membership
+      aws_accounts: ["111122223333"]      # connected accounts
+      vpcs:                               # attachments to keep AVAILABLE (VPC or attachment id) and their static routes
+        vpc-0abc: [10.1.0.0/16]
+        vpc-0def: null                    # accepted, routes left alone
+      dxgw: {prefixes: [10.99.0.0/16]}    # id, owner and region default to the config; null removes the association
+      tgw: {prefixes: [10.98.0.0/16]}     # the TGW of the config; null removes the association
+
+A key that is left out is not managed. The current state is read from the
+connectivity-config traits, the differences become plan steps (see plans.py)
+and run with them: groups in parallel, the steps of a group one after the
+other, as VMC runs one operation at a time per connectivity config. A group
+already in that state costs its two reads and no write.
+
+The prefixes of the external TGW association are updated in place. Those of
+a DXGW association can only change by re-creating it, which drops the
+association while it runs: such steps are marked disruptive and refused
+unless allow_disruptive (--allow-disruptive). VPCs whose owner hasn't
+requested their attachment yet (e.g. right after connect-aws) are accepted
+on a later run."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from .client import get_client
+from .output import info
+from .inventory import get_index, get_deployment_id, get_group_info
+from .plans import read_document, plan_steps, run_plan
+from .prefixes import PrefixError, parse_prefixes, aggregate
+
+GROUP_KEYS = ("name", "sddcs", "aws_accounts", "vpcs", "dxgw", "tgw")
+
+
+def load_state(path):
+    """Reads and checks a desired-state file, returns (groups, max_workers)."""
+    state = read_document(path)
+    groups = state.get('groups') or []
+    names = set()
+    for n, group in enumerate(groups, 1):
+        if not group.get('name'):
+            raise ValueError("Group {} has no name".format(n))
+        if group['name'] in names:
+            raise ValueError("Group '{}' is declared twice".format(group['name']))
+        names.add(group['name'])
+        unknown = set(group) - set(GROUP_KEYS)
+        if unknown:
+            raise ValueError("Group '{}': unknown key(s) {}".format(group['name'], ", ".join(sorted(unknown))))
+        if isinstance(group.get('aws_accounts'), (str, int)):
+            group['aws_accounts'] = [group['aws_accounts']]
+        if 'aws_accounts' in group:
+            group['aws_accounts'] = [str(account) for account in group['aws_accounts'] or []]
+        try:
+            for prefixes in list((group.get('vpcs') or {}).values()) + [(group.get(key) or {}).get('prefixes') for key in ("dxgw", "tgw")]:
+                parse_prefixes(prefixes or [])
+        except PrefixError as e:
+            raise ValueError("Group '{}': {}".format(group['name'], e))
+    return groups, state.get('max_workers', 4)
+
+
+def same_prefixes(desired, current):
+    try:
+        return aggregate(parse_prefixes(desired)) == aggregate(parse_prefixes(current))
+    except PrefixError:
+        return sorted(desired) == sorted(current)       # e.g. prefix list IDs
+
+def read_group(name, org_id, session_token):
+    # None when the group doesn't exist yet
+    index = get_index(org_id, session_token)
+    try:
+        group = index.group(name)
+    except KeyError:
+        return None
+    return get_group_info(group['id'], index.resource_id(group['id']), org_id, session_token)
+
+def diff_group(desired, current, org_id, session_token):
+    """The plan steps that take a group from current (a GroupInfo, or None) to
+    desired, each one after the previous."""
+    name = desired['name']
+    defaults = get_client(org_id).settings
+    steps = []
+    def step(kind, op, after=(), disruptive=False, **values):
+        step_id = "{}:{}".format(name, kind)
+        steps.append({'id': step_id, 'op': op, 'group': name, 'after': list(after), **values})
+        if disruptive:
+            steps[-1]['disruptive'] = True
+        return step_id
+    created = []
+    if current is None:
+        if not desired.get('sddcs'):
+            raise ValueError("Group '{}' doesn't exist and lists no SDDC to create it with".format(name))
+        created = [step("create", "create-group", name=name, sddc=desired['sddcs'][0])]
+
+    if 'sddcs' in desired:
+        wanted = [get_deployment_id(sddc, org_id, session_token) for sddc in desired['sddcs'] or []]
+        have = [] if current is None else current.sddcs or []
+        if created:
+            have = wanted[:1]
+        add = [sddc_id for sddc_id in wanted if sddc_id not in have]
+        remove = [sddc_id for sddc_id in have if sddc_id not in wanted]
+        if add or remove:
+            step("members", "update-members", created, add=add, remove=remove)
+
+    accounts = {} if current is None else {account.account_number: account for account in current.aws_accounts or []}
+    if 'aws_accounts' in desired:
+        for account in desired['aws_accounts']:
+            if account not in accounts:
+                step("connect-" + account, "connect-aws", created, account=account)
+
+    detaching = {}
+    if 'vpcs' in desired:
+        vpcs = desired['vpcs'] or {}
+        attachments = [(account, att) for account in accounts.values() for att in account.attachments]
+        # detached: AVAILABLE attachments not listed, per account so that a disconnect can wait for them
+        for account, att in attachments:
+            if att.state == "AVAILABLE" and att.vpc_id not in vpcs and att.attach_id not in vpcs:
+                detaching.setdefault(account.account_number, []).append(att.attach_id)
+        for account, attach_ids in detaching.items():
+            detaching[account] = step("detach-vpcs-" + account, "detach-vpcs", vpcs=attach_ids)
+        found = {}
+        for account, att in attachments:
+            found[att.vpc_id] = found[att.attach_id] = (account, att)
+        accept = [key for key in vpcs if key in found and found[key][1].state == "PENDING_ACCEPTANCE"]
+        accepting = [step("accept-vpcs", "accept-vpcs", vpcs=accept)] if accept else []
+        for key, prefixes in vpcs.items():
+            if key not in found:
+                info("    {}: {} isn't attached yet, it is accepted on a later run".format(name, key))
+                continue
+            if prefixes is None:
+                continue
+            account, att = found[key]
+            if not same_prefixes(prefixes, att.prefixes):
+                step("prefixes-" + att.attach_id, "vpc-prefixes", accepting if att.state != "AVAILABLE" else [],
+                     attachment=att.attach_id, account=account.account_number, prefixes=list(prefixes))
+
+    if 'aws_accounts' in desired:
+        for account in accounts:
+            if account not in desired['aws_accounts']:
+                step("disconnect-" + account, "disconnect-aws", [detaching[account]] if account in detaching else [], account=account)
+
+    if 'dxgw' in desired:
+        dxgw = desired['dxgw']
+        dxgw_id = dxgw and dxgw.get('id', defaults.dxgw_id)
+        have = [] if current is None else current.dxgws or []
+        keep = [assoc for assoc in have if dxgw and assoc.id == dxgw_id and same_prefixes(dxgw.get('prefixes') or [], assoc.prefixes)]
+        # new prefixes for the same gateway: no update in the API, the association is re-created
+        recreate = bool(dxgw) and not keep and any(assoc.id == dxgw_id for assoc in have)
+        detached = [step("detach-dxgw-" + assoc.id, "detach-dxgw", disruptive=recreate and assoc.id == dxgw_id, dxgw_id=assoc.id)
+                    for assoc in have if assoc not in keep]
+        if dxgw and not keep:
+            step("attach-dxgw", "attach-dxgw", created + detached, disruptive=recreate, dxgw_id=dxgw_id, prefixes=list(dxgw.get('prefixes') or []),
+                 dxgw_owner=str(dxgw.get('owner', defaults.dxgw_owner)), region=dxgw.get('region', defaults.region))
+
+    if 'tgw' in desired:
+        tgw = desired['tgw']
+        have = [] if current is None else current.customer_tgws or []
+        for assoc in have:
+            if assoc.id != defaults.tgw_id:
+                info("    {}: external TGW {} isn't the one of the config ({}), left alone".format(name, assoc.id, defaults.tgw_id))
+        have = [assoc for assoc in have if assoc.id == defaults.tgw_id]
+        if not tgw:
+            if have:
+                step("detach-tgw", "detach-tgw")
+        elif not have:
+            step("attach-tgw", "attach-tgw", created, prefixes=list(tgw.get('prefixes') or []))
+        elif not same_prefixes(tgw.get('prefixes') or [], have[0].prefixes):
+            step("update-tgw", "update-tgw", prefixes=list(tgw.get('prefixes') or []))
+
+    # one operation at a time per connectivity config: every step waits for the one before
+    for previous, following in zip(steps, steps[1:]):
+        if previous['id'] not in following['after']:
+            following['after'].append(previous['id'])
+    return steps
+
+
+def reconcile_steps(groups, org_id, session_token, max_workers=4):
+    """Reads every declared group concurrently, returns {group name: [steps]}."""
+    get_index(org_id, session_token).refresh()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        current = [pool.submit(read_group, group['name'], org_id, session_token) for group in groups]
+        return {group['name']: diff_group(group, state.result(), org_id, session_token) for group, state in zip(groups, current)}
+
+def step_summary(step):
+    values = ["{}={}".format(key, ",".join(value) if isinstance(value, list) else value)
+              for key, value in step.items() if key not in ("id", "op", "group", "after", "disruptive") and value not in (None, [], "")]
+    if step.get('disruptive'):
+        values.append("(disruptive: the association is down until it is re-created)")
+    return " ".join(values)
+
+def reconcile(path, org_id, session_token, dry_run=False, allow_disruptive=False):
+    """Brings the groups of a desired-state file in line, returns {step id: final state}.
+
+    Steps that re-create an association are refused (ValueError) unless allow_disruptive."""
+    groups, max_workers = load_state(path)
+    changes = reconcile_steps(groups, org_id, session_token, max_workers)
+    steps = []
+    for name, group_steps in changes.items():
+        if not group_steps:
+            print("    {:<20} in sync".format(name))
+        for step in group_steps:
+            print("    {:<20} {:<15} {}".format(step['id'], step['op'], step_summary(step)))
+        steps += group_steps
+    if dry_run or not steps:
+        return {}
+    disruptive = [step['id'] for step in steps if step.get('disruptive')]
+    if disruptive and not allow_disruptive:
+        raise ValueError("{} re-create an association, which is down while they run: give --allow-disruptive to apply them".format(
+            ", ".join(disruptive)))
+    print()
+    steps, _ = plan_steps({'steps': steps})
+    return run_plan(steps, org_id, session_token, max_workers)
@@ -0,0 +1,236 @@
+"""Route tables of an SDDC Group: longest-prefix-match lookups and change watching."""
+
+import time
+import hashlib
+import ipaddress
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+
+from requests.exceptions import RequestException
+
+from .config import settings
+from .client import decode, get_client
+from .output import out, info
+from .models import Route
+from .inventory import iter_pages
+from .store import get_store
+
+
+class RouteIndex:
+    """Routes per table, keyed by prefix, with longest-prefix-match lookups."""
+
+    def __init__(self):
+        self.tables = {}        # table name -> {(version, prefixlen): {network int: [targets]}}
+        self.other = {}         # table name -> {destination: [targets]} for non-CIDR destinations (prefix lists)
+
+    def add(self, table, destination, target):
+        try:
+            network = ipaddress.ip_network(destination, strict=False)
+        except ValueError:
+            self.other.setdefault(table, {}).setdefault(destination, []).append(target)
+            return
+        by_length = self.tables.setdefault(table, {})
+        by_length.setdefault((network.version, network.prefixlen), {}).setdefault(int(network.network_address), []).append(target)
+
+    def routes(self, table):
+        for (version, prefixlen), networks in sorted(self.tables.get(table, {}).items()):
+            for address, targets in sorted(networks.items()):
+                yield self.prefix(version, address, prefixlen), targets
+        for destination, targets in self.other.get(table, {}).items():
+            yield destination, targets
+
+    def lookup(self, address):
+        # longest match in every table: [(table, prefix, targets)]
+        address = ipaddress.ip_address(address)
+        bits = address.max_prefixlen
+        matches = []
+        for table, by_length in self.tables.items():
+            for prefixlen in range(bits, -1, -1):
+                networks = by_length.get((address.version, prefixlen))
+                if not networks:
+                    continue
+                network = int(address) >> (bits - prefixlen) << (bits - prefixlen)
+                if network in networks:
+                    matches.append((table, self.prefix(address.version, network, prefixlen), networks[network]))
+                    break
+        return matches
+
+    def by_target(self, target):
+        tables = dict.fromkeys(list(self.tables) + list(self.other))
+        return [(table, prefix, targets) for table in tables for prefix, targets in self.routes(table) if target in targets]
+
+    @staticmethod
+    def prefix(version, address, prefixlen):
+        return "{}/{}".format(ipaddress.IPv4Address(address) if version == 4 else ipaddress.IPv6Address(address), prefixlen)
+
+
+def fetch_routes(resource_id, table_id, org_id, session_token):
+    api = get_client(org_id)
+    myURL = "{}/network/{}/core/network-connectivity-configs/{}/route-tables/{}/routes".format(api.base_url, org_id, resource_id, table_id)
+    return list(iter_pages(myURL, session_token, cached=False, org_id=org_id))
+
+def get_route_index(resource_id, org_id, session_token, max_workers=None):
+    api = get_client(org_id)
+    myURL = "{}/network/{}/core/network-connectivity-configs/{}/route-tables".format(api.base_url, org_id, resource_id)
+    tables = list(iter_pages(myURL, session_token, cached=False, org_id=org_id))
+    index = RouteIndex()
+    with ThreadPoolExecutor(max_workers=max_workers or settings.max_workers) as pool:
+        routes = [(table, pool.submit(fetch_routes, resource_id, table['id'], org_id, session_token)) for table in tables]
+    for table, future in routes:
+        name = table.get('name') or table['id']
+        index.tables.setdefault(name, {})
+        for route in future.result():
+            index.add(name, route['destination'], route['target']['id'])
+    store = get_store()
+    if store:
+        store.save_routes(org_id, resource_id, index)
+    return index
+
+def route_records(index, address=None, target=None):
+    if address:
+        for table, prefix, targets in index.lookup(address):
+            yield Route(table, prefix, targets)
+    elif target:
+        for table, prefix, targets in index.by_target(target):
+            yield Route(table, prefix, targets)
+    else:
+        for table in index.tables:
+            for prefix, targets in index.routes(table):
+                yield Route(table, prefix, targets)
+
+def route_printer():
+    # prints a table header whenever the table changes
+    current = [None]
+    def render(record):
+        if record.table != current[0]:
+            current[0] = record.table
+            print("     Route table: " + record.table)
+        print("\tDestination: " + record.destination + "\t\tTarget: " + ", ".join(record.targets))
+    return render
+
+def print_route_index(index, address=None, target=None):
+    if not index.tables:
+        info("    Routing Tables empty")
+    elif not out.emit(route_records(index, address, target), route_printer()) and address:
+        info("    No route to " + address)
+
+def get_route_tables(resource_id, org_id, session_token, address=None, target=None):
+    index = get_route_index(resource_id, org_id, session_token)
+    print_route_index(index, address, target)
+    return index
+
+class RouteWatcher:
+    """Polls the route tables and reports only what changed since the previous poll.
+
+    Every page is hashed as raw bytes; a page whose digest matches the last poll
+    reuses its previously parsed routes, so unchanged tables are neither parsed
+    nor diffed. A table that can't be read (error answer, or the request
+    failed) is skipped for that poll and keeps its previous routes."""
+
+    def __init__(self, resource_id, org_id, session_token):
+        self.resource_id = resource_id
+        self.org_id = org_id
+        self.session_token = session_token
+        self.pages = {}         # (table id, page) -> (digest, last, {destination: targets})
+        self.digests = {}       # table id -> digest of all its pages
+        self.routes = {}        # table name -> {destination: targets}
+
+    def fetch_table(self, table_id):
+        # (digest, routes), None when a page came back with an error
+        api = get_client(self.org_id)
+        myURL = "{}/network/{}/core/network-connectivity-configs/{}/route-tables/{}/routes".format(api.base_url, self.org_id, self.resource_id, table_id)
+        table_digest = hashlib.sha256()
+        routes = {}
+        page = 0
+        while True:
+            response = api.get("{}?page={}&size={}".format(myURL, page, settings.page_size), self.session_token)
+            if not response.ok:
+                return None
+            digest = hashlib.sha256(response.content).hexdigest()
+            table_digest.update(digest.encode())
+            known = self.pages.get((table_id, page))
+            if not known or known[0] != digest:
+                json_response = decode(response)
+                page_routes = {}
+                for route in json_response['content']:
+                    page_routes.setdefault(route['destination'], []).append(route['target']['id'])
+                last = json_response.get('last', page + 1 >= json_response.get('total_pages', 1)) or not json_response['content']
+                known = (digest, last, {destination: tuple(sorted(targets)) for destination, targets in page_routes.items()})
+                self.pages[(table_id, page)] = known
+            routes.update(known[2])
+            if known[1]:
+                return table_digest.hexdigest(), routes
+            page += 1
+
+    def poll(self):
+        """Returns [(table, change, destination, old targets, new targets)], change is one of + - ~"""
+        api = get_client(self.org_id)
+        myURL = "{}/network/{}/core/network-connectivity-configs/{}/route-tables".format(api.base_url, self.org_id, self.resource_id)
+        try:
+            tables = list(iter_pages(myURL, self.session_token, cached=False, org_id=self.org_id))
+        except RequestException as e:
+            info("     Route tables not readable, trying again next poll: " + str(e))
+            return []
+        with ThreadPoolExecutor(max_workers=settings.max_workers) as pool:
+            fetched = [(table, pool.submit(self.fetch_table, table['id'])) for table in tables]
+        changes = []
+        names = set()
+        for table, future in fetched:
+            name = table.get('name') or table['id']
+            names.add(name)
+            try:
+                result = future.result()
+            except RequestException:
+                result = None
+            if result is None:
+                continue        # e.g. a 5xx or 429 page: the previous digest and routes stand
+            digest, routes = result
+            if self.digests.get(table['id']) == digest:
+                continue
+            self.digests[table['id']] = digest
+            old = self.routes.get(name, {})
+            for destination in routes.keys() - old.keys():
+                changes.append((name, "+", destination, (), routes[destination]))
+            for destination in old.keys() - routes.keys():
+                changes.append((name, "-", destination, old[destination], ()))
+            for destination in routes.keys() & old.keys():
+                if routes[destination] != old[destination]:
+                    changes.append((name, "~", destination, old[destination], routes[destination]))
+            self.routes[name] = routes
+        for name in set(self.routes) - names:
+            changes.extend((name, "-", destination, targets, ()) for destination, targets in self.routes.pop(name).items())
+        return changes
+
+@dataclass
+class RouteChange:
+    time: str
+    change: str             # + added, - removed, ~ targets changed
+    table: str
+    destination: str
+    old: list
+    new: list
+
+def print_route_change(record):
+    line = record.time + " " + record.change + " " + record.table + ": " + record.destination
+    if record.change == "+":
+        line += " -> " + ", ".join(record.new)
+    elif record.change == "-":
+        line += " (was " + ", ".join(record.old) + ")"
+    else:
+        line += " -> " + ", ".join(record.new) + " (was " + ", ".join(record.old) + ")"
+    print(line, flush=True)
+
+def watch_routes(resource_id, org_id, session_token, interval=30):
+    watcher = RouteWatcher(resource_id, org_id, session_token)
+    watcher.poll()
+    for name, routes in watcher.routes.items():
+        info("     " + name + ": " + str(len(routes)) + " routes")
+    info("     Watching for changes every " + str(interval) + "s, Ctrl-C to stop")
+    try:
+        while True:
+            time.sleep(interval)
+            now = time.strftime("%Y-%m-%dT%H:%M:%S")
+            for name, change, destination, old, new in watcher.poll():
+                yield RouteChange(now, change, name, destination, list(old), list(new))
+    except KeyboardInterrupt:
+        info()
@@ -0,0 +1,283 @@
+"""Local SQLite store of what the tool has read and submitted.
+
+The latest snapshot of the listings, of every group's connectivity config
+(members, AWS accounts and VPC attachments, TGW/DXGW associations) and of
+its route tables is kept, along with every operation waited on and its last
+known state. Readers can then answer offline with --offline. Enabled with
+state_db in config.ini."""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from dataclasses import dataclass
+
+from .config import settings
+from .models import VpcAttachment, AwsAccount, TransitGateway, DxgwAssociation, TgwAssociation
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sddcs (
+    org_id TEXT, id TEXT, name TEXT, position INTEGER, fetched_at REAL,
+    PRIMARY KEY (org_id, id));
+CREATE INDEX IF NOT EXISTS sddcs_name ON sddcs (org_id, name);
+
+CREATE TABLE IF NOT EXISTS groups (
+    org_id TEXT, id TEXT, name TEXT, position INTEGER, resource_id TEXT, creator TEXT, created TEXT, fetched_at REAL,
+    PRIMARY KEY (org_id, id));
+CREATE INDEX IF NOT EXISTS groups_name ON groups (org_id, name);
+CREATE INDEX IF NOT EXISTS groups_resource ON groups (org_id, resource_id);
+
+CREATE TABLE IF NOT EXISTS snapshots (
+    org_id TEXT, group_id TEXT, sections TEXT, fetched_at REAL,
+    PRIMARY KEY (org_id, group_id));
+
+CREATE TABLE IF NOT EXISTS members (
+    org_id TEXT, group_id TEXT, sddc_id TEXT, position INTEGER);
+CREATE INDEX IF NOT EXISTS members_group ON members (org_id, group_id);
+
+CREATE TABLE IF NOT EXISTS transit_gateways (
+    org_id TEXT, group_id TEXT, id TEXT, region TEXT, position INTEGER);
+CREATE INDEX IF NOT EXISTS transit_gateways_group ON transit_gateways (org_id, group_id);
+
+CREATE TABLE IF NOT EXISTS accounts (
+    org_id TEXT, group_id TEXT, account_number TEXT, resource_share_name TEXT, state TEXT, position INTEGER);
+CREATE INDEX IF NOT EXISTS accounts_group ON accounts (org_id, group_id);
+
+CREATE TABLE IF NOT EXISTS attachments (
+    org_id TEXT, group_id TEXT, account_number TEXT, vpc_id TEXT, state TEXT, attach_id TEXT, prefixes TEXT, position INTEGER);
+CREATE INDEX IF NOT EXISTS attachments_group ON attachments (org_id, group_id);
+CREATE INDEX IF NOT EXISTS attachments_id ON attachments (attach_id);
+
+CREATE TABLE IF NOT EXISTS associations (
+    org_id TEXT, group_id TEXT, kind TEXT, id TEXT, owner TEXT, state TEXT, region TEXT, prefixes TEXT, position INTEGER);
+CREATE INDEX IF NOT EXISTS associations_group ON associations (org_id, group_id);
+
+CREATE TABLE IF NOT EXISTS routes (
+    org_id TEXT, resource_id TEXT, route_table TEXT, destination TEXT, targets TEXT, position INTEGER, fetched_at REAL);
+CREATE INDEX IF NOT EXISTS routes_resource ON routes (org_id, resource_id);
+
+CREATE TABLE IF NOT EXISTS operations (
+    org_id TEXT, id TEXT PRIMARY KEY, type TEXT, resource_id TEXT, state TEXT, error TEXT,
+    submitted_at REAL, updated_at REAL);
+CREATE INDEX IF NOT EXISTS operations_org ON operations (org_id, submitted_at);
+CREATE INDEX IF NOT EXISTS operations_resource ON operations (org_id, resource_id);
+"""
+
+# GroupInfo fields kept in the snapshot tables; a snapshot remembers which of them it has
+SNAPSHOT_SECTIONS = ("sddcs", "tgws", "aws_accounts", "dxgws", "customer_tgws")
+
+
+@dataclass
+class OperationRecord:
+    __slots__ = ("id", "type", "resource_id", "state", "error", "submitted", "updated")
+    id: str
+    type: str
+    resource_id: str
+    state: str
+    error: str
+    submitted: str
+    updated: str
+
+
+def timestamp(seconds):
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(seconds)) if seconds else ""
+
+
+class Store:
+    """One SQLite database, shared by every thread (writes are serialized)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+    def query(self, sql, *params):
+        with self.lock:
+            return self.db.execute(sql, params).fetchall()
+
+    # ---- inventory listings
+
+    def save_listing(self, table, org_id, items):
+        # the listing replaces the previous one, but the resource IDs learnt for groups are kept
+        now = time.time()
+        with self.lock, self.db:
+            ids = [item['id'] for item in items]
+            self.db.execute("DELETE FROM {} WHERE org_id = ? AND id NOT IN ({})".format(table, ",".join("?" * len(ids))), (org_id, *ids))
+            for position, item in enumerate(items):
+                self.db.execute("INSERT INTO {} (org_id, id, name, position, fetched_at) VALUES (?, ?, ?, ?, ?) "
+                                "ON CONFLICT (org_id, id) DO UPDATE SET name = excluded.name, position = excluded.position, "
+                                "fetched_at = excluded.fetched_at".format(table), (org_id, item['id'], item['name'], position, now))
+
+    def save_inventory(self, org_id, sddcs, groups):
+        self.save_listing("sddcs", org_id, sddcs)
+        self.save_listing("groups", org_id, groups)
+
+    def listing(self, table, org_id):
+        # [(position, name, id)] in listing order
+        return self.query("SELECT position, name, id FROM {} WHERE org_id = ? ORDER BY position".format(table), org_id)
+
+    def find(self, table, org_id, key):
+        # same matching as InventoryIndex.find: ID, then name, then menu number
+        key = str(key).strip()
+        for column, value in (("id", key), ("name", key), ("position", int(key) - 1 if key.isdigit() else None)):
+            rows = self.query("SELECT id FROM {} WHERE org_id = ? AND {} = ? ORDER BY position".format(table, column), org_id, value)
+            if rows:
+                return rows[0][0]
+        raise KeyError("No {} matching '{}' in the local store".format("SDDC" if table == "sddcs" else "SDDC Group", key))
+
+    def save_resource_id(self, org_id, group_id, resource_id):
+        with self.lock, self.db:
+            self.db.execute("INSERT INTO groups (org_id, id, resource_id) VALUES (?, ?, ?) "
+                            "ON CONFLICT (org_id, id) DO UPDATE SET resource_id = excluded.resource_id", (org_id, group_id, resource_id))
+
+    def resource_id(self, org_id, group_id):
+        rows = self.query("SELECT resource_id FROM groups WHERE org_id = ? AND id = ?", org_id, group_id)
+        return rows[0][0] if rows else None
+
+    # ---- group snapshots
+
+    def save_group_info(self, record):
+        """Stores a GroupInfo. Sections it doesn't have (None) keep their previous snapshot."""
+        org_id, group_id = record.org_id, record.id
+        sections = [name for name in SNAPSHOT_SECTIONS if getattr(record, name) is not None]
+        now = time.time()
+        with self.lock, self.db:
+            rows = self.db.execute("SELECT sections FROM snapshots WHERE org_id = ? AND group_id = ?", (org_id, group_id)).fetchall()
+            known = json.loads(rows[0][0]) if rows else []
+            self.db.execute("INSERT INTO groups (org_id, id, name, creator, created, fetched_at) VALUES (?, ?, ?, ?, ?, ?) "
+                            "ON CONFLICT (org_id, id) DO UPDATE SET name = excluded.name, creator = excluded.creator, "
+                            "created = excluded.created, fetched_at = excluded.fetched_at",
+                            (org_id, group_id, record.name, record.creator, record.created, now))
+            self.db.execute("INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?)",
+                            (org_id, group_id, json.dumps(list(dict.fromkeys(known + sections))), now))
+            if record.sddcs is not None:
+                self.db.execute("DELETE FROM members WHERE org_id = ? AND group_id = ?", (org_id, group_id))
+                self.db.executemany("INSERT INTO members VALUES (?, ?, ?, ?)",
+                                    [(org_id, group_id, sddc_id, n) for n, sddc_id in enumerate(record.sddcs)])
+            if record.tgws is not None:
+                self.db.execute("DELETE FROM transit_gateways WHERE org_id = ? AND group_id = ?", (org_id, group_id))
+                self.db.executemany("INSERT INTO transit_gateways VALUES (?, ?, ?, ?, ?)",
+                                    [(org_id, group_id, tgw.id, tgw.region, n) for n, tgw in enumerate(record.tgws)])
+            if record.aws_accounts is not None:
+                self.db.execute("DELETE FROM accounts WHERE org_id = ? AND group_id = ?", (org_id, group_id))
+                self.db.execute("DELETE FROM attachments WHERE org_id = ? AND group_id = ?", (org_id, group_id))
+                for n, account in enumerate(record.aws_accounts):
+                    self.db.execute("INSERT INTO accounts VALUES (?, ?, ?, ?, ?, ?)",
+                                    (org_id, group_id, account.account_number, account.resource_share_name, account.state, n))
+                    self.db.executemany("INSERT INTO attachments VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                        [(org_id, group_id, account.account_number, att.vpc_id, att.state, att.attach_id,
+                                          json.dumps(att.prefixes), m) for m, att in enumerate(account.attachments)])
+            for kind, associations in (("dxgw", record.dxgws), ("tgw", record.customer_tgws)):
+                if associations is None:
+                    continue
+                self.db.execute("DELETE FROM associations WHERE org_id = ? AND group_id = ? AND kind = ?", (org_id, group_id, kind))
+                self.db.executemany("INSERT INTO associations VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                    [(org_id, group_id, kind, assoc.id, assoc.owner, getattr(assoc, "state", ""),
+                                      getattr(assoc, "region", ""), json.dumps(assoc.prefixes), n) for n, assoc in enumerate(associations)])
+
+    def group_info(self, org_id, group_id):
+        """Rebuilds the GroupInfo of the last snapshot, None if the group was never read."""
+        from .inventory import GroupInfo        # inventory saves through this module
+        rows = self.query("SELECT g.name, g.creator, g.created, s.sections FROM groups g JOIN snapshots s "
+                          "ON s.org_id = g.org_id AND s.group_id = g.id WHERE g.org_id = ? AND g.id = ?", org_id, group_id)
+        if not rows:
+            return None
+        name, creator, created, sections = rows[0]
+        sections = json.loads(sections)
+        where = (org_id, group_id)
+        sddcs = tgws = accounts = dxgws = customer_tgws = None
+        if "sddcs" in sections:
+            sddcs = [row[0] for row in self.query("SELECT sddc_id FROM members WHERE org_id = ? AND group_id = ? ORDER BY position", *where)]
+        if "tgws" in sections:
+            tgws = [TransitGateway(*row) for row in
+                    self.query("SELECT id, region FROM transit_gateways WHERE org_id = ? AND group_id = ? ORDER BY position", *where)]
+        if "aws_accounts" in sections:
+            attachments = {}
+            for account_number, vpc_id, state, attach_id, prefixes in self.query(
+                    "SELECT account_number, vpc_id, state, attach_id, prefixes FROM attachments "
+                    "WHERE org_id = ? AND group_id = ? ORDER BY position", *where):
+                attachments.setdefault(account_number, []).append(VpcAttachment(vpc_id, state, attach_id, json.loads(prefixes)))
+            accounts = [AwsAccount(number, share, state, attachments.get(number, [])) for number, share, state in
+                        self.query("SELECT account_number, resource_share_name, state FROM accounts "
+                                   "WHERE org_id = ? AND group_id = ? ORDER BY position", *where)]
+        associations = self.query("SELECT kind, id, owner, state, region, prefixes FROM associations "
+                                  "WHERE org_id = ? AND group_id = ? ORDER BY position", *where)
+        if "dxgws" in sections:
+            dxgws = [DxgwAssociation(id, owner, state, json.loads(prefixes))
+                     for kind, id, owner, state, region, prefixes in associations if kind == "dxgw"]
+        if "customer_tgws" in sections:
+            customer_tgws = [TgwAssociation(id, owner, region, json.loads(prefixes))
+                             for kind, id, owner, state, region, prefixes in associations if kind == "tgw"]
+        return GroupInfo(org_id, name, group_id, creator, created, sddcs, tgws, accounts, dxgws, customer_tgws)
+
+    # ---- routes
+
+    def save_routes(self, org_id, resource_id, index):
+        now = time.time()
+        rows = [(org_id, resource_id, table, prefix, json.dumps(targets), n, now)
+                for table in index.tables for n, (prefix, targets) in enumerate(index.routes(table))]
+        with self.lock, self.db:
+            self.db.execute("DELETE FROM routes WHERE org_id = ? AND resource_id = ?", (org_id, resource_id))
+            self.db.executemany("INSERT INTO routes VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def route_index(self, org_id, resource_id):
+        from .routes import RouteIndex          # routes saves through this module
+        index = RouteIndex()
+        for table, destination, targets in self.query("SELECT route_table, destination, targets FROM routes "
+                                                      "WHERE org_id = ? AND resource_id = ? ORDER BY rowid", org_id, resource_id):
+            index.tables.setdefault(table, {})
+            for target in json.loads(targets):
+                index.add(table, destination, target)
+        return index
+
+    # ---- operations
+
+    def add_operations(self, org_id, task_ids):
+        now = time.time()
+        with self.lock, self.db:
+            self.db.executemany("INSERT OR IGNORE INTO operations (org_id, id, state, submitted_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                                [(org_id, task_id, "SUBMITTED", now, now) for task_id in task_ids])
+
+    def update_operations(self, org_id, operations):
+        # operations is {task_id: last operation json}, as returned by wait_for_tasks
+        now = time.time()
+        with self.lock, self.db:
+            for task_id, operation in operations.items():
+                state = operation.get('state') or {}
+                self.db.execute("UPDATE operations SET type = ?, resource_id = ?, state = ?, error = ?, updated_at = ? "
+                                "WHERE org_id = ? AND id = ?",
+                                (operation.get('type', ""), operation.get('resource_id', ""), state.get('name', ""),
+                                 state.get('error_msg') or "", now, org_id, task_id))
+
+    def operations(self, org_id, limit=100):
+        rows = self.query("SELECT id, type, resource_id, state, error, submitted_at, updated_at FROM operations "
+                          "WHERE org_id = ? ORDER BY submitted_at DESC LIMIT ?", org_id, limit)
+        return [OperationRecord(id, type or "", resource_id or "", state, error or "", timestamp(submitted), timestamp(updated))
+                for id, type, resource_id, state, error, submitted, updated in rows]
+
+
+stores = {}
+stores_lock = threading.Lock()
+
+def get_store(path=None):
+    """The store at path (default: state_db from the config), None when not configured."""
+    path = os.path.expanduser(path or settings.state_db)
+    if not path:
+        return None
+    with stores_lock:
+        if path not in stores:
+            stores[path] = Store(path)
+        return stores[path]
+
+
+def print_operation(record):
+    print("    " + record.id + "  " + record.state.ljust(11) + " " + record.submitted + "  " + record.type + " " + record.resource_id)
+    if record.error:
+        print("        error: " + record.error)
@@ -0,0 +1,151 @@
+"""Waiting on VMC operations (tasks)."""
+
+import time
+import sys
+import heapq
+import random
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .config import settings
+from .client import decode, get_client, retry_after_seconds, CircuitOpenError
+from .store import get_store
+from .metrics import metrics
+from .journal import get_journal
+
+
+TASK_DONE_STATES = ("COMPLETED", "FAILED", "CANCELED")
+# answers to a poll that won't change by polling again: unknown or expired task ID, no access to it
+POLL_FINAL_STATUSES = (401, 403, 404)
+
+
+def next_poll_delay(delay, retry_after=None):
+    # exponential backoff with jitter, unless the server told us how long to wait
+    if retry_after:
+        return retry_after, delay
+    delay = min(delay * 2, settings.poll_max)
+    return delay / 2 + random.uniform(0, delay / 2), delay
+
+def get_operation(task_id, org_id, session_token):
+    api = get_client(org_id)
+    myURL = "{}/operation/{}/core/operations/{}".format(api.base_url, org_id, task_id)
+    return api.get(myURL, session_token)
+
+def poll_error(task_id, error_code, error_msg):
+    # an operation that can't be polled, in the shape of a FAILED one
+    return {'id': task_id, 'state': {'name': "FAILED", 'error_msg': error_msg, 'error_code': error_code,
+                                     'name_message': {'message_key': ""}}}
+
+def wait_for_tasks(task_ids, org_id, session_token, max_workers=None, timeout=None, progress=False):
+    """Poll many operations from one loop, returns {task_id: last operation json}.
+
+    A poll answered with 401, 403 or 404 ends the wait for that task only: it
+    gets a FAILED result carrying the error, and stays in flight in the journal.
+    A poll that raised (connection error after the retries, open circuit) is
+    tried again later, after the breaker cooldown when the circuit is open."""
+    api = get_client(org_id)
+    store = get_store()
+    if store:
+        store.add_operations(org_id, task_ids)
+    journal = get_journal()
+    results = {}
+    poll_counts = {}
+    start = time.time()
+    schedule = [(start, task_id, settings.poll_initial / 2) for task_id in dict.fromkeys(task_ids)]
+    heapq.heapify(schedule)
+    with ThreadPoolExecutor(max_workers=max_workers or settings.max_workers) as pool:
+        while schedule:
+            wait = schedule[0][0] - time.time()
+            if wait > 0:
+                time.sleep(wait)
+            elapse = time.time() - start
+            if timeout and elapse >= timeout:
+                break
+            due = []
+            while schedule and schedule[0][0] <= time.time():
+                due.append(heapq.heappop(schedule))
+            polls = {pool.submit(get_operation, task_id, org_id, session_token): (task_id, delay) for _, task_id, delay in due}
+            for future in as_completed(polls):
+                task_id, delay = polls[future]
+                poll_counts[task_id] = poll_counts.get(task_id, 0) + 1
+                try:
+                    response = future.result()
+                except Exception as e:     # e.g. CircuitOpenError, or a connection error after the retries
+                    # says nothing about the operation, which may well complete
+                    sleep, delay = next_poll_delay(delay, api.settings.breaker_cooldown if isinstance(e, CircuitOpenError) else None)
+                    heapq.heappush(schedule, (time.time() + sleep, task_id, delay))
+                    continue
+                if response.status_code in POLL_FINAL_STATUSES:
+                    results[task_id] = poll_error(task_id, "HTTP {}".format(response.status_code), decode(response).get('message', response.reason))
+                    metrics.record_call("wait", "operation", "operation", response.status_code, start, poll_counts[task_id])
+                    continue
+                if response.ok:
+                    results[task_id] = decode(response)
+                    if results[task_id]['state']['name'] in TASK_DONE_STATES:
+                        metrics.record_call("wait", results[task_id].get('type') or "operation", "operation",
+                                            results[task_id]['state']['name'], start, poll_counts[task_id])
+                        if journal:
+                            journal.finished(org_id, task_id, results[task_id]['state']['name'])
+                        if api.cache:
+                            api.cache.invalidate()      # the operation may have changed the inventory
+                        continue
+                sleep, delay = next_poll_delay(delay, retry_after_seconds(response))
+                heapq.heappush(schedule, (time.time() + sleep, task_id, delay))
+            if progress:
+                sys.stdout.write(".")
+                sys.stdout.flush()
+    results = {task_id: results[task_id] for task_id in task_ids if task_id in results}
+    if store:
+        store.update_operations(org_id, results)
+    return results
+
+def print_task_result(json_response):
+    if json_response['state']['name'] == "FAILED":
+        print("\nTask FAILED ")
+        print("error message: " + json_response['state']['error_msg'])
+        print("error code: " + json_response['state']['error_code'])
+        print("message key: " + json_response['state']['name_message']['message_key'])
+
+def get_task_status(task_id, org_id, session_token):
+    start = time.time()
+    json_response = wait_for_tasks([task_id], org_id, session_token, progress=True)[task_id]
+    print_task_result(json_response)
+    elapse = time.time() - start
+    minutes = elapse // 60
+    seconds = elapse - (minutes * 60)
+    print("\nFINISHED in", '{:02}min {:02}sec'.format(int(minutes), int(seconds)))
+    return json_response['state']['name']
+
+def get_tasks_status(task_ids, org_id, session_token):
+    start = time.time()
+    results = wait_for_tasks(task_ids, org_id, session_token, progress=True)
+    print()
+    for task_id, json_response in results.items():
+        print("    " + task_id + ": " + json_response['state']['name'])
+        print_task_result(json_response)
+    elapse = time.time() - start
+    minutes = elapse // 60
+    seconds = elapse - (minutes * 60)
+    print("\nFINISHED in", '{:02}min {:02}sec'.format(int(minutes), int(seconds)))
+    return results
+
+def resume_tasks(entries, org_id, session_token):
+    """Waits on journal entries (operations never seen done), returns their results."""
+    journal = get_journal()
+    # operations the API no longer knows (expired, or another org) are closed rather than polled forever
+    def check(entry):
+        try:
+            return get_operation(entry.task_id, org_id, session_token)
+        except Exception:
+            return None         # not known yet: the wait below polls it again
+    with ThreadPoolExecutor(max_workers=settings.max_workers) as pool:
+        responses = list(pool.map(check, entries))
+    task_ids = []
+    for entry, response in zip(entries, responses):
+        if response is not None and response.status_code == 404:
+            print("    " + entry.task_id + ": unknown to the API, dropped from the journal")
+            journal.finished(org_id, entry.task_id, "UNKNOWN")
+        else:
+            task_ids.append(entry.task_id)
+    if not task_ids:
+        return {}
+    return get_tasks_status(task_ids, org_id, session_token)